@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta
+from os import getenv
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+
+from app.backend.metrics import metrics
+from app.models import (
+    ARCHIVE_TABLES,
+    Category,
+    Product,
+    Rating,
+    Review,
+    StockReservation,
+)
+
+load_dotenv()
+
+ARCHIVE_RETENTION = timedelta(days=int(getenv('ARCHIVE_RETENTION_DAYS', 90)))
+ARCHIVE_BATCH_SIZE = int(getenv('ARCHIVE_BATCH_SIZE', 500))
+# Pause between batches, so archival never competes with live traffic for
+# locks or I/O for long.
+ARCHIVE_BATCH_PAUSE = float(getenv('ARCHIVE_BATCH_PAUSE', 0.5))
+ARCHIVE_INTERVAL_SECONDS = float(getenv('ARCHIVE_INTERVAL', 3600))
+
+
+def _unreferenced_category():
+    child = aliased(Category)
+    return (
+        ~exists().where(Product.category_id == Category.id),
+        ~exists().where(child.parent_id == Category.id),
+    )
+
+
+# Rows still referenced by a live row stay put until that row is archived
+# too, so foreign keys hold and nothing active ever points into an archive.
+GUARDS = {
+    'reviews': lambda: (),
+    'ratings': lambda: (~exists().where(Review.rating_id == Rating.id),),
+    'products': lambda: (
+        ~exists().where(Review.product_id == Product.id),
+        ~exists().where(Rating.product_id == Product.id),
+        ~exists().where(StockReservation.product_id == Product.id),
+    ),
+    'categories': _unreferenced_category,
+}
+
+MODELS = {
+    'reviews': Review,
+    'ratings': Rating,
+    'products': Product,
+    'categories': Category,
+}
+
+
+async def archive_batch(
+    db: AsyncSession,
+    table: str,
+    cutoff: datetime,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """Move one batch of long inactive rows into their archive table.
+
+    Copy and delete commit together, and rows are picked by their state
+    rather than a stored position, so an interrupted run simply resumes
+    with the next batch.
+    """
+    model = MODELS[table]
+    ids = (await db.scalars(
+        select(model.id)
+        .where(
+            (model.is_active == False)
+            & (model.deactivated_at < cutoff),
+            *GUARDS[table]()
+        )
+        .order_by(model.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )).all()
+    if not ids:
+        return 0
+
+    columns = list(model.__table__.columns)
+    await db.execute(
+        insert(ARCHIVE_TABLES[table]).from_select(
+            [column.name for column in columns],
+            select(*columns).where(model.id.in_(ids))
+        )
+    )
+    await db.execute(
+        delete(model)
+        .where(model.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    metrics.inc('archived_rows_total', len(ids), table=table)
+    return len(ids)
+
+
+async def archive_inactive(
+    db: AsyncSession,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = ARCHIVE_BATCH_PAUSE
+) -> dict[str, int]:
+    """Archive everything past the retention window; returns rows per table.
+
+    Children go first, so their parents become unreferenced within the
+    same pass.
+    """
+    cutoff = datetime.now() - ARCHIVE_RETENTION
+    moved = {}
+    for table in ARCHIVE_TABLES:
+        moved[table] = 0
+        while True:
+            count = await archive_batch(db, table, cutoff, batch_size)
+            moved[table] += count
+            if count < batch_size:
+                break
+            await asyncio.sleep(pause)
+    return moved
+
+
+async def run_archiver(session_maker: async_sessionmaker) -> None:
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+        try:
+            async with session_maker() as db:
+                moved = await archive_inactive(db)
+            if any(moved.values()):
+                logger.info(f'Archived inactive rows: {moved}')
+        except Exception as ex:
+            logger.error(f'Archiving inactive rows failed: {ex}')
@@ -0,0 +1,137 @@
+import asyncio
+import json
+from os import getenv
+from urllib.parse import unquote
+
+from dotenv import load_dotenv
+from starlette.types import ASGIApp, Message, Scope
+
+from app.backend.metrics import metrics
+from app.backend.tracing import current_span
+
+load_dotenv()
+
+# Sub-requests of one batch in flight at once; each may hold a pooled
+# connection while it runs.
+BATCH_CONCURRENCY = int(getenv('BATCH_CONCURRENCY', 4))
+
+# Describe the batch request itself, not its sub-requests.
+DROPPED_HEADERS = frozenset({
+    b'accept-encoding',
+    b'content-length',
+    b'content-type',
+    b'idempotency-key',
+    b'traceparent',
+    b'x-profile',
+})
+
+
+def sub_scope(parent: Scope, path: str, headers: dict[str, str]) -> Scope:
+    """Scope of a GET sub-request, carrying the batch request's headers
+    (so its Authorization) unless ``headers`` overrides them."""
+    path, _, query = path.partition('?')
+    overrides = {
+        name.lower().encode('latin-1'): value.encode('latin-1')
+        for name, value in headers.items()
+    }
+    raw_headers = [
+        (name, value) for name, value in parent['headers']
+        if name not in DROPPED_HEADERS and name not in overrides
+    ]
+    raw_headers.extend(overrides.items())
+    parent_span = current_span.get()
+    if parent_span is not None:
+        raw_headers.append((
+            b'traceparent',
+            f'00-{parent_span.trace_id}-{parent_span.span_id}-01'.encode()
+        ))
+    scope = {
+        'type': 'http',
+        'asgi': parent['asgi'],
+        'http_version': parent['http_version'],
+        'method': 'GET',
+        'scheme': parent['scheme'],
+        'server': parent.get('server'),
+        'client': parent.get('client'),
+        'root_path': parent.get('root_path', ''),
+        'path': unquote(path),
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': raw_headers,
+    }
+    if 'state' in parent:
+        scope['state'] = dict(parent['state'])
+    return scope
+
+
+async def call(app: ASGIApp, scope: Scope) -> dict:
+    """Run one request through ``app`` and collect its response."""
+    sent = False
+    finished = asyncio.Event()
+    start: Message = {}
+    chunks: list[bytes] = []
+
+    async def receive() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            start.update(message)
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                finished.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+
+    headers = {
+        name.decode('latin-1'): value.decode('latin-1')
+        for name, value in start.get('headers', [])
+        if name != b'content-length'
+    }
+    body = b''.join(chunks)
+    if headers.get('content-type', '').startswith('application/json'):
+        content = json.loads(body) if body else None
+    else:
+        content = body.decode('utf-8', errors='replace')
+    return {
+        'status': start.get('status', 500),
+        'headers': headers,
+        'body': content,
+    }
+
+
+async def dispatch(
+    app: ASGIApp, parent: Scope, sub_requests: list
+) -> list[dict]:
+    """Run ``sub_requests`` concurrently through ``app``, results in
+    request order. A failing sub-request becomes a 500 entry and does not
+    affect the others."""
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(sub_request) -> dict:
+        async with limit:
+            try:
+                scope = sub_scope(
+                    parent, sub_request.path, sub_request.headers
+                )
+                response = await call(app, scope)
+            except Exception as ex:
+                response = {
+                    'status': 500,
+                    'headers': {},
+                    'body': {'detail': f'Sub-request failed: {ex}'},
+                }
+        metrics.inc('batch_sub_requests_total', status=response['status'])
+        return {'id': sub_request.id, 'path': sub_request.path, **response}
+
+    metrics.observe('batch_size', len(sub_requests))
+    return await asyncio.gather(*(run(r) for r in sub_requests))
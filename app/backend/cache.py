@@ -0,0 +1,196 @@
+import asyncio
+import time
+from collections import OrderedDict
+from os import getenv
+from typing import Any, Awaitable, Callable, Iterable
+
+from dotenv import load_dotenv
+
+from app.backend.metrics import metrics
+
+load_dotenv()
+
+CATALOG_CACHE_SIZE = int(getenv('CATALOG_CACHE_SIZE', 2048))
+CATALOG_CACHE_TTL = float(getenv('CATALOG_CACHE_TTL', 300))
+
+
+class CacheEntry:
+    __slots__ = ('value', 'expires_at', 'tags', 'encoded')
+
+    def __init__(self, value: Any, expires_at: float, tags: tuple[str, ...]):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+        # Rendered response bodies by content encoding, filled on first use.
+        self.encoded: dict[str, bytes] | None = None
+
+
+class Cache:
+    """LRU cache with TTL and tag based invalidation.
+
+    Every invalidation ticks a clock and stamps the tags it evicts. A value
+    produced while one of its tags was invalidated is not stored, so a slow
+    reader cannot put back data that a concurrent write just evicted.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._tagged: dict[str, set[str]] = {}
+        self._generations: dict[str, int] = {}
+        self._clock = 0
+        self._epoch = 0
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._loads = 0
+        self._coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_entry(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            metrics.inc('cache_misses_total', cache=self.name)
+            return None
+        self._entries.move_to_end(key)
+        metrics.inc('cache_hits_total', cache=self.name)
+        return entry
+
+    def get(self, key: str) -> Any:
+        entry = self.get_entry(key)
+        return None if entry is None else entry.value
+
+    def version(self, tags: Iterable[str] = ()) -> tuple:
+        """Snapshot to pass to :meth:`set` after a slow read.
+
+        :meth:`set` then drops the value if ``tags``, or any tag of the
+        entry itself, was invalidated in between, so an entry whose own tag
+        is only known once the row is loaded needs no ``tags`` here.
+        """
+        return (self._epoch, self._clock, tuple(tags))
+
+    def _is_stale(self, version: tuple, tags: tuple[str, ...]) -> bool:
+        epoch, clock, snapshot_tags = version
+        return epoch != self._epoch or any(
+            self._generations.get(tag, 0) > clock
+            for tag in (*snapshot_tags, *tags)
+        )
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        tags: tuple[str, ...] = (),
+        version: tuple | None = None
+    ) -> CacheEntry:
+        entry = CacheEntry(value, time.monotonic() + self.ttl, tags)
+        if version is not None and self._is_stale(version, tags):
+            metrics.inc('cache_stale_sets_total', cache=self.name)
+            return entry
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    async def get_or_set(
+        self,
+        key: str,
+        tags: tuple[str, ...],
+        produce: Callable[[], Awaitable[Any]],
+        entry_tags: Callable[[Any], tuple[str, ...]] | None = None
+    ) -> CacheEntry:
+        """Entry for ``key``, produced on a miss.
+
+        Concurrent misses for one key are coalesced: the first caller runs
+        ``produce`` and the others wait for it and get the same entry, or
+        the same exception. ``entry_tags`` derives the entry's tags from the
+        value when they are only known once it is loaded; ``tags`` are then
+        the ones to snapshot before loading.
+        """
+        while True:
+            entry = self.get_entry(key)
+            if entry is not None:
+                return entry
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            self._coalesced += 1
+            metrics.inc('cache_coalesced_total', cache=self.name)
+            self._report_coalescing()
+            # Shielded: a waiter that goes away must not cancel the load.
+            entry, error = await asyncio.shield(in_flight)
+            if error is not None:
+                raise error
+            if entry is not None:
+                return entry
+            # The load was cancelled with its request, so one of the
+            # waiters takes over.
+
+        done = self._in_flight[key] = asyncio.get_running_loop(
+        ).create_future()
+        self._loads += 1
+        metrics.inc('cache_loads_total', cache=self.name)
+        self._report_coalescing()
+        outcome = (None, None)
+        try:
+            version = self.version(tags)
+            value = await produce()
+            entry = self.set(
+                key,
+                value,
+                entry_tags(value) if entry_tags is not None else tags,
+                version
+            )
+            outcome = (entry, None)
+            return entry
+        except Exception as ex:
+            outcome = (None, ex)
+            raise
+        finally:
+            del self._in_flight[key]
+            done.set_result(outcome)
+
+    def invalidate(self, *tags: str) -> int:
+        evicted = 0
+        self._clock += 1
+        for tag in tags:
+            self._generations[tag] = self._clock
+            for key in self._tagged.pop(tag, ()):
+                if key in self._entries:
+                    self._remove(key)
+                    evicted += 1
+        metrics.inc('cache_evictions_total', evicted, cache=self.name)
+        return evicted
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tagged.clear()
+        self._generations.clear()
+        self._epoch += 1
+
+    def _report_coalescing(self) -> None:
+        metrics.set_gauge(
+            'cache_coalescing_ratio',
+            self._coalesced / (self._loads + self._coalesced),
+            cache=self.name
+        )
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+
+catalog_cache = Cache('catalog', CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL)
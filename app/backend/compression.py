@@ -0,0 +1,187 @@
+import gzip
+import json
+from os import getenv
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.backend.cache import CacheEntry
+from app.backend.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+load_dotenv()
+
+COMPRESSION_MIN_SIZE = int(getenv('COMPRESSION_MIN_SIZE', 1024))
+
+# Most preferred first; brotli wins ties with gzip.
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Dynamic bodies are compressed on every request and get a cheap level.
+# Cached bodies are compressed once per entry and can afford a better ratio.
+DYNAMIC_LEVELS = {'br': 4, 'gzip': 6}
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+    'text/',
+)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Pick the best encoding we support from an Accept-Encoding header."""
+    offered: dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding] = quality
+
+    wildcard = offered.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for coding in ENCODINGS:
+        quality = offered.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def render_json(content) -> bytes:
+    # Same output as JSONResponse, for values already passed through
+    # jsonable_encoder.
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return content_type is not None and content_type.startswith(
+        COMPRESSIBLE_TYPES
+    )
+
+
+class CachedJSONResponse(Response):
+    """JSON response for a cache entry, encoded once per entry.
+
+    The rendered body and every compressed variant are kept on the entry,
+    so a hot page costs one dict lookup instead of a serialise + compress.
+    """
+
+    media_type = 'application/json'
+
+    def __init__(self, entry: CacheEntry, status_code: int = 200):
+        if entry.encoded is None:
+            entry.encoded = {'identity': render_json(entry.value)}
+        self.entry = entry
+        super().__init__(entry.encoded['identity'], status_code)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        headers = MutableHeaders(raw=self.raw_headers)
+        headers.add_vary_header('Accept-Encoding')
+        encoding = negotiate(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is not None and len(self.body) >= COMPRESSION_MIN_SIZE:
+            encoded = self.entry.encoded.get(encoding)
+            if encoded is None:
+                encoded = compress(
+                    self.body, encoding, CACHED_LEVELS[encoding]
+                )
+                self.entry.encoded[encoding] = encoded
+                metrics.inc(
+                    'compressed_responses_total',
+                    source='cached',
+                    encoding=encoding
+                )
+            else:
+                metrics.inc('precompressed_hits_total', encoding=encoding)
+            self.body = encoded
+            headers['content-encoding'] = encoding
+            headers['content-length'] = str(len(encoded))
+        await super().__call__(scope, receive, send)
+
+
+class CompressionMiddleware:
+    """Compress buffered responses the client can decode.
+
+    Streamed bodies and responses that already carry a Content-Encoding
+    (such as :class:`CachedJSONResponse`) are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = message.get('body', b'')
+            passthrough = True
+            if 'content-encoding' in headers or not is_compressible(
+                headers.get('content-type')
+            ):
+                await send(start)
+                await send(message)
+                return
+            headers.add_vary_header('Accept-Encoding')
+            if message.get('more_body') or len(body) < COMPRESSION_MIN_SIZE:
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, DYNAMIC_LEVELS[encoding])
+            headers['content-encoding'] = encoding
+            headers['content-length'] = str(len(compressed))
+            metrics.inc(
+                'compressed_responses_total',
+                source='dynamic',
+                encoding=encoding
+            )
+            metrics.inc(
+                'compression_bytes_saved_total', len(body) - len(compressed)
+            )
+            await send(start)
+            await send({**message, 'body': compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,15 +1,106 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
-from app.backend.db import async_session_maker
+from app.backend.db import async_session_maker, engine
+from app.backend.metrics import metrics
+from app.backend.tracing import instrument_engine, span
+
+# Route template of the request being handled, for per-route pool metrics.
+current_route: ContextVar[str] = ContextVar('current_route', default='-')
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """Request scoped session.
+
+    An AsyncSession takes a pooled connection only when it runs its first
+    statement, so requests rejected by auth, or handlers that return before
+    querying, never touch the pool. Routes built with ReleasingRoute hand
+    the connection back as soon as the handler returns.
+    """
     async with async_session_maker() as session:
         yield session
 
 
+class ReleasingRoute(APIRoute):
+    """Closes the handler's sessions before its response is serialized.
+
+    Without this the connection stays checked out through serialization
+    and, for yield dependencies, until the response has been sent.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router rebuilds routes from the already wrapped endpoint.
+        if inspect.iscoroutinefunction(endpoint) and not getattr(
+            endpoint, '_releases_sessions', False
+        ):
+            endpoint = self._release_after(endpoint, f'handler {path}')
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _release_after(endpoint, name: str):
+        @functools.wraps(endpoint)
+        async def release_after(*args, **kwargs):
+            try:
+                with span(name):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                for value in kwargs.values():
+                    if isinstance(value, AsyncSession):
+                        # Expunges the loaded objects, which stay readable
+                        # for serialization; get_db's own close is a no-op.
+                        await value.close()
+
+        release_after._releases_sessions = True
+        return release_after
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def track_route(request):
+            token = current_route.set(route)
+            try:
+                # Dependencies, the handler and response encoding; what is
+                # not covered by a child span is encoding.
+                with span(f'route {route}'):
+                    return await handler(request)
+            finally:
+                current_route.reset(token)
+
+        return track_route
+
+
+def track_connection_hold(target: AsyncEngine) -> None:
+    """Report how long each route keeps a pooled connection checked out."""
+
+    @event.listens_for(target.sync_engine, 'checkout')
+    def on_checkout(dbapi_connection, record, proxy):
+        record.info['checked_out'] = (time.perf_counter(), current_route.get())
+
+    @event.listens_for(target.sync_engine, 'checkin')
+    def on_checkin(dbapi_connection, record):
+        checked_out = record.info.pop('checked_out', None)
+        if checked_out is None:
+            return
+        started, route = checked_out
+        metrics.observe(
+            'db_connection_hold_seconds',
+            time.perf_counter() - started,
+            route=route
+        )
+
+
+track_connection_hold(engine)
+instrument_engine(engine)
+
+
 # from app.backend.db import SessionLocal
 
 
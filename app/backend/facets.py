@@ -0,0 +1,115 @@
+from os import getenv
+
+from dotenv import load_dotenv
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.cache import catalog_cache
+from app.models import Category, Product
+
+load_dotenv()
+
+# Upper bounds of the price buckets; the last bucket is open ended.
+PRICE_BUCKETS = [
+    float(edge)
+    for edge in getenv('FACET_PRICE_BUCKETS', '10,50,100,500,1000').split(',')
+]
+
+
+def price_bucket():
+    return case(
+        *(
+            (Product.price < edge, index)
+            for index, edge in enumerate(PRICE_BUCKETS)
+        ),
+        else_=len(PRICE_BUCKETS)
+    )
+
+
+async def load_catalog_facets(db: AsyncSession) -> dict:
+    """Active product counts per (category, price bucket) and the category tree.
+
+    One GROUP BY per catalog change instead of per request: the result is
+    cached and evicted together with product and category entries.
+    """
+
+    async def fetch():
+        bucket = price_bucket()
+        cells = await db.execute(
+            select(Product.category_id, bucket, func.count())
+            .where(Product.is_active & (Product.stock > 0))
+            .group_by(Product.category_id, bucket)
+        )
+        categories = await db.execute(
+            select(
+                Category.id, Category.parent_id, Category.slug, Category.name
+            )
+            .where(Category.is_active == True)
+        )
+        return {
+            'cells': [list(row) for row in cells],
+            'categories': [list(row) for row in categories],
+        }
+
+    entry = await catalog_cache.get_or_set(
+        'facets', ('products', 'categories'), fetch
+    )
+    return entry.value
+
+
+def category_subtree(facets: dict, category_id: int) -> set[int]:
+    children: dict[int, list[int]] = {}
+    known = set()
+    for cat_id, parent_id, _, _ in facets['categories']:
+        known.add(cat_id)
+        children.setdefault(parent_id, []).append(cat_id)
+    if category_id not in known:
+        return set()
+
+    subtree, stack = set(), [category_id]
+    while stack:
+        current = stack.pop()
+        if current not in subtree:
+            subtree.add(current)
+            stack.extend(children.get(current, ()))
+    return subtree
+
+
+def facet_counts(facets: dict, category_id: int | None = None) -> dict:
+    parents = {cat_id: parent for cat_id, parent, _, _ in facets['categories']}
+    scope = (
+        None if category_id is None else category_subtree(facets, category_id)
+    )
+
+    per_category: dict[int, int] = {}
+    per_bucket = [0] * (len(PRICE_BUCKETS) + 1)
+    for cat_id, bucket, count in facets['cells']:
+        if cat_id not in parents:
+            continue
+        # Roll the count up to every active ancestor.
+        seen = set()
+        node = cat_id
+        while node is not None and node in parents and node not in seen:
+            seen.add(node)
+            per_category[node] = per_category.get(node, 0) + count
+            node = parents[node]
+        if scope is None or cat_id in scope:
+            per_bucket[bucket] += count
+
+    edges = [0.0, *PRICE_BUCKETS, None]
+    return {
+        'categories': [
+            {
+                'id': cat_id,
+                'parent_id': parent_id,
+                'slug': slug,
+                'name': name,
+                'count': per_category.get(cat_id, 0)
+            }
+            for cat_id, parent_id, slug, name in facets['categories']
+        ],
+        'price': [
+            {'min': edges[i], 'max': edges[i + 1], 'count': count}
+            for i, count in enumerate(per_bucket)
+        ],
+    }
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+from os import getenv
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.backend.cache import Cache
+from app.backend.metrics import metrics
+
+load_dotenv()
+
+IDEMPOTENCY_HEADER = 'idempotency-key'
+IDEMPOTENCY_STORE_SIZE = int(getenv('IDEMPOTENCY_STORE_SIZE', 10000))
+IDEMPOTENCY_TTL = float(getenv('IDEMPOTENCY_TTL', 24 * 60 * 60))
+# Responses larger than this are passed on but not kept for replays.
+IDEMPOTENCY_MAX_BODY = int(getenv('IDEMPOTENCY_MAX_BODY', 64 * 1024))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+UNSAFE_METHODS = ('POST', 'PATCH')
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(len(part).to_bytes(8, 'big'))
+        h.update(part)
+    return h.hexdigest()
+
+
+async def _error(send: Send, status_code: int, detail: str) -> None:
+    body = json.dumps({'detail': detail}).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status_code,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class IdempotencyMiddleware:
+    """Run a POST/PATCH that carries an ``Idempotency-Key`` header once.
+
+    The first response for a key is kept in ``store`` and replayed, with
+    ``Idempotent-Replayed: true``, to retries with the same key. Keys are
+    scoped to the caller's Authorization header, method and path. A retry
+    that arrives while the first attempt is still running waits for it
+    instead of running the handler a second time. 5xx responses are not
+    kept, so a retry after a server error runs again; reusing a key with a
+    different body is rejected with 422.
+
+    The store is per worker process: a retry that lands on another worker
+    runs again and meets the usual unique constraints.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_entries: int = IDEMPOTENCY_STORE_SIZE,
+        ttl: float = IDEMPOTENCY_TTL
+    ):
+        self.app = app
+        self.store = Cache('idempotency', max_entries, ttl)
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or scope['method'] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            await _error(send, 400, 'Invalid Idempotency-Key header')
+            return
+
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message['type'] != 'http.request' or not message.get(
+                'more_body'
+            ):
+                break
+        body = b''.join(m.get('body', b'') for m in messages)
+        key = _digest(
+            headers.get('authorization', '').encode(),
+            scope['method'].encode(),
+            scope['path'].encode(),
+            idempotency_key.encode()
+        )
+        fingerprint = _digest(scope.get('query_string', b''), body)
+
+        while True:
+            stored = self.store.get(key)
+            if stored is not None:
+                await self._replay(stored, fingerprint, send)
+                return
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            metrics.inc('idempotency_waits_total')
+            # Shielded: a waiter that disconnects must not cancel the
+            # attempt it is waiting for.
+            await asyncio.shield(in_flight)
+
+        done = self._in_flight[key] = asyncio.get_running_loop(
+        ).create_future()
+        try:
+            await self._execute(
+                scope, messages, receive, send, key, fingerprint
+            )
+        finally:
+            del self._in_flight[key]
+            done.set_result(None)
+
+    async def _execute(
+        self,
+        scope: Scope,
+        messages: list[Message],
+        receive: Receive,
+        send: Send,
+        key: str,
+        fingerprint: str
+    ) -> None:
+        pending = iter(messages)
+
+        async def replay_receive() -> Message:
+            message = next(pending, None)
+            return message if message is not None else await receive()
+
+        start: Message | None = None
+        chunks: list[bytes] = []
+        size = 0
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal start, size
+            if message['type'] == 'http.response.start':
+                start = message
+            elif message['type'] == 'http.response.body' and size >= 0:
+                chunk = message.get('body', b'')
+                size += len(chunk)
+                chunks.append(chunk)
+                if size > IDEMPOTENCY_MAX_BODY:
+                    size = -1
+                    chunks.clear()
+            await send(message)
+
+        await self.app(scope, replay_receive, send_and_capture)
+        if start is None or start['status'] >= 500 or size < 0:
+            return
+        self.store.set(key, {
+            'fingerprint': fingerprint,
+            'status': start['status'],
+            'headers': list(start.get('headers', [])),
+            'body': b''.join(chunks),
+        })
+        metrics.inc('idempotency_stored_total')
+
+    async def _replay(
+        self, stored: dict, fingerprint: str, send: Send
+    ) -> None:
+        if stored['fingerprint'] != fingerprint:
+            metrics.inc('idempotency_conflicts_total')
+            await _error(
+                send, 422,
+                'Idempotency-Key was already used with a different request'
+            )
+            return
+        metrics.inc('idempotency_replays_total')
+        await send({
+            'type': 'http.response.start',
+            'status': stored['status'],
+            'headers': stored['headers'] + [
+                (b'idempotent-replayed', b'true')
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': stored['body']})
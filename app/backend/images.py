@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from app.backend.metrics import metrics
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional, uploads are refused without it
+    Image = ImageOps = None
+
+load_dotenv()
+
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', 'media'))
+MAX_IMAGE_BYTES = int(os.getenv('MAX_IMAGE_BYTES', 10 * 1024 * 1024))
+IMAGE_WIDTHS = tuple(
+    int(width) for width in os.getenv('IMAGE_WIDTHS', '160,480,1200').split(',')
+)
+# The variant image_url points at; the rest share its directory.
+DEFAULT_IMAGE_WIDTH = int(os.getenv('DEFAULT_IMAGE_WIDTH', 480))
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', os.cpu_count() or 1))
+# Largest decoded image accepted, guards against decompression bombs.
+MAX_IMAGE_PIXELS = 40_000_000
+
+# Variants are content addressed, so their URLs never change meaning.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+_pool: ProcessPoolExecutor | None = None
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def images_available() -> bool:
+    return Image is not None
+
+
+def image_dir(product_id: int, digest: str) -> Path:
+    return MEDIA_ROOT / 'products' / str(product_id) / digest
+
+
+def image_url(product_id: int, digest: str, name: str) -> str:
+    return f'/images/{product_id}/{digest}/{name}'
+
+
+def _write_atomic(path: Path, save) -> None:
+    # The same upload may be processed twice at once, e.g. a retry on
+    # another worker; each writer swaps in its own file.
+    fd, tmp = tempfile.mkstemp(
+        dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp'
+    )
+    os.close(fd)
+    tmp = Path(tmp)
+    try:
+        save(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def process_image(data: bytes, target: str) -> dict:
+    """Store the original and its resized JPEG and WebP variants.
+
+    Runs in a worker process: decoding and resampling are CPU bound and
+    would otherwise stall the event loop.
+    """
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            probe.verify()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as ex:
+        raise InvalidImage(str(ex)) from ex
+    extension = FORMATS.get(image.format)
+    if extension is None:
+        raise InvalidImage(f'Unsupported image format {image.format}')
+
+    directory = Path(target)
+    directory.mkdir(parents=True, exist_ok=True)
+    original = f'original.{extension}'
+    _write_atomic(directory / original, lambda path: path.write_bytes(data))
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    # Never upscale: widths above the original collapse into one variant.
+    widths = sorted({min(width, image.width) for width in IMAGE_WIDTHS})
+    variants = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        _write_atomic(
+            directory / f'{width}.jpg',
+            lambda path: resized.save(
+                path, 'JPEG', quality=85, optimize=True, progressive=True
+            )
+        )
+        _write_atomic(
+            directory / f'{width}.webp',
+            lambda path: resized.save(path, 'WEBP', quality=80, method=4)
+        )
+        variants.append({'width': width, 'height': height})
+    return {'original': original, 'variants': variants}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Forking a process that already runs threads (aiosqlite, loguru's
+        # queue) can deadlock the child, so workers start fresh.
+        _pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def store_product_image(product_id: int, data: bytes) -> dict:
+    """Process an upload off the event loop and describe its variant set."""
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    stored = await loop.run_in_executor(
+        _get_pool(), process_image, data, str(image_dir(product_id, digest))
+    )
+    metrics.observe('image_processing_seconds', time.perf_counter() - started)
+    metrics.inc('images_processed_total')
+
+    variants = [
+        {
+            **variant,
+            'jpeg': image_url(product_id, digest, f"{variant['width']}.jpg"),
+            'webp': image_url(product_id, digest, f"{variant['width']}.webp"),
+        }
+        for variant in stored['variants']
+    ]
+    default = min(
+        variants, key=lambda v: abs(v['width'] - DEFAULT_IMAGE_WIDTH)
+    )
+    return {
+        'image_url': default['jpeg'],
+        'original': image_url(product_id, digest, stored['original']),
+        'variants': variants,
+    }
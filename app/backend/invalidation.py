@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import socket
+from typing import Callable
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy.engine import make_url
+
+from app.backend.cache import Cache, catalog_cache
+from app.backend.db import DATABASE_URL
+from app.backend.metrics import metrics
+
+load_dotenv()
+
+INVALIDATION_CHANNEL = os.getenv('INVALIDATION_CHANNEL', 'catalog_invalidation')
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+
+# Cache tags evicted by an event, per entity type. ``products`` covers the
+# lists, pages and facets; a product's detail is only tagged with its own.
+ENTITY_TAGS = {
+    'product': lambda entity_id: ('products', f'product:{entity_id}'),
+    'category': lambda entity_id: ('categories',),
+}
+
+
+class InMemoryTransport:
+    """Stand-in for LISTEN/NOTIFY: every connected bus sees every event."""
+
+    def __init__(self):
+        self._listeners: list[tuple[Callable, Callable]] = []
+
+    async def connect(self, on_message: Callable, on_disconnect: Callable):
+        self._listeners.append((on_message, on_disconnect))
+
+    async def publish(self, payload: str) -> None:
+        for on_message, _ in list(self._listeners):
+            on_message(payload)
+
+    def disconnect_all(self) -> None:
+        listeners, self._listeners = self._listeners, []
+        for _, on_disconnect in listeners:
+            on_disconnect()
+
+
+class PostgresTransport:
+    def __init__(self, dsn: str, channel: str = INVALIDATION_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self, on_message: Callable, on_disconnect: Callable):
+        import asyncpg
+
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(lambda conn: on_disconnect())
+        await self._conn.add_listener(
+            self.channel,
+            lambda conn, pid, channel, payload: on_message(payload)
+        )
+
+    async def publish(self, payload: str) -> None:
+        if self._conn is None or self._conn.is_closed():
+            raise ConnectionError('Invalidation listener is not connected')
+        async with self._lock:
+            await self._conn.execute(
+                'SELECT pg_notify($1, $2)', self.channel, payload
+            )
+
+
+class InvalidationBus:
+    """Keeps in-process caches coherent across worker processes.
+
+    Writers publish ``(origin, seq, entity, id)`` events after commit. Each
+    worker evicts the matching tags. A hole in an origin's sequence, or a
+    listener reconnect, means events may have been lost, so the whole cache
+    is dropped instead of serving possibly stale entries.
+    """
+
+    def __init__(self, cache: Cache, transport=None):
+        self.cache = cache
+        self.transport = transport
+        self.origin = f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+        self.connected = False
+        self._seq = 0
+        self._last_seen: dict[str, int] = {}
+        self._subscribers: list[Callable[[dict], None]] = []
+        self._disconnected = asyncio.Event()
+
+    def subscribe(self, callback: Callable[[dict], None]) -> None:
+        """Call ``callback`` for every applied event.
+
+        A resync is reported as an event with ``entity`` set to ``'*'``.
+        """
+        self._subscribers.append(callback)
+
+    async def publish(self, entity: str, entity_id: int) -> None:
+        self._seq += 1
+        event = {
+            'origin': self.origin,
+            'seq': self._seq,
+            'entity': entity,
+            'id': entity_id
+        }
+        self._apply(event)
+        if self.transport is None or not self.connected:
+            return
+        try:
+            await self.transport.publish(json.dumps(event))
+            metrics.inc('invalidation_published_total', entity=entity)
+        except Exception as ex:
+            # The sequence number is spent, so peers will see a gap and
+            # resync once we are back.
+            logger.error(f'Failed to publish invalidation: {ex}')
+            self._on_disconnect()
+
+    def resync(self) -> None:
+        self.cache.clear()
+        self._last_seen.clear()
+        metrics.inc('invalidation_resyncs_total')
+        for callback in self._subscribers:
+            callback({'entity': '*', 'id': None})
+
+    async def run(self) -> None:
+        if self.transport is None:
+            return
+        delay = RECONNECT_MIN_SECONDS
+        first = True
+        while True:
+            try:
+                self._disconnected.clear()
+                await self.transport.connect(
+                    self._on_message, self._on_disconnect
+                )
+                self.connected = True
+                if not first:
+                    self.resync()
+                first = False
+                delay = RECONNECT_MIN_SECONDS
+                await self._disconnected.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.error(f'Invalidation listener failed: {ex}')
+            self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def _on_disconnect(self) -> None:
+        self.connected = False
+        self._disconnected.set()
+
+    def _on_message(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            origin, seq = event['origin'], event['seq']
+        except (ValueError, KeyError, TypeError):
+            logger.error(f'Malformed invalidation event: {payload!r}')
+            return
+        if origin == self.origin:
+            return
+        metrics.inc('invalidation_received_total', entity=event.get('entity'))
+
+        last = self._last_seen.get(origin)
+        if last is not None and seq > last + 1:
+            logger.warning(f'Invalidation gap from {origin}: {last} -> {seq}')
+            self.resync()
+        self._last_seen[origin] = max(seq, last or 0)
+        self._apply(event)
+
+    def _apply(self, event: dict) -> None:
+        tags = ENTITY_TAGS.get(event['entity'])
+        if tags is not None:
+            self.cache.invalidate(*tags(event['id']))
+        for callback in self._subscribers:
+            callback(event)
+
+
+def default_transport():
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() != 'postgresql':
+        return None
+    dsn = url.set(drivername='postgresql').render_as_string(hide_password=False)
+    return PostgresTransport(dsn)
+
+
+invalidation_bus = InvalidationBus(catalog_cache, default_transport())
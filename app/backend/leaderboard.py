@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+from bisect import bisect_left, insort
+from datetime import date, timedelta
+from os import getenv
+from typing import Callable
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend import warmup
+from app.backend.invalidation import invalidation_bus
+from app.backend.metrics import metrics
+from app.models import Product, Review
+
+load_dotenv()
+
+TRENDING_MAX_DAYS = int(getenv('TRENDING_MAX_DAYS', 30))
+
+
+class ProductStats:
+    __slots__ = ('product_id', 'category_id', 'rating', 'reviews', 'daily')
+
+    def __init__(self, product_id, category_id, rating, reviews):
+        self.product_id = product_id
+        self.category_id = category_id
+        self.rating = rating
+        self.reviews = reviews
+        self.daily: dict[date, int] = {}
+
+
+class Ranking:
+    """Products kept sorted by ``key``, globally and per category."""
+
+    def __init__(self, key: Callable[[ProductStats], tuple]):
+        self.key = key
+        self.everything: list[tuple] = []
+        self.by_category: dict[int, list[tuple]] = {}
+
+    def add(self, stats: ProductStats) -> None:
+        key = self.key(stats)
+        insort(self.everything, key)
+        insort(self.by_category.setdefault(stats.category_id, []), key)
+
+    def remove(self, stats: ProductStats) -> None:
+        key = self.key(stats)
+        for ranked in (
+            self.everything, self.by_category.get(stats.category_id, [])
+        ):
+            index = bisect_left(ranked, key)
+            if index < len(ranked) and ranked[index] == key:
+                del ranked[index]
+
+    def iterate(self, category_ids: set[int] | None):
+        if category_ids is None:
+            return iter(self.everything)
+        return heapq.merge(
+            *(self.by_category.get(cat_id, []) for cat_id in category_ids)
+        )
+
+
+class Leaderboard:
+    """Precomputed product rankings, refreshed per product as reviews arrive.
+
+    Writes only mark products dirty (through the invalidation bus, so other
+    workers see them too); the next read reloads just those products.
+    """
+
+    def __init__(self):
+        self._stats: dict[int, ProductStats] = {}
+        self._top_rated = Ranking(
+            lambda s: (-s.rating, -s.reviews, s.product_id)
+        )
+        self._most_reviewed = Ranking(
+            lambda s: (-s.reviews, -s.rating, s.product_id)
+        )
+        # Products with reviews inside the trending window.
+        self._recent: set[int] = set()
+        self._dirty: set[int] = set()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def on_event(self, event: dict) -> None:
+        if event['entity'] == 'product':
+            self._dirty.add(event['id'])
+        elif event['entity'] == '*':
+            self._loaded = False
+
+    async def refresh(self, db: AsyncSession) -> None:
+        if self._loaded and not self._dirty:
+            return
+        async with self._lock:
+            if not self._loaded:
+                self._dirty.clear()
+                self._clear()
+                await self._load(db, None)
+                self._loaded = True
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                try:
+                    await self._load(db, dirty)
+                except Exception:
+                    self._dirty |= dirty
+                    raise
+        metrics.set_gauge('leaderboard_products', len(self._stats))
+
+    def top_rated(self, category_ids, limit, min_reviews=1) -> list[int]:
+        ranked = (
+            key[2] for key in self._top_rated.iterate(category_ids)
+            if -key[1] >= min_reviews
+        )
+        return [product_id for product_id, _ in zip(ranked, range(limit))]
+
+    def most_reviewed(self, category_ids, limit) -> list[int]:
+        ranked = (
+            key[2] for key in self._most_reviewed.iterate(category_ids)
+            if key[0] < 0
+        )
+        return [product_id for product_id, _ in zip(ranked, range(limit))]
+
+    def trending(self, category_ids, days, limit) -> list[tuple[int, int]]:
+        since = date.today() - timedelta(days=days)
+        scores = []
+        for product_id in self._recent:
+            stats = self._stats[product_id]
+            if category_ids is not None and (
+                stats.category_id not in category_ids
+            ):
+                continue
+            recent = sum(n for day, n in stats.daily.items() if day > since)
+            if recent:
+                scores.append((recent, stats.product_id))
+        top = heapq.nlargest(limit, scores, key=lambda s: (s[0], -s[1]))
+        return [(product_id, recent) for recent, product_id in top]
+
+    def stats(self, product_id: int) -> ProductStats | None:
+        return self._stats.get(product_id)
+
+    def _clear(self) -> None:
+        self._stats.clear()
+        self._recent.clear()
+        self._top_rated = Ranking(self._top_rated.key)
+        self._most_reviewed = Ranking(self._most_reviewed.key)
+
+    async def _load(self, db: AsyncSession, product_ids: set[int] | None):
+        products = (
+            select(
+                Product.id,
+                Product.category_id,
+                Product.rating,
+                func.count(Review.id)
+            )
+            .outerjoin(
+                Review,
+                (Review.product_id == Product.id) & (Review.is_active == True)
+            )
+            .where(Product.is_active & (Product.stock > 0))
+            .group_by(Product.id, Product.category_id, Product.rating)
+        )
+        since = date.today() - timedelta(days=TRENDING_MAX_DAYS)
+        daily = (
+            select(Review.product_id, Review.comment_date, func.count())
+            .where((Review.is_active == True) & (Review.comment_date > since))
+            .group_by(Review.product_id, Review.comment_date)
+        )
+        if product_ids is not None:
+            products = products.where(Product.id.in_(product_ids))
+            daily = daily.where(Review.product_id.in_(product_ids))
+        product_rows = (await db.execute(products)).all()
+        daily_rows = (await db.execute(daily)).all()
+
+        # No awaits from here on, so readers never see half-applied state.
+        for product_id in product_ids or ():
+            self._discard(product_id)
+        for product_id, category_id, rating, reviews in product_rows:
+            stats = ProductStats(
+                product_id, category_id, rating or 0.0, reviews
+            )
+            self._stats[product_id] = stats
+            self._top_rated.add(stats)
+            self._most_reviewed.add(stats)
+        for product_id, day, count in daily_rows:
+            stats = self._stats.get(product_id)
+            if stats is not None:
+                stats.daily[day] = count
+                self._recent.add(product_id)
+
+    def _discard(self, product_id: int) -> None:
+        stats = self._stats.pop(product_id, None)
+        self._recent.discard(product_id)
+        if stats is not None:
+            self._top_rated.remove(stats)
+            self._most_reviewed.remove(stats)
+
+
+leaderboard = Leaderboard()
+invalidation_bus.subscribe(leaderboard.on_event)
+warmup.prefill('leaderboard', leaderboard.refresh)
@@ -0,0 +1,118 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from os import getenv
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from app.backend.metrics import metrics
+
+load_dotenv()
+
+LOOP_LAG_INTERVAL = float(getenv('LOOP_LAG_INTERVAL_MS', 100)) / 1000
+LOOP_BLOCK_THRESHOLD = float(getenv('LOOP_BLOCK_MS', 200)) / 1000
+LOOP_BLOCKS_KEPT = int(getenv('LOOP_BLOCKS_KEPT', 50))
+MAX_STACK_DEPTH = 40
+
+
+def _route_of(frames: list) -> str:
+    """Route template from ReleasingRoute's wrapper frame, if the blocking
+    code runs inside a route handler."""
+    for frame in frames:
+        if (
+            frame.f_code.co_name == 'track_route'
+            and frame.f_globals.get('__name__') == 'app.backend.db_depends'
+        ):
+            return frame.f_locals.get('route', '-')
+    return '-'
+
+
+class LoopWatchdog:
+    """Measures event loop lag and catches whatever blocks the loop.
+
+    A heartbeat on the loop sleeps for LOOP_LAG_INTERVAL and records how
+    late it wakes up. A side thread watches that heartbeat; once it has
+    been silent for LOOP_BLOCK_THRESHOLD the loop is stuck in synchronous
+    code, and the thread captures the loop thread's stack and the route it
+    belongs to. Lag and blocks go to metrics, blocks also to ``blocks``.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_LAG_INTERVAL,
+        threshold: float = LOOP_BLOCK_THRESHOLD
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocks: deque[dict] = deque(maxlen=LOOP_BLOCKS_KEPT)
+        self._beat = time.perf_counter()
+        self._open: dict | None = None
+        self._loop_thread: int | None = None
+        self._stopped = threading.Event()
+
+    async def run(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stopped.clear()
+        watcher = threading.Thread(
+            target=self._watch, name='loop-watchdog', daemon=True
+        )
+        watcher.start()
+        try:
+            while True:
+                expected = time.perf_counter() + self.interval
+                await asyncio.sleep(self.interval)
+                self._beat = now = time.perf_counter()
+                lag = max(0.0, now - expected)
+                metrics.observe('event_loop_lag_seconds', lag)
+                metrics.set_gauge('event_loop_lag_last_seconds', lag)
+                block, self._open = self._open, None
+                if block is not None:
+                    block['blocked_seconds'] = round(lag, 6)
+                    logger.warning(
+                        f'Event loop blocked for {lag * 1000:.0f} ms '
+                        f'in {block["route"]} at {block["stack"][-1]}'
+                    )
+        finally:
+            self._stopped.set()
+            watcher.join()
+
+    def _watch(self) -> None:
+        captured = None
+        while not self._stopped.wait(self.threshold / 4):
+            beat = self._beat
+            if beat == captured:
+                continue
+            if time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+            captured = beat
+            self._capture()
+
+    def _capture(self) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        route = _route_of(frames)
+        block = {
+            'at': datetime.now(),
+            'route': route,
+            'blocked_seconds': None,
+            'stack': [
+                f"{f.f_globals.get('__name__', '?')}:"
+                f"{f.f_code.co_qualname}:{f.f_lineno}"
+                for f in frames[-MAX_STACK_DEPTH:]
+            ]
+        }
+        self.blocks.append(block)
+        self._open = block
+        metrics.inc('event_loop_blocks_total', route=route)
+
+
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,55 @@
+from collections import defaultdict
+from threading import Lock
+
+
+def _key(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    rendered = ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f'{name}{{{rendered}}}'
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.counters: dict[str, float] = defaultdict(float)
+        self.gauges: dict[str, float] = {}
+        self.summaries: dict[str, dict] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        with self._lock:
+            self.counters[_key(name, labels)] += value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            summary = self.summaries.setdefault(
+                key, {'count': 0, 'sum': 0.0, 'max': 0.0}
+            )
+            summary['count'] += 1
+            summary['sum'] += value
+            summary['max'] = max(summary['max'], value)
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get(_key(name, labels), 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'summaries': {k: dict(v) for k, v in self.summaries.items()},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.summaries.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import date
+from os import getenv
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import Connection, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backend import warmup
+
+load_dotenv()
+
+# Monthly partitions kept ready ahead of today.
+REVIEW_PARTITIONS_AHEAD = int(getenv('REVIEW_PARTITIONS_AHEAD', 3))
+PARTITION_CHECK_INTERVAL = float(getenv('PARTITION_CHECK_INTERVAL', 86400))
+
+REVIEW_INDEXES = (
+    'CREATE INDEX ix_reviews_id ON reviews (id)',
+    'CREATE INDEX ix_reviews_deactivated_at ON reviews (deactivated_at)',
+    'CREATE INDEX ix_reviews_product_id_comment_date '
+    'ON reviews (product_id, comment_date)',
+)
+REVIEW_FOREIGN_KEYS = (
+    ('user_id', 'users'),
+    ('product_id', 'products'),
+    ('rating_id', 'ratings'),
+)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'reviews_p{month:%Y_%m}'
+
+
+def reviews_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != 'postgresql':
+        return False
+    return bool(conn.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'reviews' AND pg_table_is_visible(c.oid))"
+    )))
+
+
+def create_review_partitions(
+    conn: Connection, first: date, last: date
+) -> list[str]:
+    """Create the monthly partitions covering ``first``..``last``."""
+    created = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(month)
+        exists = conn.scalar(text('SELECT to_regclass(:name)'), {'name': name})
+        if exists is None:
+            try:
+                # A savepoint, so one clash with rows already sitting in the
+                # default partition does not abort the whole run.
+                with conn.begin_nested():
+                    conn.execute(text(
+                        f'CREATE TABLE {name} PARTITION OF reviews '
+                        f"FOR VALUES FROM ('{month}') "
+                        f"TO ('{add_months(month, 1)}')"
+                    ))
+                created.append(name)
+            except DBAPIError as ex:
+                logger.error(f'Could not create partition {name}: {ex}')
+        month = add_months(month, 1)
+    return created
+
+
+def _rebuild_reviews(conn: Connection, partitioned: bool) -> None:
+    conn.execute(text('ALTER TABLE reviews RENAME TO reviews_old'))
+    conn.execute(text(
+        'CREATE TABLE reviews (LIKE reviews_old INCLUDING DEFAULTS) '
+        + ('PARTITION BY RANGE (comment_date)' if partitioned else '')
+    ))
+    if partitioned:
+        conn.execute(text(
+            'CREATE TABLE reviews_default PARTITION OF reviews DEFAULT'
+        ))
+        first = conn.scalar(text('SELECT min(comment_date) FROM reviews_old'))
+        today = date.today()
+        create_review_partitions(
+            conn,
+            min(first or today, today),
+            add_months(month_start(today), REVIEW_PARTITIONS_AHEAD)
+        )
+    conn.execute(text('INSERT INTO reviews SELECT * FROM reviews_old'))
+    # The id sequence belongs to the old table and would go with it.
+    conn.execute(text('ALTER SEQUENCE reviews_id_seq OWNED BY reviews.id'))
+    conn.execute(text('DROP TABLE reviews_old'))
+
+    # A partitioned table's unique keys must contain the partition key.
+    key = 'id, comment_date' if partitioned else 'id'
+    conn.execute(text(f'ALTER TABLE reviews ADD PRIMARY KEY ({key})'))
+    for statement in REVIEW_INDEXES:
+        conn.execute(text(statement))
+    for column, target in REVIEW_FOREIGN_KEYS:
+        conn.execute(text(
+            f'ALTER TABLE reviews ADD FOREIGN KEY ({column}) '
+            f'REFERENCES {target} (id)'
+        ))
+
+
+def partition_reviews(conn: Connection) -> None:
+    """Turn ``reviews`` into a table range partitioned by month.
+
+    PostgreSQL only: rows are copied into monthly partitions, dates outside
+    the prepared range land in reviews_default.
+    """
+    if conn.dialect.name == 'postgresql' and not reviews_partitioned(conn):
+        _rebuild_reviews(conn, partitioned=True)
+
+
+def unpartition_reviews(conn: Connection) -> None:
+    if reviews_partitioned(conn):
+        _rebuild_reviews(conn, partitioned=False)
+
+
+def _ensure_upcoming(conn: Connection) -> list[str]:
+    if not reviews_partitioned(conn):
+        return []
+    this_month = month_start(date.today())
+    return create_review_partitions(
+        conn, this_month, add_months(this_month, REVIEW_PARTITIONS_AHEAD)
+    )
+
+
+async def ensure_review_partitions(db: AsyncSession) -> list[str]:
+    connection = await db.connection()
+    created = await connection.run_sync(_ensure_upcoming)
+    await db.commit()
+    if created:
+        logger.info(f'Created review partitions: {created}')
+    return created
+
+
+async def run_partition_maintenance(session_maker: async_sessionmaker):
+    while True:
+        await asyncio.sleep(PARTITION_CHECK_INTERVAL)
+        try:
+            async with session_maker() as db:
+                await ensure_review_partitions(db)
+        except Exception as ex:
+            logger.error(f'Review partition maintenance failed: {ex}')
+
+
+warmup.prefill('review_partitions', ensure_review_partitions)
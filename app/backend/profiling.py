@@ -0,0 +1,222 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from os import getenv
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.backend.metrics import metrics
+
+load_dotenv()
+
+PROFILE_HEADER = b'x-profile'
+PROFILE_INTERVAL = float(getenv('PROFILE_INTERVAL_MS', 1)) / 1000
+PROFILES_KEPT = int(getenv('PROFILES_KEPT', 20))
+
+DB_MODULES = ('sqlalchemy', 'asyncpg', 'aiosqlite')
+SERIALIZATION_FUNCTIONS = frozenset({
+    'serialize_response',
+    'jsonable_encoder',
+    'render',
+    'render_json',
+})
+CATEGORIES = ('handler', 'db', 'serialization', 'await')
+
+
+def _await_chain(coro) -> list:
+    """Frames of a suspended coroutine, outermost first."""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(
+            coro, 'ag_frame', None
+        ) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, 'cr_await', None) or getattr(
+            coro, 'ag_await', None
+        ) or getattr(coro, 'gi_yieldfrom', None)
+    return frames
+
+
+def _label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+def _category(frames: list, running: bool) -> str:
+    modules = [frame.f_globals.get('__name__', '') for frame in frames]
+    if any(module.startswith(DB_MODULES) for module in modules):
+        return 'db'
+    if any(
+        frame.f_code.co_name in SERIALIZATION_FUNCTIONS for frame in frames
+    ):
+        return 'serialization'
+    return 'handler' if running else 'await'
+
+
+class Sampler(threading.Thread):
+    """Samples one asyncio task from a side thread.
+
+    When the task is on the loop thread its live stack is recorded,
+    otherwise the chain of awaits it is suspended in; either way the
+    stack is folded under the category it belongs to: ``db`` when it is
+    inside the database layer, ``serialization`` while the response is
+    encoded, ``handler`` for other work and ``await`` for other waits.
+    """
+
+    def __init__(self, task: asyncio.Task, thread_id: int, interval: float):
+        super().__init__(name='request-profiler', daemon=True)
+        self.task = task
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        # Seconds spent per folded stack.
+        self.stacks: Counter[str] = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._done.wait(self.interval):
+            # A busy loop thread holds the GIL for up to the switch
+            # interval, so each sample is weighed by the time it covers
+            # rather than by the nominal interval.
+            now = time.perf_counter()
+            try:
+                self.sample(now - last)
+            except (AttributeError, ValueError):
+                # The stack changed under us, skip this tick.
+                pass
+            last = now
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+    def sample(self, elapsed: float) -> None:
+        root = self.task.get_coro().cr_frame
+        frame = sys._current_frames().get(self.thread_id)
+        frames = []
+        while frame is not None and frame is not root:
+            frames.append(frame)
+            frame = frame.f_back
+        running = frame is root and root is not None
+        if running:
+            frames.append(root)
+            frames.reverse()
+        else:
+            frames = _await_chain(self.task.get_coro())
+        if not frames:
+            return
+        category = _category(frames, running)
+        self.samples += 1
+        self.stacks[';'.join([category, *map(_label, frames)])] += elapsed
+
+
+class ProfileStore:
+    """The last PROFILES_KEPT profiles, newest last."""
+
+    def __init__(self, size: int = PROFILES_KEPT):
+        self.size = size
+        self._profiles: OrderedDict[str, dict] = OrderedDict()
+
+    def add(self, profile: dict) -> None:
+        self._profiles[profile['id']] = profile
+        while len(self._profiles) > self.size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> dict | None:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> list[dict]:
+        return [
+            {key: value for key, value in profile.items() if key != 'folded'}
+            for profile in self._profiles.values()
+        ]
+
+
+def _summary(stacks: Counter) -> dict:
+    seconds = dict.fromkeys(CATEGORIES, 0.0)
+    for stack, spent in stacks.items():
+        seconds[stack.partition(';')[0]] += spent
+    return {name: round(value, 6) for name, value in seconds.items()}
+
+
+class ProfilingMiddleware:
+    """Statistical profile of a single request, on demand.
+
+    Requests carrying ``X-Profile: 1`` from an admin are sampled every
+    PROFILE_INTERVAL; the response gets an ``X-Profile-Id`` header and the
+    profile, with folded stacks for flamegraph tools, is kept in
+    ``profiles``. Any other request costs one scan of its header list.
+
+    Must sit inside any middleware that runs the app in a task of its own
+    (BaseHTTPMiddleware does), so the sampled task is the handler's.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        authorize: Callable[[str], Awaitable[bool]]
+    ):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not any(
+            name == PROFILE_HEADER and value in (b'1', b'true')
+            for name, value in scope['headers']
+        ):
+            await self.app(scope, receive, send)
+            return
+        authorization = Headers(scope=scope).get('authorization', '')
+        if not await self.authorize(authorization):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex[:12]
+        status_code = None
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                MutableHeaders(scope=message).append(
+                    'X-Profile-Id', profile_id
+                )
+            await send(message)
+
+        sampler = Sampler(
+            asyncio.current_task(), threading.get_ident(), PROFILE_INTERVAL
+        )
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            wall = time.perf_counter() - started
+            profiles.add({
+                'id': profile_id,
+                'method': scope['method'],
+                'path': scope['path'],
+                'status': status_code,
+                'wall_seconds': round(wall, 6),
+                'samples': sampler.samples,
+                'interval_seconds': PROFILE_INTERVAL,
+                'seconds': _summary(sampler.stacks),
+                # Weights are microseconds.
+                'folded': '\n'.join(
+                    f'{stack} {round(spent * 1_000_000)}'
+                    for stack, spent in sampler.stacks.most_common()
+                )
+            })
+            metrics.inc('profiles_captured_total')
+
+
+profiles = ProfileStore()
@@ -0,0 +1,208 @@
+import asyncio
+from datetime import datetime, timedelta
+from os import getenv
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backend.invalidation import invalidation_bus
+from app.backend.metrics import metrics
+from app.models import Product, StockReservation
+
+load_dotenv()
+
+RESERVATION_TTL = timedelta(
+    minutes=int(getenv('RESERVATION_TTL_MINUTES', 15))
+)
+RELEASE_BATCH_SIZE = int(getenv('RESERVATION_RELEASE_BATCH_SIZE', 500))
+RELEASE_INTERVAL_SECONDS = float(getenv('RESERVATION_RELEASE_INTERVAL', 30))
+DEADLOCK_RETRIES = 3
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids: list[int]):
+        super().__init__(f'Not enough stock for products {product_ids}')
+        self.product_ids = product_ids
+
+
+def _per_product(quantity):
+    return case(quantity, value=Product.id)
+
+
+async def _take_stock(db: AsyncSession, quantities: dict[int, int]):
+    # One statement for the whole cart. Each row is re-checked under its row
+    # lock, so concurrent carts can never push stock below zero.
+    needed = _per_product(quantities)
+    result = await db.execute(
+        update(Product)
+        .where(
+            Product.id.in_(quantities)
+            & Product.is_active
+            & (Product.stock >= needed)
+        )
+        .values(stock=Product.stock - needed)
+        .returning(Product.id, Product.stock)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
+
+
+async def reserve_stock(
+    db: AsyncSession,
+    user_id: int,
+    items: list[tuple[int, int]]
+) -> tuple[str, datetime]:
+    quantities: dict[int, int] = {}
+    for product_id, quantity in items:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    for attempt in range(DEADLOCK_RETRIES):
+        try:
+            taken = await _take_stock(db, quantities)
+            break
+        except DBAPIError as ex:
+            await db.rollback()
+            if 'deadlock' not in str(ex) or attempt == DEADLOCK_RETRIES - 1:
+                raise
+            metrics.inc('reservation_deadlock_retries_total')
+
+    if len(taken) != len(quantities):
+        await db.rollback()
+        metrics.inc('reservations_total', outcome='out_of_stock')
+        raise OutOfStock(sorted(set(quantities) - {row[0] for row in taken}))
+
+    cart_id = uuid4().hex
+    expires_at = datetime.now() + RESERVATION_TTL
+    await db.execute(
+        insert(StockReservation),
+        [
+            {
+                'cart_id': cart_id,
+                'user_id': user_id,
+                'product_id': product_id,
+                'quantity': quantity,
+                'expires_at': expires_at,
+                'status': 'reserved'
+            }
+            for product_id, quantity in quantities.items()
+        ]
+    )
+    await db.commit()
+    metrics.inc('reservations_total', outcome='reserved')
+
+    # Sold out products drop out of every ACTIVE_STOCK listing.
+    for product_id, stock in taken:
+        if stock == 0:
+            await invalidation_bus.publish('product', product_id)
+    return cart_id, expires_at
+
+
+async def commit_reservation(db: AsyncSession, cart_id: str, user_id: int):
+    committed = await db.scalars(
+        update(StockReservation)
+        .where(
+            (StockReservation.cart_id == cart_id)
+            & (StockReservation.user_id == user_id)
+            & (StockReservation.status == 'reserved')
+            & (StockReservation.expires_at > datetime.now())
+        )
+        .values(status='committed')
+        .returning(StockReservation.id)
+        .execution_options(synchronize_session=False)
+    )
+    count = len(committed.all())
+    await db.commit()
+    return count
+
+
+async def _give_back(db: AsyncSession, released) -> list[int]:
+    totals: dict[int, int] = {}
+    for product_id, quantity in released:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    if not totals:
+        return []
+    returned = _per_product(totals)
+    restocked = await db.execute(
+        update(Product)
+        .where(Product.id.in_(totals))
+        .values(stock=Product.stock + returned)
+        .returning(Product.id, Product.stock)
+        .execution_options(synchronize_session=False)
+    )
+    # Products that were sold out come back into listings.
+    return [
+        product_id for product_id, stock in restocked
+        if stock == totals[product_id]
+    ]
+
+
+async def release_reservation(
+    db: AsyncSession,
+    cart_id: str,
+    user_id: int
+) -> int:
+    released = (await db.execute(
+        update(StockReservation)
+        .where(
+            (StockReservation.cart_id == cart_id)
+            & (StockReservation.user_id == user_id)
+            & (StockReservation.status == 'reserved')
+        )
+        .values(status='released')
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    )).all()
+    back_in_stock = await _give_back(db, released)
+    await db.commit()
+    for product_id in back_in_stock:
+        await invalidation_bus.publish('product', product_id)
+    return len(released)
+
+
+async def release_expired(
+    db: AsyncSession,
+    batch_size: int = RELEASE_BATCH_SIZE
+) -> int:
+    """Release one batch of expired reservations; returns how many."""
+    expired = (
+        select(StockReservation.id)
+        .where(
+            (StockReservation.status == 'reserved')
+            & (StockReservation.expires_at <= datetime.now())
+        )
+        .order_by(StockReservation.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    released = (await db.execute(
+        update(StockReservation)
+        .where(
+            StockReservation.id.in_(expired)
+            & (StockReservation.status == 'reserved')
+        )
+        .values(status='released')
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    )).all()
+    back_in_stock = await _give_back(db, released)
+    await db.commit()
+    for product_id in back_in_stock:
+        await invalidation_bus.publish('product', product_id)
+    metrics.inc('reservations_expired_total', len(released))
+    return len(released)
+
+
+async def run_release_loop(session_maker: async_sessionmaker) -> None:
+    while True:
+        try:
+            async with session_maker() as db:
+                while await release_expired(db) == RELEASE_BATCH_SIZE:
+                    pass
+        except Exception as ex:
+            logger.error(f'Releasing expired reservations failed: {ex}')
+        await asyncio.sleep(RELEASE_INTERVAL_SECONDS)
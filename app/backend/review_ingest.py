@@ -0,0 +1,143 @@
+from datetime import date
+from os import getenv
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.invalidation import invalidation_bus
+from app.backend.metrics import metrics
+from app.models import Product, Rating, Review, User
+from app.schemas import ReviewFeedItem
+
+load_dotenv()
+
+REVIEW_CHUNK_SIZE = int(getenv('REVIEW_CHUNK_SIZE', 500))
+MAX_FEED_SIZE = 10_000
+
+_feed_item = TypeAdapter(ReviewFeedItem)
+
+
+def _validate_chunk(chunk, offset: int, errors: list) -> list:
+    valid = []
+    for index, raw in enumerate(chunk, offset):
+        try:
+            valid.append((index, _feed_item.validate_python(raw)))
+        except ValidationError as ex:
+            errors.append({
+                'index': index,
+                'errors': [
+                    {'loc': list(error['loc']), 'msg': error['msg']}
+                    for error in ex.errors()
+                ]
+            })
+    return valid
+
+
+async def _lookup(db: AsyncSession, column, keys: set, *columns) -> dict:
+    if not keys:
+        return {}
+    rows = await db.execute(select(column, *columns).where(column.in_(keys)))
+    return {row[0]: row[1:] if columns else True for row in rows}
+
+
+async def _insert_chunk(db: AsyncSession, items: list) -> None:
+    today = date.today()
+    # executemany with RETURNING, ordered like the parameters, links every
+    # review to the rating inserted for it without a flush per row.
+    rating_ids = await db.scalars(
+        insert(Rating).returning(Rating.id, sort_by_parameter_order=True),
+        [
+            {
+                'grade': item.rating.grade,
+                'user_id': item.user_id,
+                'product_id': product_id,
+                'rated_on': item.comment_date or today,
+                'is_active': True
+            }
+            for product_id, item in items
+        ]
+    )
+    await db.execute(
+        insert(Review),
+        [
+            {
+                'user_id': item.user_id,
+                'product_id': product_id,
+                'rating_id': rating_id,
+                'comment': item.review.comment,
+                'comment_date': item.comment_date or today,
+                'is_active': True
+            }
+            for (product_id, item), rating_id in zip(items, rating_ids.all())
+        ]
+    )
+
+
+async def recompute_ratings(db: AsyncSession, product_ids: set[int]) -> None:
+    """Refresh Product.rating for many products in one statement."""
+    average = (
+        select(func.coalesce(func.round(func.avg(Rating.grade), 1), 0))
+        .where(
+            (Rating.product_id == Product.id) & (Rating.is_active == True)
+        )
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids))
+        .values(rating=average)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def ingest_reviews(db: AsyncSession, feed: list) -> dict:
+    """Insert a marketplace review feed in one transaction.
+
+    The feed is processed in chunks of REVIEW_CHUNK_SIZE: each chunk is
+    validated, its products and users resolved with one IN query each, and
+    written with two executemany inserts. Invalid items are reported by
+    index and skipped. Product ratings are recomputed once at the end.
+    """
+    errors: list[dict] = []
+    created = 0
+    touched: set[int] = set()
+
+    for offset in range(0, len(feed), REVIEW_CHUNK_SIZE):
+        valid = _validate_chunk(
+            feed[offset:offset + REVIEW_CHUNK_SIZE], offset, errors
+        )
+        products = await _lookup(
+            db, Product.slug, {item.product_slug for _, item in valid},
+            Product.id
+        )
+        users = await _lookup(db, User.id, {item.user_id for _, item in valid})
+
+        rows = []
+        for index, item in valid:
+            if item.product_slug not in products:
+                errors.append({'index': index, 'errors': [
+                    {'loc': ['product_slug'], 'msg': 'Product not found'}
+                ]})
+            elif item.user_id not in users:
+                errors.append({'index': index, 'errors': [
+                    {'loc': ['user_id'], 'msg': 'User not found'}
+                ]})
+            else:
+                rows.append((products[item.product_slug][0], item))
+        if rows:
+            await _insert_chunk(db, rows)
+            created += len(rows)
+            touched.update(product_id for product_id, _ in rows)
+
+    if touched:
+        await recompute_ratings(db, touched)
+    await db.commit()
+    for product_id in sorted(touched):
+        await invalidation_bus.publish('product', product_id)
+
+    metrics.inc('reviews_ingested_total', created)
+    metrics.inc('reviews_rejected_total', len(errors))
+    errors.sort(key=lambda error: error['index'])
+    return {'created': created, 'products': len(touched), 'errors': errors}
@@ -0,0 +1,232 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from os import getenv
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backend.invalidation import invalidation_bus
+from app.backend.metrics import metrics
+from app.models import (
+    Product,
+    Rating,
+    Review,
+    SupplierReviewWeek,
+    SupplierStats,
+)
+
+load_dotenv()
+
+# Weeks of review volume kept per supplier, the current one included.
+ROLLUP_WEEKS = int(getenv('ROLLUP_WEEKS', 12))
+ROLLUP_FLUSH_SECONDS = float(getenv('ROLLUP_FLUSH_SECONDS', 5))
+ROLLUP_RECONCILE_SECONDS = float(getenv('ROLLUP_RECONCILE_SECONDS', 3600))
+# pg_try_advisory_xact_lock key, so one worker at a time reconciles.
+ROLLUP_RECONCILE_LOCK = 0x726f6c6c
+
+
+async def _upsert(db: AsyncSession, model, rows: list[dict]) -> None:
+    """Insert ``rows``, overwriting the ones whose primary key exists, so
+    workers refreshing the same supplier do not trip the primary key."""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert(model)
+    keys = [column.name for column in model.__table__.primary_key]
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            name: statement.excluded[name]
+            for name in rows[0] if name not in keys
+        }
+    )
+    await db.execute(statement, rows)
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+async def rebuild_supplier_stats(
+    db: AsyncSession, supplier_ids: set[int] | None
+) -> int:
+    """Recompute the rollup rows of ``supplier_ids`` (all when None).
+
+    Every aggregate is a GROUP BY supplier_id restricted to those suppliers.
+    The new rows are upserted and rows that no longer have a source are
+    deleted, in the same transaction.
+    """
+    now = datetime.now()
+    since = week_start(date.today()) - timedelta(weeks=ROLLUP_WEEKS - 1)
+
+    products = (
+        select(
+            Product.supplier_id,
+            func.count(Product.id),
+            func.coalesce(func.sum(Product.stock), 0),
+            func.coalesce(func.sum(Product.price * Product.stock), 0)
+        )
+        .where(Product.is_active & Product.supplier_id.is_not(None))
+        .group_by(Product.supplier_id)
+    )
+    ratings = (
+        select(
+            Product.supplier_id,
+            func.coalesce(func.sum(Rating.grade), 0),
+            func.count(Rating.id)
+        )
+        .join(Product, Product.id == Rating.product_id)
+        .where(Product.is_active & (Rating.is_active == True))
+        .group_by(Product.supplier_id)
+    )
+    reviews = (
+        select(Product.supplier_id, Review.comment_date, func.count())
+        .join(Product, Product.id == Review.product_id)
+        .where(
+            Product.is_active
+            & (Review.is_active == True)
+            & (Review.comment_date >= since)
+        )
+        .group_by(Product.supplier_id, Review.comment_date)
+    )
+    if supplier_ids is not None:
+        products = products.where(Product.supplier_id.in_(supplier_ids))
+        ratings = ratings.where(Product.supplier_id.in_(supplier_ids))
+        reviews = reviews.where(Product.supplier_id.in_(supplier_ids))
+
+    stats = {
+        supplier_id: {
+            'supplier_id': supplier_id,
+            'active_skus': skus,
+            'stock_units': units,
+            'stock_value': round(value, 2),
+            'rating_sum': 0,
+            'rating_count': 0,
+            'updated_at': now
+        }
+        for supplier_id, skus, units, value in await db.execute(products)
+    }
+    for supplier_id, grades, count in await db.execute(ratings):
+        if supplier_id in stats:
+            stats[supplier_id]['rating_sum'] = grades
+            stats[supplier_id]['rating_count'] = count
+    weeks: dict[tuple[int, date], int] = {}
+    for supplier_id, day, count in await db.execute(reviews):
+        key = (supplier_id, week_start(day))
+        weeks[key] = weeks.get(key, 0) + count
+
+    stale_stats = delete(SupplierStats).where(
+        SupplierStats.supplier_id.not_in(list(stats))
+    )
+    stale_weeks = delete(SupplierReviewWeek).where(
+        tuple_(SupplierReviewWeek.supplier_id, SupplierReviewWeek.week)
+        .not_in(list(weeks))
+    )
+    if supplier_ids is not None:
+        stale_stats = stale_stats.where(
+            SupplierStats.supplier_id.in_(supplier_ids)
+        )
+        stale_weeks = stale_weeks.where(
+            SupplierReviewWeek.supplier_id.in_(supplier_ids)
+        )
+    await db.execute(stale_stats)
+    await db.execute(stale_weeks)
+    await _upsert(db, SupplierStats, list(stats.values()))
+    await _upsert(db, SupplierReviewWeek, [
+        {'supplier_id': supplier_id, 'week': week, 'reviews': count}
+        for (supplier_id, week), count in weeks.items()
+    ])
+    await db.commit()
+    return len(stats)
+
+
+class SupplierRollups:
+    """Keeps supplier_stats in step with product and review writes.
+
+    Every write already publishes a product event; events from this worker
+    queue the product, and a flush recomputes only the suppliers owning
+    queued products. Events from other workers are theirs to roll up, and
+    the periodic reconcile repairs anything a crash lost in between.
+    """
+
+    def __init__(self):
+        self._pending: set[int] = set()
+
+    def on_event(self, event: dict) -> None:
+        if (
+            event['entity'] == 'product'
+            and event.get('origin') == invalidation_bus.origin
+        ):
+            self._pending.add(event['id'])
+
+    async def flush(self, db: AsyncSession) -> int:
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, set()
+        try:
+            suppliers = set(await db.scalars(
+                select(Product.supplier_id)
+                .where(
+                    Product.id.in_(pending) & Product.supplier_id.is_not(None)
+                )
+                .distinct()
+            ))
+            if suppliers:
+                await rebuild_supplier_stats(db, suppliers)
+        except Exception:
+            self._pending |= pending
+            raise
+        metrics.inc('supplier_rollups_refreshed_total', len(suppliers))
+        return len(suppliers)
+
+    async def reconcile(
+        self, db: AsyncSession, force: bool = False
+    ) -> int | None:
+        """Rebuild every rollup row; None when another worker holds the
+        reconcile or, unless ``force``, already did it this interval."""
+        if db.get_bind().dialect.name == 'postgresql' and not await db.scalar(
+            select(func.pg_try_advisory_xact_lock(ROLLUP_RECONCILE_LOCK))
+        ):
+            await db.rollback()
+            metrics.inc('supplier_rollups_reconcile_skipped_total')
+            return None
+        if not force:
+            # A full rebuild stamps every row, so the oldest stamp tells
+            # when the last one ran, in whichever worker.
+            oldest = await db.scalar(select(func.min(SupplierStats.updated_at)))
+            cutoff = datetime.now() - timedelta(
+                seconds=ROLLUP_RECONCILE_SECONDS / 2
+            )
+            if oldest is not None and oldest > cutoff:
+                await db.rollback()
+                metrics.inc('supplier_rollups_reconcile_skipped_total')
+                return None
+        # Anything queued before now is covered by the full rebuild.
+        self._pending.clear()
+        rebuilt = await rebuild_supplier_stats(db, None)
+        metrics.set_gauge('supplier_rollups_rows', rebuilt)
+        return rebuilt
+
+
+async def run_rollups(session_maker: async_sessionmaker) -> None:
+    loop = asyncio.get_running_loop()
+    next_reconcile = loop.time()
+    while True:
+        try:
+            async with session_maker() as db:
+                if loop.time() >= next_reconcile:
+                    next_reconcile = loop.time() + ROLLUP_RECONCILE_SECONDS
+                    await supplier_rollups.reconcile(db)
+                else:
+                    await supplier_rollups.flush(db)
+        except Exception as ex:
+            logger.error(f'Supplier rollups failed: {ex}')
+        await asyncio.sleep(ROLLUP_FLUSH_SECONDS)
+
+
+supplier_rollups = SupplierRollups()
+invalidation_bus.subscribe(supplier_rollups.on_event)
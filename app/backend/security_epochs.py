@@ -0,0 +1,107 @@
+import asyncio
+from array import array
+from datetime import datetime, timedelta
+from os import getenv
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backend import warmup
+from app.backend.metrics import metrics
+from app.models.user import User
+
+load_dotenv()
+
+EPOCH_REFRESH_SECONDS = float(getenv('EPOCH_REFRESH_SECONDS', 2))
+# Rows committed late with an earlier now() must not fall behind the
+# watermark, so every incremental pass re-reads a short overlap window.
+EPOCH_REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class SecurityEpochs:
+    """Per-user security epoch, indexed by user id.
+
+    Access tokens carry the epoch their user had when they were minted.
+    Bumping the epoch in the DB (deactivation, role change) makes every
+    older token stale as soon as the refresher picks it up.
+    """
+
+    def __init__(self):
+        self._epochs = array('I')
+        self._synced_at: datetime | None = None
+
+    def get(self, user_id: int) -> int:
+        if 0 <= user_id < len(self._epochs):
+            return self._epochs[user_id]
+        return 0
+
+    def set(self, user_id: int, epoch: int) -> None:
+        if user_id >= len(self._epochs):
+            self._epochs.extend([0] * (user_id + 1 - len(self._epochs)))
+        # Epochs only grow; a stale refresh must not undo a newer bump.
+        if epoch > self._epochs[user_id]:
+            self._epochs[user_id] = epoch
+
+    def is_current(self, user_id: int, epoch: int) -> bool:
+        return epoch >= self.get(user_id)
+
+    def clear(self) -> None:
+        self._epochs = array('I')
+        self._synced_at = None
+
+    def memory_bytes(self) -> int:
+        return self._epochs.itemsize * len(self._epochs)
+
+    async def refresh(self, db: AsyncSession) -> int:
+        query = (
+            select(User.id, User.security_epoch, User.epoch_updated_at)
+            .where(User.security_epoch > 0)
+        )
+        if self._synced_at is not None:
+            query = query.where(
+                User.epoch_updated_at
+                >= self._synced_at - EPOCH_REFRESH_OVERLAP
+            )
+        rows = (await db.execute(query)).all()
+        for user_id, epoch, updated_at in rows:
+            self.set(user_id, epoch)
+            if updated_at is not None and (
+                self._synced_at is None or updated_at > self._synced_at
+            ):
+                self._synced_at = updated_at
+        if self._synced_at is None:
+            self._synced_at = datetime.min + EPOCH_REFRESH_OVERLAP
+        metrics.set_gauge('security_epochs_bytes', self.memory_bytes())
+        return len(rows)
+
+    async def run(self, session_maker: async_sessionmaker) -> None:
+        while True:
+            try:
+                async with session_maker() as db:
+                    await self.refresh(db)
+            except Exception as ex:
+                logger.error(f'Security epoch refresh failed: {ex}')
+            await asyncio.sleep(EPOCH_REFRESH_SECONDS)
+
+
+async def bump_security_epoch(db: AsyncSession, user_id: int) -> int:
+    """Invalidate the user's outstanding access tokens.
+
+    Call ``security_epochs.set`` with the result after the commit, so a
+    rolled back transaction never leaves the local table ahead of the DB.
+    """
+    return await db.scalar(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            security_epoch=User.security_epoch + 1,
+            epoch_updated_at=func.now()
+        )
+        .returning(User.security_epoch)
+    )
+
+
+security_epochs = SecurityEpochs()
+warmup.prefill('security_epochs', security_epochs.refresh)
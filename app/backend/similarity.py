@@ -0,0 +1,290 @@
+import asyncio
+import os
+import tempfile
+import time
+from os import getenv
+from pathlib import Path
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backend import warmup
+from app.backend.invalidation import invalidation_bus
+from app.backend.metrics import metrics
+from app.models import Product, Rating
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # NumPy/SciPy are optional, /similar is empty without
+    np = sparse = None
+
+load_dotenv()
+
+SIMILAR_TOP_K = int(getenv('SIMILAR_TOP_K', 20))
+# Dense float32 cells per block of the item x item product, so a build
+# never holds more than 4 * SIMILARITY_BLOCK_CELLS bytes of scores.
+SIMILARITY_BLOCK_CELLS = int(getenv('SIMILARITY_BLOCK_CELLS', 4_000_000))
+SIMILARITY_PATH = Path(getenv('SIMILARITY_PATH', 'data/similar_products.npz'))
+SIMILARITY_INTERVAL_SECONDS = float(getenv('SIMILARITY_INTERVAL', 900))
+
+_ARRAYS = ('product_ids', 'indptr', 'neighbours', 'scores')
+
+
+def similarity_available() -> bool:
+    return np is not None
+
+
+def rating_matrix(rows):
+    """Products and their L2-normalised rows of an item x user matrix.
+
+    ``rows`` are ``(user_id, product_id, grade)``; after normalising, the
+    dot product of two rows is their cosine similarity.
+    """
+    if not rows:
+        empty = sparse.csr_matrix((0, 0), dtype=np.float32)
+        return np.empty(0, np.int64), empty
+    users, products, grades = (np.asarray(column) for column in zip(*rows))
+    user_ids, user_index = np.unique(users, return_inverse=True)
+    product_ids, product_index = np.unique(products, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (grades.astype(np.float32), (product_index, user_index)),
+        shape=(len(product_ids), len(user_ids))
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    return product_ids, sparse.diags(1 / norms).astype(np.float32) @ matrix
+
+
+def top_neighbours(matrix, rows, k: int, block_cells: int):
+    """Yield ``(row, neighbour_rows, scores)`` for each of ``rows``.
+
+    Rows are scored in blocks sized so the dense block stays within
+    ``block_cells``; only the best ``k`` positive scores of a row are kept.
+    """
+    count = matrix.shape[0]
+    if count < 2:
+        for row in rows:
+            yield row, np.empty(0, np.int64), np.empty(0, np.float32)
+        return
+    k = min(k, count - 1)
+    transposed = matrix.T.tocsc()
+    step = max(1, block_cells // count)
+    for start in range(0, len(rows), step):
+        block = np.asarray(rows[start:start + step])
+        scores = (matrix[block] @ transposed).toarray()
+        scores[np.arange(len(block)), block] = 0
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, candidates, row_scores in zip(block, best, scores):
+            picked = row_scores[candidates]
+            # Highest score first, ties by position, i.e. by product id.
+            order = np.lexsort((candidates, -picked))
+            keep = order[picked[order] > 0]
+            yield row, candidates[keep], picked[keep]
+
+
+class ItemSimilarity:
+    """Similar products ("customers also liked") by item-item cosine.
+
+    Neighbours are stored CSR style: per product an offset into one array
+    of neighbour ids and one of float32 scores, so a lookup is a dict hit
+    and a slice. A background job rebuilds the lists; rating changes only
+    mark products dirty through the invalidation bus, and the next run
+    recomputes just the products whose scores can have moved.
+    """
+
+    def __init__(self):
+        self._row: dict[int, int] = {}
+        self._indptr = self._neighbours = self._scores = None
+        self._dirty: set[int] = set()
+        self._loaded = False
+        # Lists read from disk may predate changes made while we were down.
+        self._stale = True
+        self._lock = asyncio.Lock()
+
+    def on_event(self, event: dict) -> None:
+        if event['entity'] == 'product':
+            self._dirty.add(event['id'])
+        elif event['entity'] == '*':
+            self._stale = True
+
+    def similar(self, product_id: int) -> list[tuple[int, float]]:
+        row = self._row.get(product_id)
+        if row is None:
+            return []
+        start, end = self._indptr[row], self._indptr[row + 1]
+        return list(zip(
+            self._neighbours[start:end].tolist(),
+            self._scores[start:end].tolist()
+        ))
+
+    async def load(self, db: AsyncSession) -> None:
+        if self._loaded or not similarity_available():
+            return
+        if SIMILARITY_PATH.exists():
+            try:
+                self._apply(await asyncio.to_thread(_read, SIMILARITY_PATH))
+                self._loaded = True
+                return
+            except Exception as ex:
+                # A torn or foreign file must not keep warmup failing.
+                logger.warning(
+                    f'Unreadable {SIMILARITY_PATH}, rebuilding it: {ex}'
+                )
+        await self.refresh(db, full=True)
+
+    async def refresh(self, db: AsyncSession, full: bool = False) -> int:
+        """Recompute neighbour lists, returns how many were recomputed."""
+        if not similarity_available():
+            return 0
+        async with self._lock:
+            full = full or self._stale or not self._loaded
+            if not full and not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, set()
+            started = time.perf_counter()
+            try:
+                rows = (await db.execute(
+                    select(
+                        Rating.user_id,
+                        Rating.product_id,
+                        func.avg(Rating.grade)
+                    )
+                    .join(Product, Product.id == Rating.product_id)
+                    .where((Rating.is_active == True) & Product.is_active)
+                    .group_by(Rating.user_id, Rating.product_id)
+                )).all()
+                lists, recomputed = await asyncio.to_thread(
+                    self._compute, rows, None if full else dirty
+                )
+            except Exception:
+                self._dirty |= dirty
+                raise
+            arrays = _pack(lists)
+            self._apply(arrays)
+            self._loaded = True
+            self._stale = False
+            await asyncio.to_thread(_write, SIMILARITY_PATH, arrays)
+
+        metrics.observe(
+            'similarity_build_seconds',
+            time.perf_counter() - started,
+            mode='full' if full else 'incremental'
+        )
+        return recomputed
+
+    def _compute(self, rows, dirty: set[int] | None):
+        product_ids, matrix = rating_matrix(rows)
+        index = {product_id: i for i, product_id in enumerate(
+            product_ids.tolist()
+        )}
+        if dirty is None:
+            lists = {}
+            targets = range(len(product_ids))
+        else:
+            lists = {
+                product_id: self.similar(product_id)
+                for product_id in index
+            }
+            targets = sorted(
+                index[product_id]
+                for product_id in self._affected(dirty, matrix, product_ids)
+                if product_id in index
+            )
+        for row, neighbours, scores in top_neighbours(
+            matrix, targets, SIMILAR_TOP_K, SIMILARITY_BLOCK_CELLS
+        ):
+            lists[int(product_ids[row])] = list(zip(
+                product_ids[neighbours].tolist(), scores.tolist()
+            ))
+        return lists, len(targets)
+
+    def _affected(self, dirty: set[int], matrix, product_ids) -> set[int]:
+        """Products whose list can change when ``dirty`` products changed:
+        the dirty ones, those that listed one of them, and those sharing a
+        rater with one of them now."""
+        affected = set(dirty)
+        if self._neighbours is not None and len(self._neighbours):
+            positions = np.flatnonzero(
+                np.isin(self._neighbours, list(dirty))
+            )
+            rows = np.searchsorted(self._indptr, positions, 'right') - 1
+            owners = {row: product_id for product_id, row in self._row.items()}
+            affected.update(owners[row] for row in rows.tolist())
+        dirty_rows = np.flatnonzero(np.isin(product_ids, list(dirty)))
+        if len(dirty_rows):
+            shared = matrix[dirty_rows] @ matrix.T
+            affected.update(product_ids[shared.indices].tolist())
+        return affected
+
+    def _apply(self, arrays) -> None:
+        product_ids, indptr, neighbours, scores = arrays
+        # Swapped in one go, so readers never see half-applied state.
+        self._row = {
+            product_id: i for i, product_id in enumerate(product_ids.tolist())
+        }
+        self._indptr, self._neighbours, self._scores = (
+            indptr, neighbours, scores
+        )
+        metrics.set_gauge('similar_products_items', len(self._row))
+        metrics.set_gauge(
+            'similar_products_bytes',
+            sum(array.nbytes for array in arrays)
+        )
+
+
+def _pack(lists: dict[int, list[tuple[int, float]]]):
+    product_ids = np.array(
+        sorted(product_id for product_id, items in lists.items() if items),
+        dtype=np.int32
+    )
+    rows = [lists[product_id] for product_id in product_ids.tolist()]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+    np.cumsum([len(items) for items in rows], out=indptr[1:])
+    neighbours = np.array(
+        [neighbour for items in rows for neighbour, _ in items],
+        dtype=np.int32
+    )
+    scores = np.array(
+        [score for items in rows for _, score in items], dtype=np.float32
+    )
+    return product_ids, indptr, neighbours, scores
+
+
+def _read(path: Path):
+    with np.load(path) as stored:
+        return tuple(stored[name] for name in _ARRAYS)
+
+
+def _write(path: Path, arrays) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Every worker runs the job; each writes its own file and swaps it in.
+    fd, tmp = tempfile.mkstemp(
+        dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            np.savez(file, **dict(zip(_ARRAYS, arrays)))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+async def run_similarity_job(session_maker: async_sessionmaker) -> None:
+    while True:
+        await asyncio.sleep(SIMILARITY_INTERVAL_SECONDS)
+        try:
+            async with session_maker() as db:
+                recomputed = await item_similarity.refresh(db)
+            if recomputed:
+                logger.info(f'Recomputed {recomputed} similar product lists')
+        except Exception as ex:
+            logger.error(f'Refreshing similar products failed: {ex}')
+
+
+item_similarity = ItemSimilarity()
+invalidation_bus.subscribe(item_similarity.on_event)
+warmup.prefill('item_similarity', item_similarity.load)
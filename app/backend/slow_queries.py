@@ -0,0 +1,200 @@
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from os import getenv
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.backend.db import engine
+from app.backend.db_depends import current_route
+from app.backend.metrics import metrics
+
+load_dotenv()
+
+SLOW_QUERY_SECONDS = float(getenv('SLOW_QUERY_MS', 200)) / 1000
+# Re-run the first slow occurrence of each SELECT under EXPLAIN; on
+# PostgreSQL that is EXPLAIN (ANALYZE, BUFFERS), so it costs a second run.
+# Locking SELECTs are never explained, ANALYZE would take the locks again.
+SLOW_QUERY_EXPLAIN = getenv('SLOW_QUERY_EXPLAIN', 'false').lower() in (
+    '1', 'true', 'yes'
+)
+# Distinct statements kept; the least expensive is dropped beyond that.
+SLOW_QUERY_KEEP = int(getenv('SLOW_QUERY_KEEP', 500))
+SLOW_QUERY_ROUTES = 5
+
+EXPLAIN_PREFIX = {
+    'postgresql': 'EXPLAIN (ANALYZE, BUFFERS) ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w$])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(
+    r'\bIN\s*\(\s*(?:\?|\$\d+|%\(\w+\)s|:\w+)'
+    r'(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s|:\w+))*\s*\)',
+    re.IGNORECASE
+)
+_SPACE = re.compile(r'\s+')
+_LOCKING = re.compile(
+    r'\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b',
+    re.IGNORECASE
+)
+
+
+def normalize(statement: str) -> str:
+    """Statement text with literals replaced and IN lists collapsed, so
+    calls that only differ in values share one entry."""
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _IN_LIST.sub('IN (...)', statement)
+    return _SPACE.sub(' ', statement).strip()
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    """Aggregated statements that ran longer than SLOW_QUERY_SECONDS."""
+
+    def __init__(self, keep: int = SLOW_QUERY_KEEP):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+
+    def record(
+        self, statement: str, params_fingerprint: str, route: str,
+        seconds: float
+    ) -> dict:
+        key = fingerprint(statement)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.keep:
+                    cheapest = min(
+                        self._entries, key=lambda k: self._entries[k]['total']
+                    )
+                    del self._entries[cheapest]
+                entry = self._entries[key] = {
+                    'fingerprint': key,
+                    'statement': statement,
+                    'count': 0,
+                    'total': 0.0,
+                    'max': 0.0,
+                    'routes': Counter(),
+                    'last_params': None,
+                    'last_seen': None,
+                    'explain': None,
+                }
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+            entry['routes'][route] += 1
+            entry['last_params'] = params_fingerprint
+            entry['last_seen'] = datetime.now()
+            return entry
+
+    def top(self, limit: int, order: str = 'total') -> list[dict]:
+        with self._lock:
+            entries = sorted(
+                self._entries.values(), key=lambda e: e[order], reverse=True
+            )[:limit]
+            return [
+                {
+                    **entry,
+                    'total': round(entry['total'], 6),
+                    'max': round(entry['max'], 6),
+                    'mean': round(entry['total'] / entry['count'], 6),
+                    'routes': dict(
+                        entry['routes'].most_common(SLOW_QUERY_ROUTES)
+                    ),
+                }
+                for entry in entries
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    dialect = conn.dialect.name
+    prefix = EXPLAIN_PREFIX.get(dialect, 'EXPLAIN ')
+    # A fresh cursor, the original one still holds the statement's rows.
+    cursor = conn.connection.cursor()
+    # The request's transaction is still open. On PostgreSQL a failed
+    # statement would abort it, so EXPLAIN runs in a savepoint that is
+    # always rolled back.
+    savepoint = dialect == 'postgresql'
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+        except Exception as ex:
+            logger.warning(f'EXPLAIN of a slow query failed: {ex}')
+            return None
+        finally:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    started = getattr(context, '_slow_query_started', None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    if seconds < SLOW_QUERY_SECONDS:
+        return
+
+    route = current_route.get()
+    normalized = normalize(statement)
+    params_fingerprint = fingerprint(repr(parameters))
+    entry = slow_query_log.record(
+        normalized, params_fingerprint, route, seconds
+    )
+    metrics.inc('db_slow_queries_total', route=route)
+    logger.warning(
+        f'Slow query {seconds * 1000:.1f} ms on {route} '
+        f'[{entry["fingerprint"]} params {params_fingerprint}]: {normalized}'
+    )
+    if (
+        SLOW_QUERY_EXPLAIN
+        and entry['count'] == 1
+        and not executemany
+        and normalized[:6].upper() == 'SELECT'
+        and not _LOCKING.search(normalized)
+    ):
+        entry['explain'] = _explain(conn, statement, parameters)
+
+
+def record_slow_queries(target: AsyncEngine) -> None:
+    sync_engine = target.sync_engine
+    if event.contains(
+        sync_engine, 'before_cursor_execute', _before_cursor_execute
+    ):
+        return
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+slow_query_log = SlowQueryLog()
+record_slow_queries(engine)
@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from os import getenv
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend import warmup
+from app.backend.invalidation import invalidation_bus
+from app.backend.metrics import metrics
+from app.models import Product
+
+load_dotenv()
+
+SUGGEST_MEMORY_BUDGET = int(getenv('SUGGEST_MEMORY_BUDGET_MB', 64)) * 2 ** 20
+# Prefixes this short match a large share of the catalog, so their top
+# results are memoised until the next change.
+SHORT_PREFIX = 2
+MAX_SUGGESTIONS = 20
+
+_WORD = re.compile(r'[0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(_WORD.findall(stripped))
+
+
+def index_terms(name: str, slug: str) -> set[str]:
+    """The name from every word on ("red wall clock", "wall clock", ...)
+    plus the slug, so a prefix of any word finds the product."""
+    words = normalize(name).split()
+    terms = {' '.join(words[i:]) for i in range(len(words))}
+    terms.add(normalize(slug))
+    terms.discard('')
+    return terms
+
+
+class SuggestIndex:
+    """Prefix index of active product names and slugs.
+
+    Terms live in one sorted list with a parallel array of product ids, so
+    a prefix is a bisect range and the index costs little more than the
+    strings themselves. Like the leaderboard, writes only mark products
+    dirty through the invalidation bus and the next read reloads them.
+    """
+
+    def __init__(self):
+        self._terms: list[str] = []
+        self._ids = array('I')
+        self._products: dict[int, tuple[str, str, float]] = {}
+        self._short: dict[str, list[int]] = {}
+        self._dirty: set[int] = set()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def on_event(self, event: dict) -> None:
+        if event['entity'] == 'product':
+            self._dirty.add(event['id'])
+        elif event['entity'] == '*':
+            self._loaded = False
+
+    async def refresh(self, db: AsyncSession) -> None:
+        if self._loaded and not self._dirty:
+            return
+        async with self._lock:
+            if not self._loaded:
+                self._dirty.clear()
+                rows = await self._fetch(db, None)
+                self._rebuild(rows)
+                self._loaded = True
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                try:
+                    rows = await self._fetch(db, dirty)
+                except Exception:
+                    self._dirty |= dirty
+                    raise
+                for product_id in dirty:
+                    self._remove(product_id)
+                for row in rows:
+                    self._add(*row)
+            self._short.clear()
+        self._report()
+
+    def suggest(self, query: str, limit: int) -> list[dict]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX:
+            ranked = self._short.get(prefix)
+            if ranked is None:
+                ranked = self._rank(prefix, MAX_SUGGESTIONS)
+                self._short[prefix] = ranked
+        else:
+            ranked = self._rank(prefix, limit)
+        return [self._describe(product_id) for product_id in ranked[:limit]]
+
+    def memory_bytes(self) -> int:
+        return (
+            sys.getsizeof(self._terms)
+            + sum(sys.getsizeof(term) for term in self._terms)
+            + self._ids.buffer_info()[1] * self._ids.itemsize
+            + sys.getsizeof(self._products)
+            + sum(
+                sys.getsizeof(name) + sys.getsizeof(slug)
+                for name, slug, _ in self._products.values()
+            )
+        )
+
+    def _rank(self, prefix: str, limit: int) -> list[int]:
+        start = bisect_left(self._terms, prefix)
+        # Every term starting with the prefix sorts below prefix + U+FFFF.
+        end = bisect_left(self._terms, prefix + '\uffff', start)
+        candidates = set(self._ids[start:end])
+        return heapq.nsmallest(
+            limit,
+            candidates,
+            key=lambda product_id: (
+                -self._products[product_id][2],
+                self._products[product_id][0],
+                product_id
+            )
+        )
+
+    def _describe(self, product_id: int) -> dict:
+        name, slug, rating = self._products[product_id]
+        return {'id': product_id, 'name': name, 'slug': slug, 'rating': rating}
+
+    async def _fetch(self, db: AsyncSession, product_ids: set[int] | None):
+        query = select(
+            Product.id, Product.name, Product.slug, Product.rating
+        ).where(Product.is_active & (Product.stock > 0))
+        if product_ids is not None:
+            query = query.where(Product.id.in_(product_ids))
+        return (await db.execute(query)).all()
+
+    def _rebuild(self, rows) -> None:
+        entries = []
+        self._products = {}
+        for product_id, name, slug, rating in rows:
+            self._products[product_id] = (name, slug, rating or 0.0)
+            entries.extend(
+                (term, product_id) for term in index_terms(name, slug)
+            )
+        entries.sort()
+        self._terms = [term for term, _ in entries]
+        self._ids = array('I', (product_id for _, product_id in entries))
+
+    def _add(self, product_id, name, slug, rating) -> None:
+        self._products[product_id] = (name, slug, rating or 0.0)
+        for term in index_terms(name, slug):
+            index = bisect_right(self._terms, term)
+            self._terms.insert(index, term)
+            self._ids.insert(index, product_id)
+
+    def _remove(self, product_id: int) -> None:
+        product = self._products.pop(product_id, None)
+        if product is None:
+            return
+        for term in index_terms(product[0], product[1]):
+            start = bisect_left(self._terms, term)
+            end = bisect_right(self._terms, term, start)
+            for index in range(start, end):
+                if self._ids[index] == product_id:
+                    del self._terms[index]
+                    del self._ids[index]
+                    break
+
+    def _report(self) -> None:
+        size = self.memory_bytes()
+        metrics.set_gauge('suggest_index_terms', len(self._terms))
+        metrics.set_gauge('suggest_index_bytes', size)
+        if size > SUGGEST_MEMORY_BUDGET:
+            logger.warning(
+                f'Suggest index uses {size} bytes, '
+                f'over its budget of {SUGGEST_MEMORY_BUDGET}'
+            )
+
+
+suggest_index = SuggestIndex()
+invalidation_bus.subscribe(suggest_index.on_event)
+warmup.prefill('suggest_index', suggest_index.refresh)
@@ -0,0 +1,288 @@
+import functools
+import json
+import queue
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from os import getenv
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+load_dotenv()
+
+# Share of requests traced, decided once per trace at its root span.
+TRACE_SAMPLE_RATE = float(getenv('TRACE_SAMPLE_RATE', 0.01))
+# JSON lines file, one OTLP export request per trace; in memory when unset.
+TRACE_EXPORT_PATH = getenv('TRACE_EXPORT_PATH')
+TRACE_COLLECTOR_SIZE = int(getenv('TRACE_COLLECTOR_SIZE', 100))
+TRACE_SERVICE_NAME = getenv('TRACE_SERVICE_NAME', 'e-store')
+MAX_STATEMENT_LENGTH = 1000
+
+# OTLP span kinds.
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+current_span: ContextVar['Span | None'] = ContextVar(
+    'current_span', default=None
+)
+
+
+class _NoopSpan:
+    """Stands in for spans of unsampled requests."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = (
+        'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'attributes',
+        'start_ns', 'end_ns', 'error', 'trace', 'is_root', '_token'
+    )
+
+    def __init__(
+        self, name, trace_id, parent_id, trace, kind=INTERNAL, attributes=None
+    ):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        # Every finished span of the trace, exported when the root ends.
+        self.trace = trace
+        self.is_root = False
+        self._token = None
+
+    def child(self, name, kind=INTERNAL, **attributes) -> 'Span':
+        return Span(
+            name, self.trace_id, self.span_id, self.trace, kind, attributes
+        )
+
+    def end(self, error: BaseException | None = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = repr(error)
+        self.trace.append(self)
+        if self.is_root:
+            tracer.export(self.trace)
+
+    def __enter__(self) -> 'Span':
+        self._token = current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        current_span.reset(self._token)
+        self.end(exc)
+        return False
+
+
+def span(name: str, **attributes):
+    """Child of the current span, or a no-op outside a sampled trace."""
+    parent = current_span.get()
+    if parent is None:
+        return NOOP
+    return parent.child(name, **attributes)
+
+
+def traced(name: str):
+    """Wrap a coroutine function in a span; signature is preserved, so it
+    also works on FastAPI dependencies."""
+
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _parse_traceparent(header: str | None):
+    # version-traceid-parentid-flags, see W3C Trace Context.
+    parts = (header or '').split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def _value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _attributes(attributes: dict) -> list[dict]:
+    return [
+        {'key': key, 'value': _value(value)}
+        for key, value in attributes.items() if value is not None
+    ]
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    """One OTLP/JSON ExportTraceServiceRequest holding ``spans``."""
+    return {'resourceSpans': [{
+        'resource': {'attributes': _attributes(
+            {'service.name': TRACE_SERVICE_NAME}
+        )},
+        'scopeSpans': [{
+            'scope': {'name': __name__},
+            'spans': [
+                {
+                    'traceId': item.trace_id,
+                    'spanId': item.span_id,
+                    'parentSpanId': item.parent_id or '',
+                    'name': item.name,
+                    'kind': item.kind,
+                    'startTimeUnixNano': str(item.start_ns),
+                    'endTimeUnixNano': str(item.end_ns),
+                    'attributes': _attributes(item.attributes),
+                    'status': (
+                        {'code': STATUS_ERROR, 'message': item.error}
+                        if item.error else {'code': STATUS_OK}
+                    )
+                }
+                for item in spans
+            ]
+        }]
+    }]}
+
+
+class InMemoryCollector:
+    """The last ``size`` exported traces, newest last."""
+
+    def __init__(self, size: int = TRACE_COLLECTOR_SIZE):
+        self.traces: deque[dict] = deque(maxlen=size)
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(to_otlp(spans))
+
+
+class FileExporter:
+    """Appends traces to a JSON lines file from a background thread, so
+    request handling never waits on disk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        threading.Thread(
+            target=self._write, name='trace-exporter', daemon=True
+        ).start()
+
+    def export(self, spans: list[Span]) -> None:
+        self._queue.put(to_otlp(spans))
+
+    def _write(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get())
+            with open(self.path, 'a') as file:
+                file.writelines(json.dumps(item) + '\n' for item in batch)
+
+
+class Tracer:
+    def __init__(self, exporter, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_trace(
+        self, name: str, traceparent: str | None = None, **attributes
+    ):
+        """Root span of a request, or a no-op when it is not sampled.
+
+        An incoming ``traceparent`` keeps the caller's trace and sampling
+        decision; otherwise TRACE_SAMPLE_RATE decides.
+        """
+        parent = _parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return NOOP
+        root = Span(name, trace_id, parent_id, [], SERVER, attributes)
+        root.is_root = True
+        return root
+
+    def export(self, trace: list[Span]) -> None:
+        spans = list(trace)
+        trace.clear()
+        self.exporter.export(spans)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    parent = current_span.get()
+    if parent is None:
+        return
+    context._trace_span = parent.child(
+        'sql ' + statement.split(None, 1)[0].upper(),
+        CLIENT,
+        **{
+            'db.system': conn.dialect.name,
+            'db.statement': statement[:MAX_STATEMENT_LENGTH],
+            'db.executemany': executemany
+        }
+    )
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    sql_span = getattr(context, '_trace_span', None)
+    if sql_span is not None:
+        context._trace_span = None
+        sql_span.end()
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    sql_span = getattr(context, '_trace_span', None)
+    if sql_span is not None:
+        context._trace_span = None
+        sql_span.end(exception_context.original_exception)
+
+
+def instrument_engine(target: AsyncEngine) -> None:
+    """Record a span per statement run inside a sampled trace."""
+    sync_engine = target.sync_engine
+    if event.contains(
+        sync_engine, 'before_cursor_execute', _before_cursor_execute
+    ):
+        return
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(sync_engine, 'handle_error', _handle_error)
+
+
+tracer = Tracer(
+    FileExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH
+    else InMemoryCollector()
+)
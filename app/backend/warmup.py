@@ -0,0 +1,79 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.sql import Executable
+
+from app.backend.metrics import metrics
+
+WARMUP_RETRY_SECONDS = 5
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.checks: dict[str, str] = {}
+
+    def reset(self) -> None:
+        self.ready = False
+        self.checks = {}
+
+
+readiness = Readiness()
+
+_hot_queries: list[tuple[str, Callable[[], Executable]]] = []
+_prefills: list[tuple[str, Callable[[AsyncSession], Awaitable]]] = []
+
+
+def hot_query(name: str, build: Callable[[], Executable]) -> None:
+    """Register a statement to prepare on every pooled connection.
+
+    ``build`` must return the same SQL text the handler sends (parameter
+    values do not matter), otherwise the prepared statement is not reused.
+    """
+    _hot_queries.append((name, build))
+
+
+def prefill(name: str, fill: Callable[[AsyncSession], Awaitable]) -> None:
+    _prefills.append((name, fill))
+
+
+async def _prime_connection(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        for _, build in _hot_queries:
+            await conn.execute(build())
+        await conn.rollback()
+
+
+async def warmup(engine: AsyncEngine, pool_size: int) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    # All connections are checked out at the same time, so each one is a
+    # distinct pool member that gets its own statement cache primed.
+    await asyncio.gather(
+        *(_prime_connection(engine) for _ in range(pool_size))
+    )
+    readiness.checks['pool'] = f'{pool_size} connections primed'
+    readiness.checks['statements'] = f'{len(_hot_queries)} prepared'
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        for name, fill in _prefills:
+            await fill(db)
+            readiness.checks[name] = 'filled'
+
+    readiness.ready = True
+    metrics.set_gauge('warmup_seconds', loop.time() - started)
+    logger.info(f'Warmup finished: {readiness.checks}')
+
+
+async def run_warmup(engine: AsyncEngine, pool_size: int) -> None:
+    while not readiness.ready:
+        try:
+            await warmup(engine, pool_size)
+        except Exception as ex:
+            readiness.checks['error'] = str(ex)
+            logger.error(f'Warmup failed: {ex}')
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+    readiness.checks.pop('error', None)
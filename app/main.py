@@ -1,18 +1,90 @@
+import asyncio
+from contextlib import asynccontextmanager
 from uuid import uuid4
 from loguru import logger
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from app.routers import auth, category, permission, products, reviews
+from app.backend.archive import run_archiver
+from app.backend.compression import CompressionMiddleware
+from app.backend.db import DB_POOL_SIZE, async_session_maker, engine
+from app.backend.idempotency import IdempotencyMiddleware
+from app.backend.images import shutdown_pool
+from app.backend.invalidation import invalidation_bus
+from app.backend.loop_watchdog import loop_watchdog
+from app.backend.metrics import metrics
+from app.backend.partitions import run_partition_maintenance
+from app.backend.profiling import ProfilingMiddleware
+from app.backend.reservations import run_release_loop
+from app.backend.rollups import run_rollups
+from app.backend.similarity import run_similarity_job
+from app.backend.security_epochs import security_epochs
+from app.backend.tracing import tracer
+from app.backend.warmup import readiness, run_warmup
+from app.routers import (
+    admin,
+    auth,
+    batch,
+    category,
+    checkout,
+    health,
+    images,
+    permission,
+    products,
+    rankings,
+    reviews,
+    supplier,
+)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warmup runs in the background so /health/live answers right away while
+    # /health/ready keeps the worker out of rotation until it is done.
+    tasks = [
+        asyncio.create_task(run_warmup(engine, DB_POOL_SIZE)),
+        asyncio.create_task(security_epochs.run(async_session_maker)),
+        asyncio.create_task(invalidation_bus.run()),
+        asyncio.create_task(run_release_loop(async_session_maker)),
+        asyncio.create_task(run_archiver(async_session_maker)),
+        asyncio.create_task(run_partition_maintenance(async_session_maker)),
+        asyncio.create_task(run_similarity_job(async_session_maker)),
+        asyncio.create_task(run_rollups(async_session_maker)),
+        asyncio.create_task(loop_watchdog.run()),
+    ]
+    yield
+    readiness.ready = False
+    for task in tasks:
+        task.cancel()
+    # Let their cleanup, e.g. the watchdog joining its thread, finish
+    # while the loop is still running.
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shutdown_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+# Innermost, so it samples the task that runs the handler: the http
+# middleware below runs the rest of the app in a task of its own.
+app.add_middleware(ProfilingMiddleware, authorize=admin.is_admin_request)
+# Inside compression, so replays are encoded for the retrying client.
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 logger.add("info.log", format="Log: {level} - {message} - {extra[log_id]}:{time}", level="INFO", enqueue=True)
 
 @app.middleware("http")
 async def log_middleware(request: Request, call_next):
     log_id = str(uuid4())
-    with logger.contextualize(log_id=log_id):
+    root = tracer.start_trace(
+        f'{request.method} {request.url.path}',
+        request.headers.get('traceparent'),
+        **{
+            'http.method': request.method,
+            'http.target': request.url.path,
+            'log_id': log_id
+        }
+    )
+    with logger.contextualize(log_id=log_id), root as trace:
         try:
             response = await call_next(request)
             if response.status_code in (401, 402, 403, 404):
@@ -22,6 +94,9 @@ async def log_middleware(request: Request, call_next):
         except Exception as ex:
             logger.error(f"Request to {request.url.path} failed: {ex}")
             response = JSONResponse(content={"success": False}, status_code=500)
+        if trace is not None:
+            trace.attributes['http.status_code'] = response.status_code
+            response.headers['X-Trace-Id'] = trace.trace_id
         return response
 
 
@@ -30,8 +105,20 @@ async def welcome() -> dict:
     return {"message": "My e-commerce app"}
 
 
+@app.get('/metrics')
+async def read_metrics() -> dict:
+    return metrics.snapshot()
+
+
 app.include_router(category.router)
 app.include_router(products.router)
 app.include_router(reviews.router)
 app.include_router(auth.router)
 app.include_router(permission.router)
+app.include_router(health.router)
+app.include_router(rankings.router)
+app.include_router(checkout.router)
+app.include_router(images.router)
+app.include_router(admin.router)
+app.include_router(supplier.router)
+app.include_router(batch.router)
@@ -0,0 +1,53 @@
+"""Partition reviews by month and date ratings
+
+Revision ID: 0b7d2e61c9a4
+Revises: e3a9c4f7b215
+Create Date: 2026-10-19 16:11:48.532907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.backend.partitions import partition_reviews, unpartition_reviews
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d2e61c9a4'
+down_revision: Union[str, Sequence[str], None] = 'e3a9c4f7b215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ratings', sa.Column('rated_on', sa.Date(), nullable=True))
+    op.execute(
+        'UPDATE ratings SET rated_on = reviews.comment_date '
+        'FROM reviews WHERE reviews.rating_id = ratings.id'
+    )
+    op.execute('UPDATE ratings SET rated_on = CURRENT_DATE WHERE rated_on IS NULL')
+    op.alter_column('ratings', 'rated_on', nullable=False)
+    op.create_index('ix_ratings_product_id_rated_on', 'ratings', ['product_id', 'rated_on'], unique=False)
+    op.add_column('archived_ratings', sa.Column('rated_on', sa.Date(), nullable=True))
+    op.execute('UPDATE archived_ratings SET rated_on = CAST(archived_at AS DATE)')
+    op.alter_column('archived_ratings', 'rated_on', nullable=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Also creates ix_reviews_product_id_comment_date on the new table.
+        partition_reviews(bind)
+    else:
+        op.create_index('ix_reviews_product_id_comment_date', 'reviews', ['product_id', 'comment_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        unpartition_reviews(bind)
+    op.drop_index('ix_reviews_product_id_comment_date', table_name='reviews')
+    op.drop_column('archived_ratings', 'rated_on')
+    op.drop_index('ix_ratings_product_id_rated_on', table_name='ratings')
+    op.drop_column('ratings', 'rated_on')
@@ -0,0 +1,45 @@
+"""Create stock_reservations table
+
+Revision ID: 5d9e3f1a7b62
+Revises: c51a7e0b9f38
+Create Date: 2026-10-19 13:41:52.907614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d9e3f1a7b62'
+down_revision: Union[str, Sequence[str], None] = 'c51a7e0b9f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_reservations',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('cart_id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_reservations_id'), 'stock_reservations', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_reservations_cart_id'), 'stock_reservations', ['cart_id'], unique=False)
+    op.create_index('ix_stock_reservations_status_expires', 'stock_reservations', ['status', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_reservations_status_expires', table_name='stock_reservations')
+    op.drop_index(op.f('ix_stock_reservations_cart_id'), table_name='stock_reservations')
+    op.drop_index(op.f('ix_stock_reservations_id'), table_name='stock_reservations')
+    op.drop_table('stock_reservations')
@@ -0,0 +1,32 @@
+"""Add security_epoch to users
+
+Revision ID: 8e2d5b7c4a10
+Revises: 3f6c1a9d2e47
+Create Date: 2026-10-19 11:03:17.502116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d5b7c4a10'
+down_revision: Union[str, Sequence[str], None] = '3f6c1a9d2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('security_epoch', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('epoch_updated_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_users_epoch_updated_at'), 'users', ['epoch_updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_epoch_updated_at'), table_name='users')
+    op.drop_column('users', 'epoch_updated_at')
+    op.drop_column('users', 'security_epoch')
@@ -0,0 +1,48 @@
+"""Create supplier rollup tables
+
+Revision ID: 9a4e6c2f8d15
+Revises: 0b7d2e61c9a4
+Create Date: 2026-10-19 18:02:37.114520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e6c2f8d15'
+down_revision: Union[str, Sequence[str], None] = '0b7d2e61c9a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('supplier_stats',
+    sa.Column('supplier_id', sa.Integer(), nullable=False),
+    sa.Column('active_skus', sa.Integer(), nullable=False),
+    sa.Column('stock_units', sa.Integer(), nullable=False),
+    sa.Column('stock_value', sa.Float(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['supplier_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('supplier_id')
+    )
+    op.create_table('supplier_review_weeks',
+    sa.Column('supplier_id', sa.Integer(), nullable=False),
+    sa.Column('week', sa.Date(), nullable=False),
+    sa.Column('reviews', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['supplier_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('supplier_id', 'week')
+    )
+    op.create_index('ix_products_supplier_id', 'products', ['supplier_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_supplier_id', table_name='products')
+    op.drop_table('supplier_review_weeks')
+    op.drop_table('supplier_stats')
@@ -0,0 +1,36 @@
+"""Add product listing indexes
+
+Revision ID: c51a7e0b9f38
+Revises: 8e2d5b7c4a10
+Create Date: 2026-10-19 12:20:05.331872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51a7e0b9f38'
+down_revision: Union[str, Sequence[str], None] = '8e2d5b7c4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_STOCK = sa.text('is_active AND stock > 0')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_active_price_id', 'products', ['price', 'id'], unique=False, postgresql_where=ACTIVE_STOCK)
+    op.create_index('ix_products_active_rating_id', 'products', ['rating', 'id'], unique=False, postgresql_where=ACTIVE_STOCK)
+    op.create_index('ix_products_active_category_id', 'products', ['category_id', 'id'], unique=False, postgresql_where=ACTIVE_STOCK)
+    op.create_index('ix_products_active_category_price_id', 'products', ['category_id', 'price', 'id'], unique=False, postgresql_where=ACTIVE_STOCK)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_active_category_price_id', table_name='products')
+    op.drop_index('ix_products_active_category_id', table_name='products')
+    op.drop_index('ix_products_active_rating_id', table_name='products')
+    op.drop_index('ix_products_active_price_id', table_name='products')
@@ -0,0 +1,95 @@
+"""Add deactivated_at and archive tables
+
+Revision ID: e3a9c4f7b215
+Revises: 5d9e3f1a7b62
+Create Date: 2026-10-19 15:02:37.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c4f7b215'
+down_revision: Union[str, Sequence[str], None] = '5d9e3f1a7b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('reviews', 'ratings', 'products', 'categories')
+
+
+def archived_at():
+    return sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('deactivated_at', sa.DateTime(), nullable=True))
+        op.create_index(op.f(f'ix_{table}_deactivated_at'), table, ['deactivated_at'], unique=False)
+        # Rows deactivated before this column existed start aging now.
+        op.execute(
+            f'UPDATE {table} SET deactivated_at = now() WHERE is_active = false'
+        )
+
+    op.create_table('archived_reviews',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('rating_id', sa.Integer(), nullable=False),
+    sa.Column('comment', sa.String(), nullable=False),
+    sa.Column('comment_date', sa.Date(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('deactivated_at', sa.DateTime(), nullable=True),
+    archived_at(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('archived_ratings',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('grade', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('deactivated_at', sa.DateTime(), nullable=True),
+    archived_at(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('archived_products',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('image_url', sa.String(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('supplier_id', sa.Integer(), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Float(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('deactivated_at', sa.DateTime(), nullable=True),
+    archived_at(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('archived_categories',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('slug', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('deactivated_at', sa.DateTime(), nullable=True),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    archived_at(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for table in TABLES:
+        op.create_index(op.f(f'ix_archived_{table}_archived_at'), f'archived_{table}', ['archived_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(op.f(f'ix_archived_{table}_archived_at'), table_name=f'archived_{table}')
+        op.drop_table(f'archived_{table}')
+        op.drop_index(op.f(f'ix_{table}_deactivated_at'), table_name=table)
+        op.drop_column(table, 'deactivated_at')
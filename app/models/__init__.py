@@ -3,3 +3,7 @@ from .products import Product
 from .user import User
 from .rating import Rating
 from .review import Review
+from .refresh_token import RefreshToken
+from .reservation import StockReservation
+from .archive import ARCHIVE_TABLES
+from .supplier_stats import SupplierReviewWeek, SupplierStats
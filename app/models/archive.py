@@ -0,0 +1,44 @@
+from sqlalchemy import Column, DateTime, Table, func
+
+from app.backend.db import Base
+from app.models.category import Category
+from app.models.products import Product
+from app.models.rating import Rating
+from app.models.review import Review
+
+
+def archive_table(source: Table) -> Table:
+    """Same columns as ``source``, minus its constraints and indexes.
+
+    Archived rows are only read by admins on demand, so the copy carries
+    just the primary key and an index on archived_at.
+    """
+    return Table(
+        f'archived_{source.name}',
+        Base.metadata,
+        *(
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.primary_key,
+                autoincrement=False,
+                nullable=column.nullable
+            )
+            for column in source.columns
+        ),
+        Column(
+            'archived_at',
+            DateTime,
+            nullable=False,
+            server_default=func.now(),
+            index=True
+        ),
+    )
+
+
+# Source table name -> archive table, in the order rows may be moved:
+# children before the parents they reference.
+ARCHIVE_TABLES = {
+    model.__tablename__: archive_table(model.__table__)
+    for model in (Review, Rating, Product, Category)
+}
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
 from sqlalchemy.orm import relationship, Mapped
 
 from typing import List
@@ -13,6 +13,7 @@ class Category(Base):
     name = Column(String)
     slug = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True)
+    deactivated_at = Column(DateTime, nullable=True, index=True)
     parent_id = Column(Integer, ForeignKey('categories.id'), nullable=True)
     products: Mapped[list['Review']] = relationship('Product', back_populates='category')
 
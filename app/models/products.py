@@ -1,4 +1,15 @@
-from sqlalchemy import Boolean, Float, ForeignKey, Integer, String
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.backend.db import Base
@@ -7,8 +18,34 @@ from app.models import Category
 from typing import List
 
 
+# Partial indexes matching the keyset-paginated listing (ACTIVE_STOCK rows,
+# ordered by the sort column and then id).
+ACTIVE_STOCK_SQL = text('is_active AND stock > 0')
+
+
 class Product(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        Index(
+            'ix_products_active_price_id', 'price', 'id',
+            postgresql_where=ACTIVE_STOCK_SQL
+        ),
+        Index(
+            'ix_products_active_rating_id', 'rating', 'id',
+            postgresql_where=ACTIVE_STOCK_SQL
+        ),
+        Index(
+            'ix_products_active_category_id', 'category_id', 'id',
+            postgresql_where=ACTIVE_STOCK_SQL
+        ),
+        Index(
+            'ix_products_active_category_price_id',
+            'category_id', 'price', 'id',
+            postgresql_where=ACTIVE_STOCK_SQL
+        ),
+        # Supplier rollups recompute one supplier's products at a time.
+        Index('ix_products_supplier_id', 'supplier_id'),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True,
@@ -32,6 +69,10 @@ class Product(Base):
         back_populates='product'
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Set together with is_active=False; drives archival.
+    deactivated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
     category: Mapped['Category'] = relationship(
         'Category', back_populates='products'
     )
\ No newline at end of file
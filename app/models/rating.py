@@ -1,6 +1,15 @@
-from datetime import date
+from datetime import date, datetime
 
-from sqlalchemy import Boolean, Float, Integer, ForeignKey, String, Date
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.backend.db import Base
@@ -8,6 +17,9 @@ from app.backend.db import Base
 
 class Rating(Base):
     __tablename__ = 'ratings'
+    __table_args__ = (
+        Index('ix_ratings_product_id_rated_on', 'product_id', 'rated_on'),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True,
@@ -25,4 +37,13 @@ class Rating(Base):
         'Product',
         back_populates='ratings'
     )
+    # Same day as the review it belongs to, for date-range queries.
+    rated_on: Mapped[date] = mapped_column(
+        Date,
+        default=date.today,
+        nullable=False
+    )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    deactivated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.backend.db import Base
+
+
+class StockReservation(Base):
+    __tablename__ = 'stock_reservations'
+    __table_args__ = (
+        Index('ix_stock_reservations_status_expires', 'status', 'expires_at'),
+    )
+
+    id: Mapped[int] = mapped_column(
+        primary_key=True,
+        index=True,
+        autoincrement=True
+    )
+    cart_id: Mapped[str] = mapped_column(String(32), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey('products.id'),
+        nullable=False
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # reserved -> committed (checkout done) or released (stock given back)
+    status: Mapped[str] = mapped_column(String(16), default='reserved')
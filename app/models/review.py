@@ -1,6 +1,15 @@
-from datetime import date
+from datetime import date, datetime
 
-from sqlalchemy import Boolean, Float, Integer, ForeignKey, String, Date
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.backend.db import Base
@@ -8,6 +17,13 @@ from app.backend.db import Base
 
 class Review(Base):
     __tablename__ = 'reviews'
+    # On PostgreSQL the table is range partitioned by comment_date, see
+    # app.backend.partitions.
+    __table_args__ = (
+        Index(
+            'ix_reviews_product_id_comment_date', 'product_id', 'comment_date'
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True,
@@ -31,3 +47,6 @@ class Review(Base):
     rating: Mapped['Rating'] = relationship('Rating', back_populates='review')
     product: Mapped['Product'] = relationship('Product', backref='reviews')
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    deactivated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
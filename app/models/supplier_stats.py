@@ -0,0 +1,36 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.backend.db import Base
+
+
+class SupplierStats(Base):
+    """Rollup of one supplier's active products and their ratings."""
+
+    __tablename__ = 'supplier_stats'
+
+    supplier_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id'),
+        primary_key=True
+    )
+    active_skus: Mapped[int] = mapped_column(Integer, default=0)
+    stock_units: Mapped[int] = mapped_column(Integer, default=0)
+    stock_value: Mapped[float] = mapped_column(Float, default=0)
+    # Sum and count rather than the average, so it can be combined.
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0)
+    rating_count: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class SupplierReviewWeek(Base):
+    __tablename__ = 'supplier_review_weeks'
+
+    supplier_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id'),
+        primary_key=True
+    )
+    # Monday of the week.
+    week: Mapped[date] = mapped_column(Date, primary_key=True)
+    reviews: Mapped[int] = mapped_column(Integer, default=0)
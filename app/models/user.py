@@ -1,4 +1,6 @@
-from sqlalchemy import Boolean, Integer, String
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.backend.db import Base
@@ -17,3 +19,13 @@ class User(Base):
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
     is_supplier: Mapped[bool] = mapped_column(Boolean, default=False)
     is_customer: Mapped[bool] = mapped_column(Boolean, default=True)
+    security_epoch: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default='0'
+    )
+    epoch_updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime,
+        nullable=True,
+        index=True
+    )
@@ -0,0 +1,210 @@
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.archive import archive_inactive
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.loop_watchdog import loop_watchdog
+from app.backend.profiling import profiles
+from app.backend.rollups import supplier_rollups
+from app.backend.similarity import item_similarity
+from app.backend.slow_queries import slow_query_log
+from app.backend.tracing import tracer
+from app.models import ARCHIVE_TABLES
+from app.routers.auth import get_user_data_from_jwt
+
+router = APIRouter(
+    prefix='/admin', tags=['admin'], route_class=ReleasingRoute
+)
+
+ArchivedTable = Literal['reviews', 'ratings', 'products', 'categories']
+
+ARCHIVE_PAGE_SIZE = 100
+ARCHIVE_FILTERS = ('user_id', 'product_id', 'category_id', 'parent_id')
+
+
+def admin_only(get_user: dict) -> None:
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You must be admin user for this'
+        )
+
+
+async def is_admin_request(authorization: str) -> bool:
+    """Whether an Authorization header carries a valid admin token."""
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    try:
+        get_user = await get_user_data_from_jwt(token)
+    except HTTPException:
+        return False
+    return bool(get_user.get('is_admin'))
+
+
+@router.get('/archive/{table}')
+async def archived_rows(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    table: ArchivedTable,
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)],
+    id: int | None = None,
+    user_id: int | None = None,
+    product_id: int | None = None,
+    category_id: int | None = None,
+    parent_id: int | None = None,
+    after: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=ARCHIVE_PAGE_SIZE)] = 50
+):
+    """Browse archived rows of one table, oldest id first."""
+    admin_only(get_user)
+    archive = ARCHIVE_TABLES[table]
+    values = {
+        'user_id': user_id,
+        'product_id': product_id,
+        'category_id': category_id,
+        'parent_id': parent_id,
+    }
+
+    query = select(archive)
+    if id is not None:
+        query = query.where(archive.c.id == id)
+    for name in ARCHIVE_FILTERS:
+        if values[name] is None:
+            continue
+        if name not in archive.c:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'Archived {table} have no {name}'
+            )
+        query = query.where(archive.c[name] == values[name])
+    if after is not None:
+        query = query.where(archive.c.id > after)
+
+    rows = (await db.execute(
+        query.order_by(archive.c.id).limit(limit + 1)
+    )).mappings().all()
+    return {
+        'items': jsonable_encoder([dict(row) for row in rows[:limit]]),
+        'next_after': rows[limit - 1]['id'] if len(rows) > limit else None
+    }
+
+
+@router.post('/archive/run')
+async def run_archive(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    admin_only(get_user)
+    return {
+        'status_code': status.HTTP_200_OK,
+        'archived': await archive_inactive(db)
+    }
+
+
+@router.post('/similarity/run')
+async def run_similarity(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)],
+    full: bool = False
+):
+    """Recompute similar product lists now instead of at the next run."""
+    admin_only(get_user)
+    return {
+        'status_code': status.HTTP_200_OK,
+        'recomputed': await item_similarity.refresh(db, full)
+    }
+
+
+@router.post('/rollups/reconcile')
+async def reconcile_rollups(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    """Rebuild every supplier rollup row from the source tables;
+    ``suppliers`` is null when another worker is reconciling right now."""
+    admin_only(get_user)
+    return {
+        'status_code': status.HTTP_200_OK,
+        'suppliers': await supplier_rollups.reconcile(db, force=True)
+    }
+
+
+@router.get('/profiles')
+async def list_profiles(
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    """Recent request profiles (send ``X-Profile: 1`` to record one)."""
+    admin_only(get_user)
+    return {'items': profiles.list()}
+
+
+@router.get('/profiles/{profile_id}')
+async def get_profile(
+    profile_id: str,
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)],
+    format: Literal['json', 'folded'] = 'json'
+):
+    """One profile; ``format=folded`` returns collapsed stacks, one per
+    line, ready for flamegraph.pl or speedscope."""
+    admin_only(get_user)
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Profile not found'
+        )
+    if format == 'folded':
+        return PlainTextResponse(profile['folded'])
+    return profile
+
+
+@router.get('/traces')
+async def recent_traces(
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20
+):
+    """Latest sampled traces as OTLP/JSON export requests, newest last."""
+    admin_only(get_user)
+    traces = getattr(tracer.exporter, 'traces', None)
+    if traces is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Traces are exported to a file'
+        )
+    return {'items': list(traces)[-limit:]}
+
+
+@router.get('/slow_queries')
+async def slow_queries(
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)],
+    order: Literal['total', 'max', 'count'] = 'total',
+    limit: Annotated[int, Query(ge=1, le=100)] = 20
+):
+    """Statements slower than SLOW_QUERY_MS, aggregated by normalized
+    text, most expensive first."""
+    admin_only(get_user)
+    return {'items': jsonable_encoder(slow_query_log.top(limit, order))}
+
+
+@router.delete('/slow_queries')
+async def reset_slow_queries(
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    admin_only(get_user)
+    slow_query_log.reset()
+    return {'status_code': status.HTTP_200_OK}
+
+
+@router.get('/loop_blocks')
+async def loop_blocks(
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    """Recent stretches of synchronous code that stalled the event loop,
+    with the stack and route that caused them, newest last."""
+    admin_only(get_user)
+    return {'items': jsonable_encoder(list(loop_watchdog.blocks))}
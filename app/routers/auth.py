@@ -1,6 +1,11 @@
+import hashlib
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from os import getenv
 from typing import Annotated
+from uuid import uuid4
 
 from loguru import logger
 
@@ -12,29 +17,58 @@ from passlib.context import CryptContext
 from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.metrics import metrics
+from app.backend.security_epochs import bump_security_epoch, security_epochs
+from app.backend.tracing import traced
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
-from app.schemas import CreateUser
+from app.schemas import CreateUser, TokenRefresh
 
 load_dotenv()
 
 SECRET_KEY = getenv('SECRET_KEY')
 ALGORITHM = getenv('ALGORITHM')
+ACCESS_TOKEN_EXPIRE_MINUTES = int(getenv('ACCESS_TOKEN_EXPIRE_MINUTES', 20))
+REFRESH_TOKEN_EXPIRE_DAYS = int(getenv('REFRESH_TOKEN_EXPIRE_DAYS', 30))
 
-router = APIRouter(prefix='/auth', tags=['auth'])
+router = APIRouter(
+    prefix='/auth', tags=['auth'], route_class=ReleasingRoute
+)
 bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Tokens already decoded by the sub-requests of one /batch call.
+decoded_tokens: ContextVar[dict | None] = ContextVar(
+    'decoded_tokens', default=None
+)
+
 
 def not_none(arg):
     if arg is None:
         raise Exception(f'{arg} is None!')
     return arg
+
+
+@contextmanager
+def shared_token_decoding():
+    """Decode each token once for the requests run inside the block;
+    tasks they spawn see the same memo through the copied context."""
+    reset = decoded_tokens.set({})
+    try:
+        yield
+    finally:
+        decoded_tokens.reset(reset)
     
     
+@traced('dependency get_user_data_from_jwt')
 async def get_user_data_from_jwt(
         token: Annotated[str, Depends(oauth2_scheme)]
     ) -> dict:
+    shared = decoded_tokens.get()
+    if shared is not None and token in shared:
+        metrics.inc('auth_shared_decodes_total')
+        return shared[token]
     try:
         payload = jwt.decode(
             token,
@@ -65,14 +99,23 @@ async def get_user_data_from_jwt(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail='Token is expired'
             )
+        if not security_epochs.is_current(user_id, payload.get('epoch', 0)):
+            metrics.inc('auth_stale_tokens_total')
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail='Token is revoked'
+            )
         
-        return {
+        user = {
             'username': username,
             'id': user_id,
             'is_admin': is_admin, 
             'is_supplier': is_supplier,
             'is_customer': is_customer
         }
+        if shared is not None:
+            shared[token] = user
+        return user
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -108,7 +151,8 @@ async def create_access_token(
         is_admin: bool,
         is_supplier: bool,
         is_customer: bool,
-        expires_delta: timedelta
+        expires_delta: timedelta,
+        security_epoch: int = 0
 ):
     expire = datetime.now() + expires_delta
 
@@ -118,6 +162,7 @@ async def create_access_token(
         'is_admin': is_admin,
         'is_supplier': is_supplier,
         'is_customer': is_customer,
+        'epoch': security_epoch,
         'ext': expire.timestamp()
     }
     return jwt.encode(
@@ -126,6 +171,40 @@ async def create_access_token(
     )
 
 
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are 256 random bits, so a fast digest is enough here:
+    # there is nothing to brute-force, unlike user passwords.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def issue_refresh_token(
+        db: AsyncSession,
+        user_id: int,
+        family_id: str | None = None
+) -> str:
+    token = secrets.token_urlsafe(32)
+    await db.execute(
+        insert(RefreshToken)
+        .values(
+            user_id=user_id,
+            token_hash=hash_refresh_token(token),
+            family_id=family_id or uuid4().hex,
+            expires_at=datetime.now() + timedelta(
+                days=REFRESH_TOKEN_EXPIRE_DAYS
+            )
+        )
+    )
+    return token
+
+
+async def revoke_refresh_tokens(db: AsyncSession, *criteria) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(*criteria, RefreshToken.is_active == True)
+        .values(is_active=False)
+    )
+
+
 @router.get('/read_current_user')
 async def read_current_user(user: User = Depends(get_user_data_from_jwt)):
     return {"User": user}
@@ -152,15 +231,121 @@ async def login(
         user.is_admin,
         user.is_supplier,
         user.is_customer,
-        expires_delta=timedelta(minutes=20)
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        security_epoch=user.security_epoch
+    )
+    refresh_token = await issue_refresh_token(db, user.id)
+    await db.commit()
+    metrics.inc('auth_logins_total', method='password')
+
+    return {
+        'access_token': token,
+        'refresh_token': refresh_token,
+        'token_type': 'bearer'
+    }
+
+
+@router.post('/refresh')
+async def refresh_access_token(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    refresh: TokenRefresh
+):
+    row = (await db.execute(
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(
+            RefreshToken.token_hash
+            == hash_refresh_token(refresh.refresh_token)
+        )
+    )).one_or_none()
+
+    if row is None:
+        metrics.inc('auth_refresh_rejected_total', reason='unknown')
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Could not validate refresh token'
+        )
+    stored, user = row
+
+    if stored.expires_at < datetime.now() or not user.is_active:
+        await revoke_refresh_tokens(
+            db, RefreshToken.family_id == stored.family_id
+        )
+        await db.commit()
+        metrics.inc('auth_refresh_rejected_total', reason='expired')
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Refresh token is expired'
+        )
+
+    # Rotation: the presented token is consumed exactly once. If it was
+    # already used (or a concurrent request won the race), somebody holds a
+    # copy, so the whole family is revoked.
+    was_active = stored.is_active
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.is_active == True)
+        .values(is_active=False)
+    )
+    if not was_active or rotated.rowcount == 0:
+        await revoke_refresh_tokens(
+            db, RefreshToken.family_id == stored.family_id
+        )
+        await db.commit()
+        logger.warning(f'Refresh token reuse, family {stored.family_id}')
+        metrics.inc('auth_refresh_rejected_total', reason='reused')
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Refresh token was already used'
+        )
+
+    token = await create_access_token(
+        user.username,
+        user.id,
+        user.is_admin,
+        user.is_supplier,
+        user.is_customer,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        security_epoch=user.security_epoch
     )
+    refresh_token = await issue_refresh_token(db, user.id, stored.family_id)
+    await db.commit()
+    metrics.inc('auth_logins_total', method='refresh')
 
     return {
         'access_token': token,
+        'refresh_token': refresh_token,
         'token_type': 'bearer'
     }
 
 
+@router.post('/revoke')
+async def revoke_refresh_token(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    refresh: TokenRefresh
+):
+    stored = await db.scalar(
+        select(RefreshToken)
+        .where(
+            RefreshToken.token_hash
+            == hash_refresh_token(refresh.refresh_token)
+        )
+    )
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Refresh token not found'
+        )
+    await revoke_refresh_tokens(
+        db, RefreshToken.family_id == stored.family_id
+    )
+    await db.commit()
+    return {
+        'status_code': status.HTTP_200_OK,
+        'detail': 'Refresh token is revoked'
+    }
+
+
 @router.post('/')
 async def create_user(
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -211,7 +396,10 @@ async def delete_user(
                 .where(User.id == user_id)
                 .values(is_active=False)
             )
+            await revoke_refresh_tokens(db, RefreshToken.user_id == user_id)
+            epoch = await bump_security_epoch(db, user_id)
             await db.commit()
+            security_epochs.set(user_id, epoch)
             return {
                 'status_code': status.HTTP_200_OK,
                 'detail': 'User is deleted'
@@ -222,7 +410,9 @@ async def delete_user(
             .where(User.id == user_id)
             .values(is_active=True)
         )
+        epoch = await bump_security_epoch(db, user_id)
         await db.commit()
+        security_epochs.set(user_id, epoch)
         return {
             'status_code': status.HTTP_200_OK,
             'detail': 'User is activated'
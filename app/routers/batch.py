@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Request
+
+from app.backend.batch import dispatch
+from app.backend.db_depends import ReleasingRoute
+from app.routers.auth import shared_token_decoding
+from app.schemas import BatchRequest
+
+router = APIRouter(
+    prefix='/batch', tags=['batch'], route_class=ReleasingRoute
+)
+
+
+@router.post('')
+async def batch(request: Request, batch: BatchRequest):
+    """Several GET requests in one round trip.
+
+    Sub-requests run concurrently through the whole app, middleware
+    included, and carry this request's headers unless they override them,
+    so one bearer token covers all of them and is decoded only once. Each
+    sub-request gets its own session: an AsyncSession cannot run queries
+    concurrently. Responses come back in request order.
+    """
+    with shared_token_decoding():
+        responses = await dispatch(
+            request.app, request.scope, batch.requests
+        )
+    return {'responses': responses}
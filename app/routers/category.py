@@ -1,26 +1,51 @@
+from datetime import datetime
 from typing import Annotated, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
 from slugify import slugify
 from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend import warmup
+from app.backend.cache import catalog_cache
+from app.backend.compression import CachedJSONResponse
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.invalidation import invalidation_bus
 from app.models import *
 from app.routers.auth import get_user_data_from_jwt
 from app.schemas import CreateCategory
 
-router = APIRouter(prefix='/category', tags=['category'])
+router = APIRouter(
+    prefix='/category', tags=['category'], route_class=ReleasingRoute
+)
+
+
+def select_active_categories():
+    return select(Category).where(Category.is_active == True)
+
+
+warmup.hot_query('all_categories', select_active_categories)
+
+
+async def load_active_categories(db: AsyncSession):
+    async def fetch():
+        categories = await db.scalars(select_active_categories())
+        return jsonable_encoder(categories.all())
+
+    return await catalog_cache.get_or_set(
+        'categories:all', ('categories',), fetch
+    )
+
+
+warmup.prefill('categories_cache', load_active_categories)
 
 
 @router.get('/all_categories')
 async def get_all_categories(
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    categories = await db.scalars(
-        select(Category)
-        .where(Category.is_active == True))
-    return categories.all()
+    return CachedJSONResponse(await load_active_categories(db))
 
 
 @router.post('/create')
@@ -30,15 +55,17 @@ async def create_category(
     get_user: Annotated[Dict, Depends(get_user_data_from_jwt)]
 ):
     if get_user.get('is_admin'):
-        await db.execute(
+        category_id = await db.scalar(
             insert(Category)
             .values(
                 name=create_category.name,
                 parent_id=create_category.parent_id,
                 slug=slugify(create_category.name)
             )
+            .returning(Category.id)
         )
         await db.commit()
+        await invalidation_bus.publish('category', category_id)
         return {
             'status_code': status.HTTP_201_CREATED,
             'transaction': 'Successful'
@@ -73,6 +100,7 @@ async def update_category(
             parent_id=update_category.parent_id
         ))
         await db.commit()
+        await invalidation_bus.publish('category', category_id)
         return {
             'status_code': status.HTTP_200_OK,
             'transaction': 'Category update is successful'
@@ -103,9 +131,10 @@ async def delete_category(
         await db.execute(
             update(Category)
             .where(Category.id == category_id)
-            .values(is_active=False)
+            .values(is_active=False, deactivated_at=datetime.now())
         )
         await db.commit()
+        await invalidation_bus.publish('category', category_id)
         return {
             "status_code": status.HTTP_200_OK,
             "transaction": "Category delete is successful"
@@ -0,0 +1,87 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.reservations import (
+    OutOfStock,
+    commit_reservation,
+    release_reservation,
+    reserve_stock,
+)
+from app.routers.auth import get_user_data_from_jwt
+from app.schemas import CreateReservation
+
+router = APIRouter(
+    prefix='/checkout', tags=['checkout'], route_class=ReleasingRoute
+)
+
+
+def customer_only(get_user: dict) -> None:
+    if not get_user.get('is_customer'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Only a customer can check out'
+        )
+
+
+@router.post('/reserve')
+async def reserve(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    cart: CreateReservation,
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    customer_only(get_user)
+    try:
+        cart_id, expires_at = await reserve_stock(
+            db,
+            get_user['id'],
+            [(item.product_id, item.quantity) for item in cart.items]
+        )
+    except OutOfStock as ex:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={'out_of_stock': ex.product_ids}
+        )
+    return {
+        'status_code': status.HTTP_201_CREATED,
+        'cart_id': cart_id,
+        'expires_at': expires_at
+    }
+
+
+@router.post('/{cart_id}/commit')
+async def commit(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    cart_id: str,
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    customer_only(get_user)
+    if not await commit_reservation(db, cart_id, get_user['id']):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Reservation is expired or already closed'
+        )
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Reservation is committed'
+    }
+
+
+@router.delete('/{cart_id}')
+async def release(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    cart_id: str,
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    customer_only(get_user)
+    if not await release_reservation(db, cart_id, get_user['id']):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='There is no active reservation'
+        )
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Reservation is released'
+    }
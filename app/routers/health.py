@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, status
+
+from app.backend.warmup import readiness
+
+router = APIRouter(prefix='/health', tags=['health'])
+
+
+@router.get('/live')
+async def liveness():
+    return {'status': 'alive'}
+
+
+@router.get('/ready')
+async def readiness_probe():
+    if not readiness.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={'status': 'warming up', 'checks': readiness.checks}
+        )
+    return {'status': 'ready', 'checks': readiness.checks}
@@ -0,0 +1,63 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Path, Request, Response, status
+from fastapi.responses import FileResponse
+
+from app.backend.images import IMMUTABLE_CACHE_CONTROL, image_dir
+
+router = APIRouter(prefix='/images', tags=['images'])
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+@router.get('/{product_id}/{digest}/{name}')
+async def product_image(
+    request: Request,
+    product_id: int,
+    digest: Annotated[str, Path(pattern=r'^[0-9a-f]{16}$')],
+    name: Annotated[
+        str, Path(pattern=r'^(original|\d+)\.(jpg|png|webp|gif)$')
+    ]
+):
+    """Serve a stored image variant straight from local disk.
+
+    FileResponse handles Range and If-Range, and hands the path to the
+    server for zero-copy sending when it supports the ASGI pathsend
+    extension. The directory is named after the content hash, so the
+    ETag is known without reading the file and responses never go stale.
+    """
+    path = image_dir(product_id, digest) / name
+    try:
+        stat_result = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Image not found'
+        )
+
+    headers = {
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL,
+        'ETag': f'"{digest}-{name}"',
+    }
+    if _not_modified(request, headers['ETag'], stat_result.st_mtime):
+        headers['Last-Modified'] = formatdate(
+            stat_result.st_mtime, usegmt=True
+        )
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    return FileResponse(path, headers=headers, stat_result=stat_result)
@@ -4,12 +4,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.security_epochs import bump_security_epoch, security_epochs
 from app.models.user import User
 
 from .auth import get_user_data_from_jwt
 
-router = APIRouter(prefix='/permission', tags=['permission'])
+router = APIRouter(
+    prefix='/permission', tags=['permission'], route_class=ReleasingRoute
+)
 
 
 @router.patch('/')
@@ -37,7 +40,9 @@ async def switch_permission_supp_cust(
             .where(User.id == user_id)
             .values(is_supplier=False, is_customer=True)
         )
+        epoch = await bump_security_epoch(db, user_id)
         await db.commit()
+        security_epochs.set(user_id, epoch)
         return {
             'status_code': status.HTTP_200_OK,
             'detail': 'User is a customer now, not a supplier'
@@ -47,7 +52,9 @@ async def switch_permission_supp_cust(
         .where(User.id == user_id)
         .values(is_supplier=True, is_customer=False)
     )
+    epoch = await bump_security_epoch(db, user_id)
     await db.commit()
+    security_epochs.set(user_id, epoch)
     return {
         'status_code': status.HTTP_200_OK,
         'detail': 'User is a supplier now, not a customer'
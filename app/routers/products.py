@@ -1,36 +1,237 @@
-from typing import Annotated
-from datetime import date
+import base64
+import json
+from typing import Annotated, Literal
+from datetime import date, datetime
 
 from loguru import logger
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
 from slugify import slugify
-from sqlalchemy import insert, select, update, func
+from sqlalchemy import insert, select, tuple_, update, func
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend import warmup
+from app.backend.cache import catalog_cache
+from app.backend.compression import CachedJSONResponse
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.facets import (
+    category_subtree,
+    facet_counts,
+    load_catalog_facets,
+)
+from app.backend.images import (
+    MAX_IMAGE_BYTES,
+    InvalidImage,
+    images_available,
+    store_product_image,
+)
+from app.backend.invalidation import invalidation_bus
+from app.backend.similarity import SIMILAR_TOP_K, item_similarity
+from app.backend.suggest import MAX_SUGGESTIONS, suggest_index
 from app.models import Category, Product, Review, Rating
-from app.schemas import CreateProduct, CreateReview, CreateRating
+from app.schemas import (
+    CreateProduct,
+    CreateRating,
+    CreateReview,
+    ProductLookup,
+)
 from app.routers.auth import get_user_data_from_jwt
+from app.routers.reviews import review_period
 
-router = APIRouter(prefix='/product', tags=['products'])
+router = APIRouter(
+    prefix='/product', tags=['products'], route_class=ReleasingRoute
+)
 
 ACTIVE_STOCK = (Product.is_active) & (Product.stock > 0)
 
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+ProductSort = Literal['newest', 'price_asc', 'price_desc', 'rating']
+
+# sort -> (column, descending). Every sort is tie-broken by id, which keeps
+# keyset pagination stable; "newest" is the id itself.
+PRODUCT_SORTS = {
+    'newest': (None, True),
+    'price_asc': (Product.price, False),
+    'price_desc': (Product.price, True),
+    'rating': (Product.rating, True),
+}
+
+
+def select_product_page(
+    sort: ProductSort = 'newest',
+    limit: int = PAGE_SIZE,
+    after: list | None = None,
+    filters: tuple = ()
+):
+    column, descending = PRODUCT_SORTS[sort]
+    query = select(Product).where(ACTIVE_STOCK, *filters)
+
+    if column is None:
+        if after is not None:
+            query = query.where(Product.id < after[-1])
+        order_by = [Product.id.desc()]
+    else:
+        if after is not None:
+            key, bound = tuple_(column, Product.id), tuple_(*after)
+            query = query.where(key < bound if descending else key > bound)
+        order_by = (
+            [column.desc(), Product.id.desc()]
+            if descending else [column, Product.id]
+        )
+    # One extra row tells whether there is a next page.
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+def _encode_cursor(sort: str, product: dict) -> str:
+    column, _ = PRODUCT_SORTS[sort]
+    position = [product['id']]
+    if column is not None:
+        position.insert(0, product[column.key])
+    raw = json.dumps([sort, position]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _decode_cursor(sort: str, cursor: str) -> list:
+    column, _ = PRODUCT_SORTS[sort]
+    try:
+        cursor_sort, position = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError):
+        cursor_sort, position = None, None
+    # Only cursors this sort produced: the right size, numbers only, the
+    # id last. Anything else would break the keyset comparison.
+    if (
+        cursor_sort != sort
+        or not isinstance(position, list)
+        or len(position) != (1 if column is None else 2)
+        or not all(_is_number(value) for value in position)
+        or not isinstance(position[-1], int)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+    return position
+
+
+def select_active_category(category_slug: str):
+    return select(Category).where(
+        (Category.slug == category_slug) & (Category.is_active)
+    )
+
+
+def select_category_products(category_id: int):
+    # The category and its active direct children in one statement, so the
+    # SQL text does not depend on the number of subcategories.
+    return (
+        select(Product)
+        .join(Product.category)
+        .where(
+            (
+                (Category.id == category_id)
+                | ((Category.parent_id == category_id) & Category.is_active)
+            )
+            & ACTIVE_STOCK
+        )
+    )
+
+
+def select_product_by_slug(product_slug: str):
+    return select(Product).where((Product.slug == product_slug) & ACTIVE_STOCK)
+
+
+def select_products_in(column, keys: list):
+    # IN binds as one expanding parameter, so every batch size shares the
+    # same prepared statement.
+    return select(Product).where(column.in_(keys) & ACTIVE_STOCK)
+
+
+warmup.hot_query('all_products', select_product_page)
+warmup.hot_query('active_category', lambda: select_active_category(''))
+warmup.hot_query('category_products', lambda: select_category_products(0))
+warmup.hot_query('product_detail', lambda: select_product_by_slug(''))
+warmup.hot_query(
+    'product_batch', lambda: select_products_in(Product.slug, [''])
+)
+
+
+async def _fetch_all(db: AsyncSession, query):
+    return jsonable_encoder((await db.scalars(query)).all())
+
+
+async def _fetch_page(db: AsyncSession, sort, limit, after, filters):
+    products = await _fetch_all(
+        db, select_product_page(sort, limit, after, filters)
+    )
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = _encode_cursor(sort, products[-1])
+    return {'items': products, 'next_cursor': next_cursor}
+
 
 @router.get('/')
 async def all_products(
     db: Annotated[AsyncSession, Depends(get_db)],
+    sort: ProductSort = 'newest',
+    min_price: Annotated[float | None, Query(ge=0)] = None,
+    max_price: Annotated[float | None, Query(ge=0)] = None,
+    min_rating: Annotated[float | None, Query(ge=0, le=5)] = None,
+    category_id: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = PAGE_SIZE,
+    cursor: str | None = None
 ):
-    products = await db.scalars(
-        select(Product)
-        .where(ACTIVE_STOCK))
-    if products is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='There are no any products')
-    return products.all()
+    facets = await load_catalog_facets(db)
+
+    filters = []
+    if min_price is not None:
+        filters.append(Product.price >= min_price)
+    if max_price is not None:
+        filters.append(Product.price <= max_price)
+    if min_rating is not None:
+        filters.append(Product.rating >= min_rating)
+    if category_id is not None:
+        subtree = category_subtree(facets, category_id)
+        if not subtree:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='Category not found'
+            )
+        filters.append(Product.category_id.in_(sorted(subtree)))
+    after = _decode_cursor(sort, cursor) if cursor else None
+
+    key = (
+        f'products:{sort}:{min_price}:{max_price}:{min_rating}:'
+        f'{category_id}:{limit}:{cursor}'
+    )
+
+    async def fetch():
+        page = await _fetch_page(db, sort, limit, after, tuple(filters))
+        return {**page, 'facets': facet_counts(facets, category_id)}
+
+    # Facets are evicted by the same tags as the page, so the whole body can
+    # be cached (and compressed) as one entry.
+    page = await catalog_cache.get_or_set(
+        key, ('products', 'categories'), fetch
+    )
+    return CachedJSONResponse(page)
+
+
+warmup.prefill('products_cache', all_products)
     
 
 @router.post('/create')
@@ -40,7 +241,7 @@ async def create_product(
     get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
 ):
     if get_user.get('is_supplier') or get_user.get('is_admin'):
-        await db.execute(
+        product_id = await db.scalar(
             insert(Product).values(
                 name=create_product.name,
                 slug=slugify(create_product.name),
@@ -52,8 +253,10 @@ async def create_product(
                 supplier_id=create_product.supplier_id,
                 rating=0.0
             )
+            .returning(Product.id)
         )
         await db.commit()
+        await invalidation_bus.publish('product', product_id)
         return {
             'status_code': status.HTTP_201_CREATED,
             'transaction': 'Successful'
@@ -64,34 +267,77 @@ async def create_product(
 )
 
 
+@router.post('/batch')
+async def products_batch(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    lookup: ProductLookup
+):
+    """Many product details at once, in request order.
+
+    Slugs are served from the detail cache first; whatever is left is read
+    with a single IN query and put back into the cache. Products that do not
+    exist, are inactive or out of stock come back with ``product: null``.
+    """
+    by_slug = lookup.slugs is not None
+    keys = lookup.slugs if by_slug else lookup.ids
+    found: dict = {}
+
+    if by_slug:
+        for slug in keys:
+            cached = catalog_cache.get(f'product:{slug}')
+            if cached is not None:
+                found[slug] = cached
+
+    missing = list(dict.fromkeys(key for key in keys if key not in found))
+    if missing:
+        version = catalog_cache.version()
+        column = Product.slug if by_slug else Product.id
+        products = await db.scalars(select_products_in(column, missing))
+        for product in products:
+            product = catalog_cache.set(
+                f'product:{product.slug}',
+                jsonable_encoder(product),
+                (f'product:{product.id}',),
+                version
+            ).value
+            found[product['slug'] if by_slug else product['id']] = product
+
+    items = [{'key': key, 'product': found.get(key)} for key in keys]
+    return {
+        'items': items,
+        'missing': [item['key'] for item in items if item['product'] is None]
+    }
+
+
+@router.get('/suggest')
+async def suggest_products(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    limit: Annotated[int, Query(ge=1, le=MAX_SUGGESTIONS)] = 10
+):
+    """Typeahead: in-stock products with a name word or slug starting
+    with ``q``, best rated first. Served from memory; the database is only
+    read when products changed since the last call."""
+    await suggest_index.refresh(db)
+    return {'items': suggest_index.suggest(q, limit)}
+
+
 @router.get('/{category_slug}')
 async def product_by_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     category_slug: str
 ):
-    category = await db.scalar(
-        select(Category).where(
-            (Category.slug == category_slug) & (Category.is_active)
-        )
-    )
-    if category is None:
-        raise HTTPException(status_code=404, detail='Category not found')
-    
-    subcategories = await db.scalars(
-        select(Category)
-        .where((Category.parent_id == category.id) & Category.is_active)
-    )
-
-    cats_and_subcats_ids = [category.id] + [sub.id for sub in subcategories]
+    async def fetch():
+        category = await db.scalar(select_active_category(category_slug))
+        if category is None:
+            raise HTTPException(status_code=404, detail='Category not found')
+        return await _fetch_all(db, select_category_products(category.id))
 
-    products = await db.scalars(
-        select(Product).where(
-            (Product.category_id.in_(cats_and_subcats_ids))
-            & ACTIVE_STOCK
-        )
-    )
-
-    return products.all()
+    return CachedJSONResponse(await catalog_cache.get_or_set(
+        f'category-products:{category_slug}',
+        ('products', 'categories'),
+        fetch
+    ))
 
 
 @router.get('/detail/{product_slug}')
@@ -99,18 +345,55 @@ async def product_detail(
     db: Annotated[AsyncSession, Depends(get_db)],
     product_slug: str
 ):
-    product = await db.scalar(
-        select(Product).where((Product.slug == product_slug) & ACTIVE_STOCK)
-    )
+    async def fetch():
+        product = await db.scalar(select_product_by_slug(product_slug))
+        if product is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="There is no any product"
+            )
+        return jsonable_encoder(product)
+
+    # A viral product is read once however many requests miss together.
+    return CachedJSONResponse(await catalog_cache.get_or_set(
+        f'product:{product_slug}',
+        (),
+        fetch,
+        lambda product: (f'product:{product["id"]}',)
+    ))
+
+
+@router.get('/detail/{product_slug}/similar')
+async def similar_products(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    product_slug: str,
+    limit: Annotated[int, Query(ge=1, le=SIMILAR_TOP_K)] = 10
+):
+    """Products rated alike by the same customers, most similar first.
+
+    Lists come precomputed from the similarity job, so this is one lookup
+    plus one IN query; neighbours no longer in stock are skipped.
+    """
+    product = await db.scalar(select_product_by_slug(product_slug))
     if product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="There is no any product"
         )
-    return product
-
+    neighbours = item_similarity.similar(product.id)
+    if not neighbours:
+        return {'items': []}
+    found = {
+        similar.id: similar for similar in await db.scalars(
+            select_products_in(Product.id, [pid for pid, _ in neighbours])
+        )
+    }
+    items = [
+        {'product': jsonable_encoder(found[pid]), 'score': round(score, 4)}
+        for pid, score in neighbours if pid in found
+    ]
+    return {'items': items[:limit]}
 
-    
 
 @router.put('/detail/{product_slug}')
 async def update_product(
@@ -156,6 +439,7 @@ async def update_product(
         )
 
         await db.commit()
+        await invalidation_bus.publish('product', product.id)
 
         return {
             'status_code': status.HTTP_200_OK,
@@ -171,6 +455,63 @@ is_supplier: {get_user.get('is_supplier')}
 )
 
 
+@router.post('/detail/{product_slug}/image')
+async def upload_product_image(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    product_slug: str,
+    image: UploadFile,
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    if not (get_user.get('is_admin') or get_user.get('is_supplier')):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
+    if not images_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Image processing is not available'
+        )
+
+    product = await db.scalar(
+        select(Product).where((Product.slug == product_slug) & ACTIVE_STOCK)
+    )
+    if product is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='There is no such product'
+        )
+    if get_user.get('id') != product.supplier_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You are not authorized to use this method"
+        )
+
+    data = await image.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'Image must be at most {MAX_IMAGE_BYTES} bytes'
+        )
+    try:
+        stored = await store_product_image(product.id, data)
+    except InvalidImage as ex:
+        logger.warning(f'Rejected image for {product_slug}: {ex}')
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Not a supported image'
+        )
+
+    await db.execute(
+        update(Product)
+        .where(Product.id == product.id)
+        .values(image_url=stored['image_url'])
+    )
+    await db.commit()
+    await invalidation_bus.publish('product', product.id)
+    return {'status_code': status.HTTP_201_CREATED, **stored}
+
+
 @router.delete('/delete')
 async def delete_product(
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -201,9 +542,10 @@ async def delete_product(
         await db.execute(
             update(Product)
             .where(Product.id == product_id)
-            .values(is_active=False)
+            .values(is_active=False, deactivated_at=datetime.now())
         )
         await db.commit()
+        await invalidation_bus.publish('product', product_id)
         
         return {
             'status_code': status.HTTP_200_OK,
@@ -222,12 +564,17 @@ is_supplier: {get_user.get('is_supplier')}
 @router.get('/detail/{product_slug}/reviews')
 async def product_reviews(
     db: Annotated[AsyncSession, Depends(get_db)],
-    product_slug: str
+    product_slug: str,
+    since: date | None = None,
+    until: date | None = None
 ):
     reviews = await db.scalars(
         select(Review)
         .join(Review.product)
-        .where((Product.slug == product_slug) & (Review.is_active == True))
+        .where(
+            (Product.slug == product_slug) & (Review.is_active == True),
+            *review_period(since, until)
+        )
         .options(joinedload(Review.product))
     )
     if not reviews:
@@ -292,6 +639,7 @@ async def add_reviews(
         db.add(product)
 
         await db.commit()
+        await invalidation_bus.publish('product', product.id)
 
         return {
         'status_code': status.HTTP_201_CREATED,
@@ -337,17 +685,18 @@ async def delete_reviews(
         
         await db.execute(
             update(Review)
-            .where(Review.product_id == product.id)
-            .values(is_active=False)
+            .where((Review.product_id == product.id) & Review.is_active)
+            .values(is_active=False, deactivated_at=datetime.now())
         )
 
         await db.execute(
             update(Rating)
-            .where(Rating.product_id == product.id)
-            .values(is_active=False)
+            .where((Rating.product_id == product.id) & Rating.is_active)
+            .values(is_active=False, deactivated_at=datetime.now())
         )
 
         await db.commit()
+        await invalidation_bus.publish('product', product.id)
 
         return {
             'status_code': status.HTTP_200_OK,
@@ -0,0 +1,110 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.facets import category_subtree, load_catalog_facets
+from app.backend.leaderboard import TRENDING_MAX_DAYS, leaderboard
+from app.models import Product
+from app.routers.products import ACTIVE_STOCK
+
+router = APIRouter(
+    prefix='/rankings', tags=['rankings'], route_class=ReleasingRoute
+)
+
+Limit = Annotated[int, Query(ge=1, le=100)]
+
+
+async def resolve_subtree(
+    db: AsyncSession,
+    category_slug: str | None
+) -> set[int] | None:
+    if category_slug is None:
+        return None
+    facets = await load_catalog_facets(db)
+    category_id = next(
+        (
+            cat_id for cat_id, _, slug, _ in facets['categories']
+            if slug == category_slug
+        ),
+        None
+    )
+    if category_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Category not found'
+        )
+    return category_subtree(facets, category_id)
+
+
+async def ranked_products(
+    db: AsyncSession,
+    product_ids: list[int],
+    extra: dict[int, dict] | None = None
+) -> list[dict]:
+    if not product_ids:
+        return []
+    products = await db.scalars(
+        select(Product).where(Product.id.in_(product_ids) & ACTIVE_STOCK)
+    )
+    by_id = {product.id: product for product in products}
+    ranked = []
+    for product_id in product_ids:
+        product = by_id.get(product_id)
+        stats = leaderboard.stats(product_id)
+        if product is None or stats is None:
+            continue
+        ranked.append({
+            'rank': len(ranked) + 1,
+            'product': product,
+            'rating': stats.rating,
+            'reviews': stats.reviews,
+            **(extra or {}).get(product_id, {})
+        })
+    return ranked
+
+
+@router.get('/top_rated')
+async def top_rated(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    category_slug: str | None = None,
+    min_reviews: Annotated[int, Query(ge=1)] = 1,
+    limit: Limit = 10
+):
+    await leaderboard.refresh(db)
+    subtree = await resolve_subtree(db, category_slug)
+    return await ranked_products(
+        db, leaderboard.top_rated(subtree, limit, min_reviews)
+    )
+
+
+@router.get('/most_reviewed')
+async def most_reviewed(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    category_slug: str | None = None,
+    limit: Limit = 10
+):
+    await leaderboard.refresh(db)
+    subtree = await resolve_subtree(db, category_slug)
+    return await ranked_products(
+        db, leaderboard.most_reviewed(subtree, limit)
+    )
+
+
+@router.get('/trending')
+async def trending(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    days: Annotated[int, Query(ge=1, le=TRENDING_MAX_DAYS)] = 7,
+    category_slug: str | None = None,
+    limit: Limit = 10
+):
+    await leaderboard.refresh(db)
+    subtree = await resolve_subtree(db, category_slug)
+    scored = leaderboard.trending(subtree, days, limit)
+    return await ranked_products(
+        db,
+        [product_id for product_id, _ in scored],
+        {product_id: {'recent_reviews': n} for product_id, n in scored}
+    )
@@ -1,26 +1,53 @@
+from datetime import date
 from typing import Annotated
 
 from loguru import logger
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from slugify import slugify
 from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.review_ingest import MAX_FEED_SIZE, ingest_reviews
 from app.models import Category, Product, Review
 from app.schemas import CreateProduct
 from app.routers.auth import get_user_data_from_jwt
 
 
-router = APIRouter(prefix='/reviews', tags=['reviews'])
+router = APIRouter(
+    prefix='/reviews', tags=['reviews'], route_class=ReleasingRoute
+)
+
+
+def review_period(since: date | None, until: date | None) -> tuple:
+    """Conditions on comment_date, the partition key of reviews on PG.
+
+    Filtering on the key itself (not an expression over it) is what lets
+    the planner skip the months outside the range.
+    """
+    if since is not None and until is not None and since > until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='since must not be after until'
+        )
+    conditions = []
+    if since is not None:
+        conditions.append(Review.comment_date >= since)
+    if until is not None:
+        conditions.append(Review.comment_date <= until)
+    return tuple(conditions)
 
 
 @router.get('/')
 async def all_reviews(
     db: Annotated[AsyncSession, Depends(get_db)],
+    since: date | None = None,
+    until: date | None = None
 ):
-    reviews = await db.scalars(select(Review).where(Review.is_active))
+    reviews = await db.scalars(
+        select(Review).where(Review.is_active, *review_period(since, until))
+    )
     if reviews is None:
         logger.error(f'Reviews: {reviews}')
         raise HTTPException(
@@ -29,3 +56,27 @@ async def all_reviews(
         )
     return reviews.all()
 
+
+@router.post('/bulk')
+async def bulk_reviews(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    feed: Annotated[list[dict], Body()],
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    """Import reviews from a partner marketplace feed.
+
+    Items are validated here one by one, so a bad row is reported back by
+    its index instead of rejecting the whole feed.
+    """
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
+    if len(feed) > MAX_FEED_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'Feed must have at most {MAX_FEED_SIZE} reviews'
+        )
+    result = await ingest_reviews(db, feed)
+    return {'status_code': status.HTTP_201_CREATED, **result}
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db_depends import ReleasingRoute, get_db
+from app.backend.rollups import ROLLUP_WEEKS, week_start
+from app.models import SupplierReviewWeek, SupplierStats
+from app.routers.auth import get_user_data_from_jwt
+
+router = APIRouter(
+    prefix='/supplier', tags=['supplier'], route_class=ReleasingRoute
+)
+
+
+@router.get('/{supplier_id}/stats')
+async def supplier_stats(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    supplier_id: int,
+    get_user: Annotated[dict, Depends(get_user_data_from_jwt)]
+):
+    """Totals over the supplier's active products, read from the rollup
+    rows; ``updated_at`` tells how fresh they are."""
+    if not (get_user.get('is_admin') or get_user.get('id') == supplier_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
+
+    stats = await db.get(SupplierStats, supplier_id)
+    first_week = week_start(date.today()) - timedelta(weeks=ROLLUP_WEEKS - 1)
+    weeks = {
+        week: reviews for week, reviews in await db.execute(
+            select(SupplierReviewWeek.week, SupplierReviewWeek.reviews)
+            .where(
+                (SupplierReviewWeek.supplier_id == supplier_id)
+                & (SupplierReviewWeek.week >= first_week)
+            )
+        )
+    }
+    rating_count = stats.rating_count if stats else 0
+    return {
+        'supplier_id': supplier_id,
+        'active_skus': stats.active_skus if stats else 0,
+        'stock_units': stats.stock_units if stats else 0,
+        'stock_value': stats.stock_value if stats else 0.0,
+        'average_rating': (
+            round(stats.rating_sum / rating_count, 2) if rating_count else None
+        ),
+        'ratings': rating_count,
+        'reviews_per_week': [
+            {'week': week, 'reviews': weeks.get(week, 0)}
+            for week in (
+                first_week + timedelta(weeks=offset)
+                for offset in range(ROLLUP_WEEKS)
+            )
+        ],
+        'updated_at': stats.updated_at if stats else None
+    }
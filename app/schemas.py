@@ -1,4 +1,7 @@
-from pydantic import BaseModel, field_validator
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel, field_validator, model_validator
 
 
 class CreateProduct(BaseModel):
@@ -51,3 +54,74 @@ class CreateRating(BaseModel):
         if not 1 <= value <= 5:
             raise ValueError('Grade must be between 1 and 5')
         return value
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+
+class ReservationItem(BaseModel):
+    product_id: int
+    quantity: int
+
+    @field_validator('quantity')
+    def validate_quantity(cls, value):
+        if not 1 <= value <= 1000:
+            raise ValueError('Must be between 1 and 1000')
+        return value
+
+
+class CreateReservation(BaseModel):
+    items: list[ReservationItem]
+
+    @field_validator('items')
+    def validate_items(cls, value):
+        if not 1 <= len(value) <= 100:
+            raise ValueError('Cart must have between 1 and 100 items')
+        return value
+
+
+class ProductLookup(BaseModel):
+    slugs: list[str] | None = None
+    ids: list[int] | None = None
+
+    @model_validator(mode='after')
+    def validate_keys(self):
+        if (self.slugs is None) == (self.ids is None):
+            raise ValueError('Pass either slugs or ids')
+        if not 1 <= len(self.slugs or self.ids or ()) <= 100:
+            raise ValueError('Must look up between 1 and 100 products')
+        return self
+
+
+class ReviewFeedItem(BaseModel):
+    product_slug: str
+    user_id: int
+    review: CreateReview
+    rating: CreateRating
+    comment_date: date | None = None
+
+
+class SubRequest(BaseModel):
+    id: str | None = None
+    method: Literal['GET'] = 'GET'
+    path: str
+    headers: dict[str, str] = {}
+
+    @field_validator('path')
+    def validate_path(cls, value):
+        if not value.startswith('/'):
+            raise ValueError('Path must start with /')
+        if value.partition('?')[0].rstrip('/') == '/batch':
+            raise ValueError('Batches cannot be nested')
+        return value
+
+
+class BatchRequest(BaseModel):
+    requests: list[SubRequest]
+
+    @model_validator(mode='after')
+    def validate_size(self):
+        if not 1 <= len(self.requests) <= 20:
+            raise ValueError('Must batch between 1 and 20 requests')
+        return self
@@ -0,0 +1,183 @@
+"""Production entry point: ``python -m app.serve``.
+
+Pre-binds one listening socket and runs a uvicorn server per worker on it,
+restarting workers that exit, whether recycled after --max-requests or
+crashed. ``make run`` stays the development server.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+from importlib.util import find_spec
+from os import getenv
+
+import uvicorn
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+APP = 'app.main:app'
+RESTART_DELAY_SECONDS = 1
+
+
+def available_cpus() -> list[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def event_loop() -> str:
+    return 'uvloop' if find_spec('uvloop') else 'asyncio'
+
+
+def http_protocol() -> str:
+    return 'httptools' if find_spec('httptools') else 'h11'
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m app.serve')
+    parser.add_argument('--host', default=getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(getenv('PORT', 8000)))
+    parser.add_argument(
+        '--workers', type=int,
+        default=int(getenv('WEB_CONCURRENCY', len(available_cpus())))
+    )
+    parser.add_argument(
+        '--backlog', type=int, default=int(getenv('SERVE_BACKLOG', 2048))
+    )
+    parser.add_argument(
+        '--keep-alive', type=int, default=int(getenv('SERVE_KEEP_ALIVE', 5)),
+        help='seconds an idle keep-alive connection stays open'
+    )
+    parser.add_argument(
+        '--graceful-timeout', type=int,
+        default=int(getenv('SERVE_GRACEFUL_TIMEOUT', 30)),
+        help='seconds in-flight requests get to finish on shutdown'
+    )
+    parser.add_argument(
+        '--max-requests', type=int,
+        default=int(getenv('SERVE_MAX_REQUESTS', 0)),
+        help='recycle a worker after this many requests, 0 never'
+    )
+    parser.add_argument(
+        '--max-requests-jitter', type=int,
+        default=int(getenv('SERVE_MAX_REQUESTS_JITTER', 0)),
+        help='random extra requests per worker, so they do not all recycle '
+             'at once'
+    )
+    parser.add_argument(
+        '--pin-cpus', action='store_true',
+        default=getenv('SERVE_PIN_CPUS', 'false').lower() in ('1', 'true'),
+        help='pin worker N to the Nth available CPU'
+    )
+    parser.add_argument(
+        '--no-access-log', dest='access_log', action='store_false'
+    )
+    return parser.parse_args(argv)
+
+
+def worker_config(args: argparse.Namespace) -> dict:
+    # Drawn per worker, and again on every restart, so recycling spreads
+    # out. Done here as the locked uvicorn has no jitter option of its own.
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(
+            0, args.max_requests_jitter
+        )
+    return {
+        'loop': event_loop(),
+        'http': http_protocol(),
+        'backlog': args.backlog,
+        'timeout_keep_alive': args.keep_alive,
+        'timeout_graceful_shutdown': args.graceful_timeout,
+        'limit_max_requests': max_requests,
+        'access_log': args.access_log,
+    }
+
+
+def run_worker(
+    index: int, args: argparse.Namespace, sock: socket.socket
+) -> None:
+    if args.pin_cpus and hasattr(os, 'sched_setaffinity'):
+        cpus = available_cpus()
+        os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+    config = uvicorn.Config(APP, **worker_config(args))
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def bind_socket(args: argparse.Namespace) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.sock = bind_socket(args)
+        # Spawned workers import the app fresh, nothing is shared by fork.
+        self.context = multiprocessing.get_context('spawn')
+        self.workers: dict[int, multiprocessing.Process] = {}
+        self.stop_signal: int | None = None
+
+    def spawn(self, index: int) -> None:
+        process = self.context.Process(
+            target=run_worker,
+            args=(index, self.args, self.sock),
+            name=f'app-worker-{index}'
+        )
+        process.start()
+        self.workers[index] = process
+
+    def stop(self, signum, frame) -> None:
+        self.stop_signal = signum
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        logger.info(
+            f'Serving {APP} on {self.args.host}:{self.args.port} with '
+            f'{self.args.workers} workers, {event_loop()} and '
+            f'{http_protocol()}'
+        )
+        for index in range(self.args.workers):
+            self.spawn(index)
+        while self.stop_signal is None:
+            time.sleep(RESTART_DELAY_SECONDS)
+            for index, process in list(self.workers.items()):
+                if not process.is_alive() and self.stop_signal is None:
+                    logger.info(
+                        f'Worker {index} exited with {process.exitcode}, '
+                        'restarting'
+                    )
+                    self.spawn(index)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        # Ctrl+C already reached the workers through the process group; a
+        # second signal would make uvicorn skip the graceful shutdown.
+        if self.stop_signal != signal.SIGINT:
+            for process in self.workers.values():
+                if process.is_alive():
+                    process.terminate()
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        for process in self.workers.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+        self.sock.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    Supervisor(parse_args(argv)).run()
+
+
+if __name__ == '__main__':
+    main()
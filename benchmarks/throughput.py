@@ -0,0 +1,130 @@
+"""Throughput of the production launcher against the development server.
+
+    python benchmarks/throughput.py [--duration 10] [--concurrency 64]
+
+Starts each configuration on a free port, drives it with keep-alive
+clients for ``--duration`` seconds per path and prints requests per second
+and latency percentiles side by side. Both runs use the environment's
+DATABASE_URL; the default paths do not query the database.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+CONFIGURATIONS = {
+    # What `make run` starts: one process with the reloader.
+    'dev': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'app.main:app',
+        '--port', str(port), '--reload', '--no-access-log'
+    ],
+    'serve': lambda port, workers: [
+        sys.executable, '-m', 'app.serve', '--host', '127.0.0.1',
+        '--port', str(port), '--workers', str(workers), '--no-access-log'
+    ],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up in {timeout} s')
+
+
+async def drive(url: str, duration: float, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'rps': len(latencies) / duration,
+        'p50_ms': quantiles[49] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'errors': errors,
+    }
+
+
+async def bench(name: str, args: argparse.Namespace) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        CONFIGURATIONS[name](port, args.workers),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, 'TRACE_SAMPLE_RATE': '0'},
+    )
+    base = f'http://127.0.0.1:{port}'
+    try:
+        await wait_until_up(base + '/health/live')
+        await drive(base + args.paths[0], 1, args.concurrency)  # warm up
+        return {
+            path: await drive(base + path, args.duration, args.concurrency)
+            for path in args.paths
+        }
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        '--paths', nargs='+', default=['/health/live', '/']
+    )
+    args = parser.parse_args()
+
+    results = {name: asyncio.run(bench(name, args)) for name in CONFIGURATIONS}
+    print(f'{"path":<16}{"config":<8}{"req/s":>10}{"p50 ms":>10}'
+          f'{"p99 ms":>10}{"errors":>8}')
+    for path in args.paths:
+        for name in CONFIGURATIONS:
+            row = results[name][path]
+            print(
+                f'{path:<16}{name:<8}{row["rps"]:>10.0f}'
+                f'{row["p50_ms"]:>10.1f}{row["p99_ms"]:>10.1f}'
+                f'{row["errors"]:>8}'
+            )
+        speedup = results['serve'][path]['rps'] / results['dev'][path]['rps']
+        print(f'{"":<16}serve/dev throughput x{speedup:.2f}')
+
+
+if __name__ == '__main__':
+    main()
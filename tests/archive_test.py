@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.backend.archive import archive_inactive
+from app.models import ARCHIVE_TABLES, Category, Product, Rating, Review
+
+
+async def add(db, model, **values):
+    return await db.scalar(insert(model).values(**values).returning(model.id))
+
+
+@pytest.mark.asyncio
+async def test_archiver_moves_old_inactive_rows_children_first(
+    async_client, admin_headers, test_engine
+):
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    long_ago = datetime.now() - timedelta(days=365)
+    async with session_maker() as db:
+        category = await add(
+            db, Category, name='Retired', slug='retired', is_active=False,
+            deactivated_at=long_ago
+        )
+        product = {
+            'description': 'desc', 'price': 1.0, 'image_url': '', 'stock': 0,
+            'category_id': category, 'rating': 0.0, 'is_active': False,
+            'deactivated_at': long_ago
+        }
+        gone = await add(db, Product, name='Gone', slug='gone', **product)
+        kept = await add(
+            db, Product, name='Kept', slug='kept',
+            **{**product, 'deactivated_at': datetime.now()}
+        )
+        ratings = [
+            await add(
+                db, Rating, grade=4, user_id=1, product_id=product_id,
+                is_active=False, deactivated_at=long_ago
+            )
+            for product_id in (gone, gone, gone, kept)
+        ]
+        for product_id, rating_id in zip((gone, gone, gone, kept), ratings):
+            await add(
+                db, Review, user_id=1, product_id=product_id,
+                rating_id=rating_id, comment='An old review',
+                comment_date=date.today(), is_active=False,
+                deactivated_at=long_ago
+            )
+        await db.commit()
+
+        moved = await archive_inactive(db, batch_size=2, pause=0)
+
+        # The recently deactivated product keeps its category live.
+        assert moved == {
+            'reviews': 4, 'ratings': 4, 'products': 1, 'categories': 0
+        }
+        remaining = await db.scalars(
+            select(Product.id).where(Product.id.in_([gone, kept]))
+        )
+        assert remaining.all() == [kept]
+        archived = ARCHIVE_TABLES['products']
+        assert await db.scalar(
+            select(archived.c.slug).where(archived.c.id == gone)
+        ) == 'gone'
+
+        # A second pass has nothing left to do.
+        assert sum((await archive_inactive(db, pause=0)).values()) == 0
+
+    response = await async_client.get(
+        '/admin/archive/reviews',
+        params={'product_id': gone, 'limit': 2},
+        headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    assert len(page['items']) == 2
+    assert page['items'][0]['comment'] == 'An old review'
+
+    rest = await async_client.get(
+        '/admin/archive/reviews',
+        params={'product_id': gone, 'after': page['next_after']},
+        headers=admin_headers
+    )
+    assert len(rest.json()['items']) == 1
+    assert rest.json()['next_after'] is None
+
+    wrong_filter = await async_client.get(
+        '/admin/archive/categories',
+        params={'product_id': gone},
+        headers=admin_headers
+    )
+    assert wrong_filter.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_archive_views_are_admin_only(async_client):
+    response = await async_client.get('/admin/archive/products')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
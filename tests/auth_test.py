@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+
+from app.backend.metrics import metrics
+from app.backend.security_epochs import SecurityEpochs, security_epochs
+from app.routers import auth
+
+
+@pytest.fixture(autouse=True)
+def jwt_settings(monkeypatch):
+    monkeypatch.setattr(auth, 'SECRET_KEY', 'test-secret')
+    monkeypatch.setattr(auth, 'ALGORITHM', 'HS256')
+
+
+async def login(async_client, username):
+    await async_client.post(
+        '/auth/',
+        json={
+            'first_name': 'Test',
+            'last_name': 'User',
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': 'secret-password'
+        }
+    )
+    response = await async_client.post(
+        '/auth/token',
+        data={'username': username, 'password': 'secret-password'}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_token(async_client):
+    tokens = await login(async_client, 'refresh_user')
+    password_logins = metrics.counter('auth_logins_total', method='password')
+
+    response = await async_client.post(
+        '/auth/refresh',
+        json={'refresh_token': tokens['refresh_token']}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    refreshed = response.json()
+    assert refreshed['access_token']
+    assert refreshed['refresh_token'] != tokens['refresh_token']
+    assert metrics.counter('auth_logins_total', method='refresh') >= 1
+    assert (
+        metrics.counter('auth_logins_total', method='password')
+        == password_logins
+    )
+
+    me = await async_client.get(
+        '/auth/read_current_user',
+        headers={'Authorization': f'Bearer {refreshed["access_token"]}'}
+    )
+    assert me.json()['User']['username'] == 'refresh_user'
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_family(async_client):
+    tokens = await login(async_client, 'reuse_user')
+
+    first = await async_client.post(
+        '/auth/refresh',
+        json={'refresh_token': tokens['refresh_token']}
+    )
+    assert first.status_code == status.HTTP_200_OK
+
+    reused = await async_client.post(
+        '/auth/refresh',
+        json={'refresh_token': tokens['refresh_token']}
+    )
+    assert reused.status_code == status.HTTP_401_UNAUTHORIZED
+
+    rotated = await async_client.post(
+        '/auth/refresh',
+        json={'refresh_token': first.json()['refresh_token']}
+    )
+    assert rotated.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_revoked_refresh_token_is_rejected(async_client):
+    tokens = await login(async_client, 'revoke_user')
+
+    revoke = await async_client.post(
+        '/auth/revoke',
+        json={'refresh_token': tokens['refresh_token']}
+    )
+    assert revoke.status_code == status.HTTP_200_OK
+
+    response = await async_client.post(
+        '/auth/refresh',
+        json={'refresh_token': tokens['refresh_token']}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_role_switch_revokes_outstanding_tokens(async_client):
+    tokens = await login(async_client, 'epoch_user')
+    headers = {'Authorization': f'Bearer {tokens["access_token"]}'}
+    me = await async_client.get('/auth/read_current_user', headers=headers)
+    user_id = me.json()['User']['id']
+
+    admin_token = await auth.create_access_token(
+        'admin', 10_000, True, False, False, timedelta(minutes=5)
+    )
+    switch = await async_client.patch(
+        '/permission/',
+        params={'user_id': user_id},
+        headers={'Authorization': f'Bearer {admin_token}'}
+    )
+    assert switch.status_code == status.HTTP_200_OK
+    assert security_epochs.get(user_id) == 1
+
+    stale = await async_client.get('/auth/read_current_user', headers=headers)
+    assert stale.status_code == status.HTTP_401_UNAUTHORIZED
+
+    refreshed = await async_client.post(
+        '/auth/refresh',
+        json={'refresh_token': tokens['refresh_token']}
+    )
+    me = await async_client.get(
+        '/auth/read_current_user',
+        headers={'Authorization': f'Bearer {refreshed.json()["access_token"]}'}
+    )
+    assert me.status_code == status.HTTP_200_OK
+    assert me.json()['User']['is_supplier'] is True
+
+
+def test_security_epochs_only_move_forward():
+    epochs = SecurityEpochs()
+    assert epochs.is_current(7, 0)
+
+    epochs.set(7, 2)
+    epochs.set(7, 1)
+    assert epochs.get(7) == 2
+    assert not epochs.is_current(7, 1)
+    assert epochs.is_current(7, 2)
+    assert epochs.get(100) == 0
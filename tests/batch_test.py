@@ -0,0 +1,80 @@
+import pytest
+from fastapi import status
+
+from app.backend.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_product_page_in_one_round_trip(
+    async_client, admin_headers, create_category, create_product, review
+):
+    category_id = await create_category(async_client, admin_headers, 'Tea')
+    await create_product(async_client, admin_headers, 'Oolong', 9, category_id)
+    await review(async_client, admin_headers, 'oolong', 5)
+    shared = metrics.counter('auth_shared_decodes_total')
+
+    response = await async_client.post(
+        '/batch',
+        json={'requests': [
+            {'id': 'product', 'path': '/product/detail/oolong'},
+            {'id': 'reviews', 'path': '/product/detail/oolong/reviews'},
+            {'id': 'categories', 'path': '/category/all_categories'},
+            {'id': 'me', 'path': '/auth/read_current_user'},
+            {'id': 'stats', 'path': '/supplier/1/stats'},
+            {'id': 'missing', 'path': '/product/detail/no-such-tea'},
+            {
+                'id': 'anonymous',
+                'path': '/auth/read_current_user',
+                'headers': {'Authorization': ''}
+            },
+        ]},
+        headers=admin_headers
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    product, reviews, categories, me, stats, missing, anonymous = (
+        response.json()['responses']
+    )
+    assert product['id'] == 'product'
+    assert product['status'] == status.HTTP_200_OK
+    assert product['body']['category_id'] == category_id
+    assert [r['comment'] for r in reviews['body']] == [
+        'Exactly what I needed'
+    ]
+    assert 'Tea' in [c['name'] for c in categories['body']]
+    assert me['body']['User']['id'] == 1
+    assert stats['status'] == status.HTTP_200_OK
+    assert missing['status'] == status.HTTP_404_NOT_FOUND
+    assert anonymous['status'] == status.HTTP_401_UNAUTHORIZED
+    # Both authenticated sub-requests carry the token; it is decoded once.
+    assert metrics.counter('auth_shared_decodes_total') - shared == 1
+
+
+@pytest.mark.asyncio
+async def test_only_flat_get_batches_are_accepted(async_client):
+    nested = await async_client.post(
+        '/batch', json={'requests': [{'path': '/batch'}]}
+    )
+    assert nested.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    write = await async_client.post(
+        '/batch',
+        json={'requests': [{'method': 'POST', 'path': '/auth/'}]}
+    )
+    assert write.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_unencodable_header_fails_only_its_sub_request(async_client):
+    response = await async_client.post(
+        '/batch',
+        json={'requests': [
+            {'id': 'bad', 'path': '/', 'headers': {'X-Note': 'Ж'}},
+            {'id': 'good', 'path': '/'},
+        ]}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    bad, good = response.json()['responses']
+    assert bad['status'] == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert good['status'] == status.HTTP_200_OK
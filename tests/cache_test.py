@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.backend.cache import Cache, catalog_cache
+from app.backend.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = Cache('coalesce', 100, 60)
+    loads = 0
+    release = asyncio.Event()
+
+    async def produce():
+        nonlocal loads
+        loads += 1
+        await release.wait()
+        return {'id': 7}
+
+    readers = [
+        asyncio.create_task(cache.get_or_set(
+            'product:viral', ('products',), produce,
+            lambda value: ('products', f'product:{value["id"]}')
+        ))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    entries = await asyncio.gather(*readers)
+
+    assert loads == 1
+    assert all(entry is entries[0] for entry in entries)
+    assert entries[0].tags == ('products', 'product:7')
+    assert metrics.counter('cache_coalesced_total', cache='coalesce') == 4
+    assert metrics.snapshot()['gauges'][
+        'cache_coalescing_ratio{cache="coalesce"}'
+    ] == pytest.approx(0.8)
+
+
+@pytest.mark.asyncio
+async def test_waiters_get_the_error_and_a_cancelled_load_is_taken_over():
+    cache = Cache('coalesce-errors', 100, 60)
+    release = asyncio.Event()
+
+    async def missing():
+        await release.wait()
+        raise HTTPException(status_code=404)
+
+    readers = [
+        asyncio.create_task(cache.get_or_set('product:gone', (), missing))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*readers, return_exceptions=True)
+    assert [r.status_code for r in results] == [404] * 3
+    assert cache.get('product:gone') is None
+
+    async def slow():
+        await asyncio.sleep(60)
+
+    async def fast():
+        return 'value'
+
+    leader = asyncio.create_task(cache.get_or_set('key', (), slow))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_set('key', (), fast))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert (await waiter).value == 'value'
+
+
+@pytest.mark.asyncio
+async def test_viral_product_is_read_once(
+    async_client, admin_headers, create_category, create_product
+):
+    category_id = await create_category(async_client, admin_headers, 'Fad')
+    await create_product(async_client, admin_headers, 'Fidget', 3, category_id)
+    catalog_cache.invalidate('products')
+    loads = metrics.counter('cache_loads_total', cache='catalog')
+
+    responses = await asyncio.gather(*(
+        async_client.get('/product/detail/fidget') for _ in range(10)
+    ))
+
+    assert {r.status_code for r in responses} == {status.HTTP_200_OK}
+    assert {r.json()['slug'] for r in responses} == {'fidget'}
+    assert metrics.counter('cache_loads_total', cache='catalog') - loads == 1
+
+
+@pytest.mark.asyncio
+async def test_product_write_keeps_other_details_cached(
+    async_client, admin_headers, create_category, create_product
+):
+    category_id = await create_category(async_client, admin_headers, 'Coffee')
+    await create_product(async_client, admin_headers, 'Arabica', 3, category_id)
+    response = await async_client.get('/product/detail/arabica')
+    assert response.status_code == status.HTTP_200_OK
+    assert catalog_cache.get('product:arabica') is not None
+
+    await create_product(async_client, admin_headers, 'Robusta', 3, category_id)
+
+    assert catalog_cache.get('product:arabica') == response.json()
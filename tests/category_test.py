@@ -94,7 +94,9 @@ async def test_create_product(async_client):
     # Проверяем, что продукт доступен
     products = await async_client.get("/product/")
     assert products.status_code == status.HTTP_200_OK
-    assert any(p["name"] == "Test Product" for p in products.json())
+    assert any(
+        p["name"] == "Test Product" for p in products.json()["items"]
+    )
 
 
 @pytest.mark.asyncio
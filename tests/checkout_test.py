@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.backend.reservations import (
+    OutOfStock,
+    release_expired,
+    reserve_stock,
+)
+from app.models import Category, Product, StockReservation
+
+PARALLELISM = 100
+
+
+# SQLite serializes writers, so only the postgres run exercises the row
+# locks; the sqlite one just checks the stock accounting.
+@pytest.fixture(params=['sqlite', 'postgres'])
+def stress_engine(request):
+    if request.param == 'sqlite':
+        return request.getfixturevalue('test_engine')
+    return request.getfixturevalue('postgres_engine')
+
+
+@pytest_asyncio.fixture
+async def buyer(stress_engine, add_user):
+    # postgres_engine starts from empty tables, there is no user 1 there.
+    session_maker = async_sessionmaker(stress_engine, expire_on_commit=False)
+    return await add_user(session_maker, 'stress-buyer')
+
+
+async def add_product(session_maker, name, stock):
+    slug = name.lower().replace(' ', '-')
+    async with session_maker() as db:
+        # A category of their own keeps these rows out of other listings.
+        category_id = await db.scalar(
+            insert(Category)
+            .values(name=name, slug=f'stress-{slug}', is_active=False)
+            .returning(Category.id)
+        )
+        product_id = await db.scalar(
+            insert(Product)
+            .values(
+                name=name, slug=slug, description='desc', price=1.0,
+                image_url='', stock=stock, category_id=category_id, rating=0.0,
+                is_active=True
+            )
+            .returning(Product.id)
+        )
+        await db.commit()
+    return product_id
+
+
+async def stock_of(session_maker, product_id):
+    async with session_maker() as db:
+        return await db.scalar(
+            select(Product.stock).where(Product.id == product_id)
+        )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_carts_never_oversell(stress_engine, buyer):
+    session_maker = async_sessionmaker(stress_engine, expire_on_commit=False)
+    lamp = await add_product(session_maker, 'Stress Lamp', 10)
+    bulb = await add_product(session_maker, 'Stress Bulb', 5)
+
+    async def checkout(items):
+        async with session_maker() as db:
+            try:
+                await reserve_stock(db, buyer, items)
+                return True
+            except OutOfStock:
+                return False
+
+    carts = [
+        [(lamp, 1), (bulb, 1)] if i % 2 else [(lamp, 1)]
+        for i in range(PARALLELISM)
+    ]
+    results = await asyncio.gather(*(checkout(cart) for cart in carts))
+
+    assert await stock_of(session_maker, lamp) == 0
+    assert await stock_of(session_maker, bulb) >= 0
+    sold_bulbs = sum(ok for ok, cart in zip(results, carts) if len(cart) == 2)
+    assert sum(results) == 10
+    assert 5 - sold_bulbs == await stock_of(session_maker, bulb)
+
+
+@pytest.mark.asyncio
+async def test_expired_reservations_are_released_in_batches(test_engine):
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    kettle = await add_product(session_maker, 'Batch Kettle', 3)
+
+    async with session_maker() as db:
+        for _ in range(3):
+            await reserve_stock(db, 1, [(kettle, 1)])
+        await db.execute(
+            update(StockReservation)
+            .where(StockReservation.product_id == kettle)
+            .values(expires_at=datetime.now() - timedelta(minutes=1))
+        )
+        await db.commit()
+    assert await stock_of(session_maker, kettle) == 0
+
+    async with session_maker() as db:
+        assert await release_expired(db, batch_size=2) == 2
+        assert await release_expired(db, batch_size=2) == 1
+        assert await release_expired(db, batch_size=2) == 0
+    assert await stock_of(session_maker, kettle) == 3
+
+
+@pytest.mark.asyncio
+async def test_reserve_commit_and_release(
+    async_client, admin_headers, test_engine
+):
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    chair = await add_product(session_maker, 'Api Chair', 4)
+
+    def cart(quantity):
+        return {'items': [{'product_id': chair, 'quantity': quantity}]}
+
+    too_many = await async_client.post(
+        '/checkout/reserve', json=cart(5), headers=admin_headers
+    )
+    assert too_many.status_code == status.HTTP_409_CONFLICT
+    assert too_many.json()['detail'] == {'out_of_stock': [chair]}
+
+    first = await async_client.post(
+        '/checkout/reserve', json=cart(3), headers=admin_headers
+    )
+    cart_id = first.json()['cart_id']
+    committed = await async_client.post(
+        f'/checkout/{cart_id}/commit', headers=admin_headers
+    )
+    assert committed.status_code == status.HTTP_200_OK
+    released = await async_client.delete(
+        f'/checkout/{cart_id}', headers=admin_headers
+    )
+    assert released.status_code == status.HTTP_404_NOT_FOUND
+
+    second = await async_client.post(
+        '/checkout/reserve', json=cart(1), headers=admin_headers
+    )
+    assert await stock_of(session_maker, chair) == 0
+    released = await async_client.delete(
+        f'/checkout/{second.json()["cart_id"]}', headers=admin_headers
+    )
+    assert released.status_code == status.HTTP_200_OK
+    assert await stock_of(session_maker, chair) == 1
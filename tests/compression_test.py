@@ -0,0 +1,67 @@
+import gzip
+
+import pytest
+from fastapi import status
+
+from app.backend import compression
+from app.backend.cache import catalog_cache
+from app.backend.compression import negotiate
+
+
+def test_negotiate_prefers_brotli_and_honours_q_values():
+    assert negotiate('gzip, deflate, br') == 'br'
+    assert negotiate('br;q=0.5, gzip') == 'gzip'
+    assert negotiate('br;q=0, gzip;q=0') is None
+    assert negotiate('*') == 'br'
+    assert negotiate('identity') is None
+    assert negotiate('') is None
+
+
+@pytest.mark.asyncio
+async def test_cached_catalog_body_is_compressed_once(
+    async_client, admin_headers, monkeypatch
+):
+    monkeypatch.setattr(compression, 'COMPRESSION_MIN_SIZE', 0)
+    await async_client.post(
+        '/category/create',
+        json={'name': 'Compressed'},
+        headers=admin_headers
+    )
+
+    first = await async_client.get(
+        '/category/all_categories', headers={'Accept-Encoding': 'gzip'}
+    )
+    assert first.status_code == status.HTTP_200_OK
+    assert first.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in first.headers['vary']
+    assert 'Compressed' in [c['name'] for c in first.json()]
+
+    entry = catalog_cache.get_entry('categories:all')
+    assert gzip.decompress(entry.encoded['gzip']) == entry.encoded['identity']
+
+    second = await async_client.get(
+        '/category/all_categories', headers={'Accept-Encoding': 'br'}
+    )
+    assert second.headers['content-encoding'] == 'br'
+    assert set(entry.encoded) == {'identity', 'gzip', 'br'}
+
+    plain = await async_client.get(
+        '/category/all_categories', headers={'Accept-Encoding': 'identity'}
+    )
+    assert 'content-encoding' not in plain.headers
+    assert plain.json() == first.json()
+
+
+@pytest.mark.asyncio
+async def test_dynamic_response_respects_size_threshold(
+    async_client, monkeypatch
+):
+    small = await async_client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers
+
+    monkeypatch.setattr(compression, 'COMPRESSION_MIN_SIZE', 0)
+    response = await async_client.get(
+        '/', headers={'Accept-Encoding': 'gzip'}
+    )
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.json() == {'message': 'My e-commerce app'}
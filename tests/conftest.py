@@ -1,12 +1,19 @@
+import os
+from datetime import timedelta
+
 import pytest
 import pytest_asyncio
+from fastapi import status
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.backend.db import Base
 from app.backend.db_depends import get_db
 from app.main import app
+from app.models import User
+from app.routers import auth
 
 # Асинхронный URL для SQLite in-memory (или файл, если нужно)
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test_ecommerce.db"
@@ -25,6 +32,10 @@ AsyncTestingSessionLocal = sessionmaker(
 )
 
 
+# Локальный PostgreSQL для тестов, которым нужна именно эта СУБД
+TEST_POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+
+
 # Создание таблиц асинхронно (выполнить один раз перед тестами)
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def prepare_database():
@@ -37,6 +48,25 @@ async def prepare_database():
     # Можно по окончании сессии почистить, если нужно
 
 
+# Движок тестовой БД для тестов, которым нужен engine напрямую
+@pytest.fixture
+def test_engine():
+    return engine
+
+
+# Движок локального PostgreSQL; тест пропускается, если он не настроен
+@pytest_asyncio.fixture
+async def postgres_engine():
+    if not TEST_POSTGRES_URL:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    pg_engine = create_async_engine(TEST_POSTGRES_URL, pool_size=20)
+    async with pg_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield pg_engine
+    await pg_engine.dispose()
+
+
 # Override зависимости get_db для async сессии
 async def get_db_for_tests():
     async with AsyncTestingSessionLocal() as session:
@@ -60,6 +90,109 @@ async def async_client():
         yield client
 
 
+# Заголовки с JWT администратора (он же поставщик с id=1)
+@pytest_asyncio.fixture
+async def admin_headers(monkeypatch):
+    monkeypatch.setattr(auth, 'SECRET_KEY', 'test-secret')
+    monkeypatch.setattr(auth, 'ALGORITHM', 'HS256')
+    token = await auth.create_access_token(
+        'admin', 1, True, True, True, timedelta(minutes=5)
+    )
+    return {'Authorization': f'Bearer {token}'}
+
+
+async def _create_category(async_client, headers, name, parent_id=None):
+    await async_client.post(
+        '/category/create',
+        json={'name': name, 'parent_id': parent_id},
+        headers=headers
+    )
+    categories = await async_client.get('/category/all_categories')
+    return next(c['id'] for c in categories.json() if c['name'] == name)
+
+
+async def _create_product(async_client, headers, name, price, category_id):
+    response = await async_client.post(
+        '/product/create',
+        json={
+            'name': name,
+            'description': 'desc',
+            'price': price,
+            'image_url': 'http://example.com/image.png',
+            'stock': 10,
+            'category_id': category_id,
+            'supplier_id': 1
+        },
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+async def _review(async_client, headers, slug, grade):
+    response = await async_client.post(
+        f'/product/detail/{slug}/reviews',
+        json={
+            'review': {'comment': 'Exactly what I needed'},
+            'rating': {'grade': grade}
+        },
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+async def _add_user(session_maker, username):
+    async with session_maker() as db:
+        user_id = await db.scalar(
+            insert(User)
+            .values(
+                username=username, email=f'{username}@example.com',
+                hashed_password='x', first_name='', last_name=''
+            )
+            .returning(User.id)
+        )
+        await db.commit()
+    return user_id
+
+
+def _feed_item(slug, user_id, grade, comment='Imported from a partner'):
+    return {
+        'product_slug': slug,
+        'user_id': user_id,
+        'review': {'comment': comment},
+        'rating': {'grade': grade}
+    }
+
+
+# Создаёт категорию через API и возвращает её id
+@pytest.fixture
+def create_category():
+    return _create_category
+
+
+# Создаёт товар через API (10 штук на складе, поставщик с id=1)
+@pytest.fixture
+def create_product():
+    return _create_product
+
+
+# Оставляет отзыв с оценкой grade на товар со slug
+@pytest.fixture
+def review():
+    return _review
+
+
+# Добавляет пользователя напрямую в БД и возвращает его id
+@pytest.fixture
+def add_user():
+    return _add_user
+
+
+# Элемент фида отзывов для /reviews/bulk
+@pytest.fixture
+def feed_item():
+    return _feed_item
+
+
 # Фикстура для отката транзакции после каждого теста (опционально)
 @pytest_asyncio.fixture(autouse=True)
 async def db_session():
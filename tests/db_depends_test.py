@@ -0,0 +1,87 @@
+from typing import Annotated
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel, field_serializer
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.backend.db_depends import ReleasingRoute, track_connection_hold
+from app.backend.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_never_checks_out_a_connection(
+    async_client, test_engine
+):
+    checkouts = []
+
+    def on_checkout(*args):
+        checkouts.append(args)
+
+    event.listen(test_engine.sync_engine, 'checkout', on_checkout)
+    try:
+        response = await async_client.post(
+            '/category/create', json={'name': 'Nope'}
+        )
+    finally:
+        event.remove(test_engine.sync_engine, 'checkout', on_checkout)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert checkouts == []
+
+
+@pytest.mark.asyncio
+async def test_session_is_released_before_serialization():
+    engine = create_async_engine(
+        'sqlite+aiosqlite://', poolclass=AsyncAdaptedQueuePool
+    )
+    track_connection_hold(engine)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session():
+        async with session_maker() as session:
+            yield session
+
+    class Answer(BaseModel):
+        value: int
+
+        @field_serializer('value')
+        def record_pool(self, value):
+            checked_out_during_serialization.append(engine.pool.checkedout())
+            return value
+
+    checked_out_during_serialization = []
+    router = APIRouter(route_class=ReleasingRoute)
+
+    @router.get('/answer/{number}', response_model=Answer)
+    async def answer(
+        db: Annotated[AsyncSession, Depends(get_session)], number: int
+    ):
+        value = await db.scalar(text('SELECT :n'), {'n': number})
+        if value < 0:
+            raise HTTPException(status_code=400, detail='negative')
+        return Answer(value=value)
+
+    app = FastAPI()
+    app.include_router(router)
+    metrics.reset()
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        ok = await client.get('/answer/42')
+        failed = await client.get('/answer/-1')
+    await engine.dispose()
+
+    assert ok.json() == {'value': 42}
+    assert failed.status_code == 400
+    assert checked_out_during_serialization == [0]
+    hold = metrics.snapshot()['summaries'][
+        'db_connection_hold_seconds{route="/answer/{number}"}'
+    ]
+    assert hold['count'] == 2
@@ -0,0 +1,32 @@
+import pytest
+from fastapi import status
+
+from app.backend import warmup
+from app.backend.warmup import readiness
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness():
+    readiness.reset()
+    yield
+    readiness.reset()
+
+
+@pytest.mark.asyncio
+async def test_liveness_does_not_wait_for_warmup(async_client):
+    response = await async_client.get('/health/live')
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await async_client.get('/health/ready')
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_ready_after_warmup(async_client, test_engine):
+    await warmup.warmup(test_engine, pool_size=2)
+
+    response = await async_client.get('/health/ready')
+    assert response.status_code == status.HTTP_200_OK
+    checks = response.json()['checks']
+    assert checks['pool'] == '2 connections primed'
+    assert checks['security_epochs'] == 'filled'
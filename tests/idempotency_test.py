@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from fastapi import status
+
+from app.backend.metrics import metrics
+
+
+def new_user(username):
+    return {
+        'first_name': 'Retry',
+        'last_name': 'User',
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'secret-password'
+    }
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_the_first_response(async_client):
+    headers = {'Idempotency-Key': 'signup-retry-1'}
+    first = await async_client.post(
+        '/auth/', json=new_user('idempotent_retry'), headers=headers
+    )
+    retry = await async_client.post(
+        '/auth/', json=new_user('idempotent_retry'), headers=headers
+    )
+
+    assert first.status_code == status.HTTP_200_OK
+    assert 'idempotent-replayed' not in first.headers
+    assert retry.status_code == status.HTTP_200_OK
+    assert retry.headers['idempotent-replayed'] == 'true'
+    assert retry.json() == first.json()
+
+    other = await async_client.post(
+        '/auth/', json=new_user('idempotent_other'), headers=headers
+    )
+    assert other.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_the_first(async_client):
+    waits = metrics.counter('idempotency_waits_total')
+    headers = {'Idempotency-Key': 'signup-concurrent-1'}
+
+    responses = await asyncio.gather(*(
+        async_client.post(
+            '/auth/', json=new_user('idempotent_burst'), headers=headers
+        )
+        for _ in range(3)
+    ))
+
+    # Without the key the duplicates hit the unique username and fail.
+    assert [r.status_code for r in responses] == [status.HTTP_200_OK] * 3
+    assert sum(
+        r.headers.get('idempotent-replayed') == 'true' for r in responses
+    ) == 2
+    assert metrics.counter('idempotency_waits_total') - waits == 2
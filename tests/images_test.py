@@ -0,0 +1,131 @@
+import io
+
+import pytest
+from fastapi import status
+from PIL import Image
+
+from app.backend import images
+from app.routers import products
+
+
+def png_bytes(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def media_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, 'MEDIA_ROOT', tmp_path)
+    monkeypatch.setattr(images, 'IMAGE_WORKERS', 1)
+    yield tmp_path
+    images.shutdown_pool()
+
+
+@pytest.mark.asyncio
+async def test_upload_stores_variants_and_serves_them(
+    async_client, admin_headers, media_root, create_category, create_product
+):
+    category_id = await create_category(async_client, admin_headers, 'Posters')
+    await create_product(
+        async_client, admin_headers, 'Red Poster', 9, category_id
+    )
+
+    upload = await async_client.post(
+        '/product/detail/red-poster/image',
+        files={'image': ('poster.png', png_bytes(800, 400), 'image/png')},
+        headers=admin_headers
+    )
+    assert upload.status_code == status.HTTP_200_OK
+    stored = upload.json()
+    # 1200 is wider than the original, so it collapses into 800.
+    assert [v['width'] for v in stored['variants']] == [160, 480, 800]
+    assert stored['variants'][1]['height'] == 240
+    assert stored['image_url'] == stored['variants'][1]['jpeg']
+
+    detail = await async_client.get('/product/detail/red-poster')
+    assert detail.json()['image_url'] == stored['image_url']
+
+    webp = await async_client.get(stored['variants'][0]['webp'])
+    assert webp.status_code == status.HTTP_200_OK
+    assert webp.headers['content-type'] == 'image/webp'
+    assert 'immutable' in webp.headers['cache-control']
+    assert Image.open(io.BytesIO(webp.content)).size == (160, 80)
+
+    partial = await async_client.get(
+        stored['image_url'], headers={'Range': 'bytes=0-9'}
+    )
+    assert partial.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert len(partial.content) == 10
+
+    cached = await async_client.get(
+        stored['image_url'], headers={'If-None-Match': webp.headers['etag']}
+    )
+    assert cached.status_code == status.HTTP_200_OK
+    revalidated = await async_client.get(
+        stored['image_url'],
+        headers={'If-None-Match': partial.headers['etag']}
+    )
+    assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+    assert revalidated.content == b''
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_non_images(
+    async_client, admin_headers, media_root, create_category, create_product
+):
+    category_id = await create_category(async_client, admin_headers, 'Mugs')
+    await create_product(
+        async_client, admin_headers, 'Blue Mug', 9, category_id
+    )
+
+    response = await async_client.post(
+        '/product/detail/blue-mug/image',
+        files={'image': ('mug.png', b'not really a png', 'image/png')},
+        headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_oversized_images(
+    async_client, admin_headers, media_root, monkeypatch, create_category,
+    create_product
+):
+    monkeypatch.setattr(products, 'MAX_IMAGE_BYTES', 100)
+    category_id = await create_category(async_client, admin_headers, 'Rugs')
+    await create_product(
+        async_client, admin_headers, 'Wool Rug', 9, category_id
+    )
+
+    response = await async_client.post(
+        '/product/detail/wool-rug/image',
+        files={'image': ('rug.png', png_bytes(400, 400), 'image/png')},
+        headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    detail = await async_client.get('/product/detail/wool-rug')
+    assert detail.json()['image_url'] == 'http://example.com/image.png'
+
+
+@pytest.mark.asyncio
+async def test_unknown_or_malformed_image_paths_are_not_found(async_client):
+    missing = await async_client.get('/images/1/0123456789abcdef/160.jpg')
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+    traversal = await async_client.get('/images/1/..%2F..%2F/160.jpg')
+    assert traversal.status_code in (
+        status.HTTP_404_NOT_FOUND, status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+
+def test_concurrent_writes_of_one_variant_do_not_collide(tmp_path):
+    target = tmp_path / '480.jpg'
+
+    def save_racing_another_writer(path):
+        path.write_bytes(b'first')
+        images._write_atomic(target, lambda other: other.write_bytes(b'2nd'))
+
+    images._write_atomic(target, save_racing_another_writer)
+
+    assert target.read_bytes() == b'first'
+    assert [p.name for p in tmp_path.iterdir()] == ['480.jpg']
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+from app.backend.cache import Cache
+from app.backend.invalidation import InMemoryTransport, InvalidationBus
+
+
+async def make_worker(transport):
+    bus = InvalidationBus(Cache('test', 100, 60), transport)
+    await transport.connect(bus._on_message, bus._on_disconnect)
+    bus.connected = True
+    return bus
+
+
+@pytest.mark.asyncio
+async def test_write_on_one_worker_evicts_on_the_others():
+    transport = InMemoryTransport()
+    writer, reader = await make_worker(transport), await make_worker(transport)
+    reader.cache.set('product:apple', {'id': 1}, ('products', 'product:1'))
+    reader.cache.set('product:pear', {'id': 2}, ('product:2',))
+    writer.cache.set('product:apple', {'id': 1}, ('products', 'product:1'))
+
+    await writer.publish('product', 1)
+
+    assert reader.cache.get('product:apple') is None
+    assert reader.cache.get('product:pear') == {'id': 2}
+    assert writer.cache.get('product:apple') is None
+
+
+@pytest.mark.asyncio
+async def test_sequence_gap_drops_whole_cache():
+    reader = await make_worker(InMemoryTransport())
+    reader.cache.set('categories:all', [], ('categories',))
+
+    def event(seq):
+        return json.dumps({
+            'origin': 'other', 'seq': seq, 'entity': 'product', 'id': 9
+        })
+
+    reader._on_message(event(1))
+    assert reader.cache.get('categories:all') == []
+
+    reader._on_message(event(3))
+    assert reader.cache.get('categories:all') is None
+
+
+@pytest.mark.asyncio
+async def test_reconnect_resyncs(monkeypatch):
+    transport = InMemoryTransport()
+    bus = InvalidationBus(Cache('test', 100, 60), transport)
+    monkeypatch.setattr(
+        'app.backend.invalidation.RECONNECT_MIN_SECONDS', 0
+    )
+    resyncs = []
+    bus.subscribe(lambda event: resyncs.append(event['entity']))
+
+    listener = asyncio.create_task(bus.run())
+    await asyncio.sleep(0)
+    assert bus.connected
+    bus.cache.set('categories:all', [], ('categories',))
+
+    transport.disconnect_all()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    listener.cancel()
+
+    assert resyncs == ['*']
+    assert bus.cache.get('categories:all') is None
+
+
+def test_stale_read_is_not_cached():
+    cache = Cache('test', 100, 60)
+    version = cache.version(('product:1',))
+    cache.invalidate('product:1')
+
+    cache.set('product:apple', {'stock': 5}, ('product:1',), version)
+
+    assert cache.get('product:apple') is None
+
+
+def test_version_may_cover_fewer_tags_than_the_entry():
+    cache = Cache('test', 100, 60)
+    version = cache.version(('products',))
+
+    cache.set('product:apple', {'id': 1}, ('products', 'product:1'), version)
+
+    assert cache.get('product:apple') == {'id': 1}
+
+
+def test_read_is_not_cached_when_its_own_tag_was_invalidated():
+    cache = Cache('test', 100, 60)
+    version = cache.version()
+    cache.invalidate('product:1')
+
+    cache.set('product:apple', {'id': 1}, ('product:1',), version)
+    cache.set('product:pear', {'id': 2}, ('product:2',), version)
+
+    assert cache.get('product:apple') is None
+    assert cache.get('product:pear') == {'id': 2}
@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.backend.db_depends import ReleasingRoute
+from app.backend.loop_watchdog import LoopWatchdog
+from app.backend.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_blocking_handler_is_caught_with_its_route():
+    router = APIRouter(route_class=ReleasingRoute)
+
+    @router.get('/stall/{seconds}')
+    async def stall(seconds: float):
+        time.sleep(seconds)
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05)
+    task = asyncio.create_task(watchdog.run())
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as client:
+            await client.get('/stall/0.001')
+            await asyncio.sleep(0.05)
+            assert not watchdog.blocks
+            await client.get('/stall/0.3')
+        await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    [block] = watchdog.blocks
+    assert block['route'] == '/stall/{seconds}'
+    assert any('stall' in line for line in block['stack'][-3:])
+    assert block['blocked_seconds'] >= 0.25
+    assert metrics.counter(
+        'event_loop_blocks_total', route='/stall/{seconds}'
+    ) >= 1
+    assert metrics.snapshot()['summaries']['event_loop_lag_seconds'][
+        'max'
+    ] >= 0.25
@@ -0,0 +1,96 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.backend import partitions
+from app.backend.partitions import (
+    add_months,
+    create_review_partitions,
+    partition_reviews,
+)
+from app.models import Category, Product, Rating, Review, User
+
+
+def test_add_months_rolls_over_years():
+    assert add_months(date(2025, 11, 1), 1) == date(2025, 12, 1)
+    assert add_months(date(2025, 12, 1), 1) == date(2026, 1, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert add_months(date(2025, 3, 1), 14) == date(2026, 5, 1)
+
+
+async def seed_reviews(db, days):
+    user_id = await db.scalar(
+        insert(User).values(
+            username='pg-reviewer', email='pg@example.com', hashed_password='x'
+        ).returning(User.id)
+    )
+    category_id = await db.scalar(
+        insert(Category).values(name='PG', slug='pg').returning(Category.id)
+    )
+    product_id = await db.scalar(
+        insert(Product).values(
+            name='PG', slug='pg', description='d', price=1.0, image_url='',
+            stock=1, category_id=category_id, rating=0.0
+        ).returning(Product.id)
+    )
+    for day in days:
+        rating_id = await db.scalar(
+            insert(Rating).values(
+                grade=5, user_id=user_id, product_id=product_id, rated_on=day
+            ).returning(Rating.id)
+        )
+        await db.execute(insert(Review).values(
+            user_id=user_id, product_id=product_id, rating_id=rating_id,
+            comment='Partitioned review', comment_date=day
+        ))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_reviews_are_partitioned_and_pruned_on_postgres(
+    postgres_engine, monkeypatch
+):
+    monkeypatch.setattr(partitions, 'REVIEW_PARTITIONS_AHEAD', 2)
+    session_maker = async_sessionmaker(postgres_engine, expire_on_commit=False)
+    today = date.today()
+    last_year = date(today.year - 1, today.month, 15)
+    async with session_maker() as db:
+        await seed_reviews(db, [last_year, today])
+
+    async with postgres_engine.begin() as conn:
+        await conn.run_sync(partition_reviews)
+
+    async with session_maker() as db:
+        assert await db.scalar(text('SELECT count(*) FROM reviews')) == 2
+        this_month = partitions.partition_name(today.replace(day=1))
+        assert await db.scalar(
+            text(f'SELECT count(*) FROM {this_month}')
+        ) == 1
+
+        # New rows still get ids from the original sequence.
+        await db.execute(text(
+            'INSERT INTO reviews (user_id, product_id, rating_id, comment, '
+            'comment_date, is_active) SELECT user_id, product_id, rating_id, '
+            'comment, comment_date, is_active FROM reviews LIMIT 1'
+        ))
+        assert await db.scalar(text('SELECT max(id) FROM reviews')) == 3
+
+        month = today.replace(day=1)
+        plan = '\n'.join(await db.scalars(text(
+            'EXPLAIN SELECT * FROM reviews '
+            f"WHERE comment_date >= '{month}' "
+            f"AND comment_date < '{add_months(month, 1)}'"
+        )))
+        assert this_month in plan
+        assert partitions.partition_name(last_year.replace(day=1)) not in plan
+
+        created = await partitions.ensure_review_partitions(db)
+        assert created == []
+
+    async with postgres_engine.begin() as conn:
+        far = add_months(today.replace(day=1), 12)
+        assert await conn.run_sync(create_review_partitions, far, far) == [
+            partitions.partition_name(far)
+        ]
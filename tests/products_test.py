@@ -0,0 +1,133 @@
+import base64
+
+import pytest
+from fastapi import status
+
+
+@pytest.mark.asyncio
+async def test_filtered_listing_pages_and_facets(
+    async_client, admin_headers, create_category, create_product
+):
+    root = await create_category(async_client, admin_headers, 'Garden')
+    child = await create_category(async_client, admin_headers, 'Tools', root)
+    for name, price, category_id in [
+        ('Rake', 12, child),
+        ('Shovel', 30, child),
+        ('Hose', 45, root),
+        ('Gazebo', 900, root),
+        ('Trowel', 30, child),
+    ]:
+        await create_product(
+            async_client, admin_headers, name, price, category_id
+        )
+
+    seen, cursor = [], None
+    while True:
+        params = {'category_id': root, 'sort': 'price_asc', 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        page = (await async_client.get('/product/', params=params)).json()
+        seen.extend((p['name'], p['price']) for p in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == [
+        ('Rake', 12), ('Shovel', 30), ('Trowel', 30),
+        ('Hose', 45), ('Gazebo', 900)
+    ]
+
+    facets = page['facets']
+    counts = {c['id']: c['count'] for c in facets['categories']}
+    assert counts[root] == 5
+    assert counts[child] == 3
+    assert [b['count'] for b in facets['price']] == [0, 4, 0, 0, 1, 0]
+
+    response = await async_client.get(
+        '/product/', params={'category_id': root, 'max_price': 40}
+    )
+    assert [p['name'] for p in response.json()['items']] == [
+        'Trowel', 'Shovel', 'Rake'
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cursor_from_other_sort_is_rejected(
+    async_client, admin_headers, create_category, create_product
+):
+    category_id = await create_category(async_client, admin_headers, 'Books')
+    for name in ('Novel', 'Atlas'):
+        await create_product(
+            async_client, admin_headers, name, 5, category_id
+        )
+    page = await async_client.get(
+        '/product/', params={'limit': 1, 'sort': 'rating'}
+    )
+
+    response = await async_client.get(
+        '/product/',
+        params={'cursor': page.json()['next_cursor'], 'sort': 'price_asc'}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize('raw', [
+    b'123',
+    b'{}',
+    b'["rating", [4.5]]',
+    b'["rating", [4.5, 1, 2]]',
+    b'["rating", ["4.5", 1]]',
+    b'["rating", [4.5, null]]',
+    b'["rating", 7]',
+    b'not json',
+])
+@pytest.mark.asyncio
+async def test_malformed_cursor_is_rejected(async_client, raw):
+    response = await async_client.get(
+        '/product/',
+        params={
+            'cursor': base64.urlsafe_b64encode(raw).decode(),
+            'sort': 'rating'
+        }
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_batch_lookup_keeps_order_and_reports_misses(
+    async_client, admin_headers, create_category, create_product
+):
+    category_id = await create_category(async_client, admin_headers, 'Lamps')
+    for name in ('Desk Lamp', 'Floor Lamp'):
+        await create_product(
+            async_client, admin_headers, name, 20, category_id
+        )
+    # Warm the detail cache for one of them.
+    await async_client.get('/product/detail/floor-lamp')
+
+    by_slug = await async_client.post(
+        '/product/batch',
+        json={'slugs': ['floor-lamp', 'no-such-lamp', 'desk-lamp', 'floor-lamp']}
+    )
+    assert by_slug.status_code == status.HTTP_200_OK
+    items = by_slug.json()['items']
+    assert [item['key'] for item in items] == [
+        'floor-lamp', 'no-such-lamp', 'desk-lamp', 'floor-lamp'
+    ]
+    assert [item['product'] and item['product']['name'] for item in items] == [
+        'Floor Lamp', None, 'Desk Lamp', 'Floor Lamp'
+    ]
+    assert by_slug.json()['missing'] == ['no-such-lamp']
+
+    desk_id = items[2]['product']['id']
+    by_id = await async_client.post(
+        '/product/batch', json={'ids': [999_999, desk_id]}
+    )
+    assert [item['product'] for item in by_id.json()['items']] == [
+        None, items[2]['product']
+    ]
+
+    both = await async_client.post(
+        '/product/batch', json={'slugs': ['desk-lamp'], 'ids': [desk_id]}
+    )
+    assert both.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.backend.profiling import ProfilingMiddleware, profiles
+
+# Keeps SQLite busy in its worker thread for a while.
+SLOW_QUERY = text(
+    'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c '
+    'WHERE x < 400000) SELECT count(*) FROM c'
+)
+
+
+async def allow(authorization: str) -> bool:
+    return True
+
+
+def busy_handler(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_profile_splits_handler_and_db_time(test_engine):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, authorize=allow)
+
+    @app.get('/slow')
+    async def slow():
+        busy_handler(0.05)
+        async with test_engine.connect() as conn:
+            await conn.scalar(SLOW_QUERY)
+        return {'ok': True}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        plain = await client.get('/slow')
+        profiled = await client.get('/slow', headers={'X-Profile': '1'})
+
+    assert 'x-profile-id' not in plain.headers
+    profile = profiles.get(profiled.headers['x-profile-id'])
+    assert profile['status'] == status.HTTP_200_OK
+    assert profile['seconds']['handler'] > 0.02
+    assert profile['seconds']['db'] > 0
+    assert any(
+        line.startswith('handler;') and 'busy_handler' in line
+        for line in profile['folded'].splitlines()
+    )
+
+
+@pytest.mark.asyncio
+async def test_only_admins_can_profile(async_client, admin_headers):
+    anonymous = await async_client.get(
+        '/product/', headers={'X-Profile': '1'}
+    )
+    assert 'x-profile-id' not in anonymous.headers
+
+    response = await async_client.get(
+        '/product/', headers={**admin_headers, 'X-Profile': '1'}
+    )
+    profile_id = response.headers['x-profile-id']
+    listed = await async_client.get('/admin/profiles', headers=admin_headers)
+    assert profile_id in [item['id'] for item in listed.json()['items']]
+
+    folded = await async_client.get(
+        f'/admin/profiles/{profile_id}',
+        params={'format': 'folded'},
+        headers=admin_headers
+    )
+    assert folded.status_code == status.HTTP_200_OK
+    assert folded.headers['content-type'].startswith('text/plain')
@@ -0,0 +1,58 @@
+import pytest
+
+from app.backend.leaderboard import Leaderboard
+
+
+@pytest.mark.asyncio
+async def test_rankings_follow_new_reviews(
+    async_client, admin_headers, create_category, create_product, review
+):
+    root = await create_category(async_client, admin_headers, 'Kitchen')
+    child = await create_category(async_client, admin_headers, 'Knives', root)
+    await create_product(async_client, admin_headers, 'Pan', 20, root)
+    await create_product(async_client, admin_headers, 'Chef Knife', 50, child)
+    await create_product(async_client, admin_headers, 'Whisk', 5, root)
+
+    await review(async_client, admin_headers, 'pan', 3)
+    await review(async_client, admin_headers, 'pan', 4)
+    await review(async_client, admin_headers, 'chef-knife', 5)
+
+    params = {'category_slug': 'kitchen'}
+    top = await async_client.get('/rankings/top_rated', params=params)
+    assert [r['product']['name'] for r in top.json()] == ['Chef Knife', 'Pan']
+    assert top.json()[1]['rating'] == 3.5
+
+    busy = await async_client.get('/rankings/most_reviewed', params=params)
+    assert [r['product']['name'] for r in busy.json()] == ['Pan', 'Chef Knife']
+
+    # A new review only marks the product dirty; the next read reloads it.
+    await review(async_client, admin_headers, 'whisk', 5)
+    await review(async_client, admin_headers, 'whisk', 5)
+    await review(async_client, admin_headers, 'whisk', 5)
+
+    trending = await async_client.get(
+        '/rankings/trending', params={**params, 'days': 1}
+    )
+    assert [
+        (r['product']['name'], r['recent_reviews']) for r in trending.json()
+    ] == [('Whisk', 3), ('Pan', 2), ('Chef Knife', 1)]
+
+    knives = await async_client.get(
+        '/rankings/top_rated', params={'category_slug': 'knives'}
+    )
+    assert [r['product']['name'] for r in knives.json()] == ['Chef Knife']
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_products_dirty(monkeypatch):
+    board = Leaderboard()
+    board._loaded = True
+    board.on_event({'entity': 'product', 'id': 41})
+
+    async def failing_load(db, product_ids):
+        raise ConnectionError('database went away')
+
+    monkeypatch.setattr(board, '_load', failing_load)
+    with pytest.raises(ConnectionError):
+        await board.refresh(None)
+    assert board._dirty == {41}
@@ -0,0 +1,109 @@
+import pytest
+from fastapi import status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.backend import review_ingest
+from app.models import Product, Review
+from app.routers import reviews
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingestion_inserts_valid_rows_and_reports_bad_ones(
+    async_client, admin_headers, test_engine, monkeypatch, create_category,
+    create_product, add_user, feed_item
+):
+    monkeypatch.setattr(review_ingest, 'REVIEW_CHUNK_SIZE', 2)
+
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    buyer = await add_user(session_maker, 'feed-buyer')
+    category_id = await create_category(async_client, admin_headers, 'Kites')
+    for name in ('Box Kite', 'Delta Kite'):
+        await create_product(
+            async_client, admin_headers, name, 15, category_id
+        )
+
+    feed = [
+        feed_item('box-kite', buyer, 5),
+        feed_item('box-kite', buyer, 2),
+        feed_item('delta-kite', buyer, 9),
+        feed_item('delta-kite', buyer, 4, comment='short'),
+        feed_item('no-such-kite', buyer, 4),
+        feed_item('delta-kite', 999_999, 4),
+        feed_item('delta-kite', buyer, 3),
+        {'product_slug': 'box-kite'},
+    ]
+    response = await async_client.post(
+        '/reviews/bulk', json=feed, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert result['created'] == 3
+    assert result['products'] == 2
+    assert [error['index'] for error in result['errors']] == [2, 3, 4, 5, 7]
+
+    async with session_maker() as db:
+        ratings = dict((await db.execute(
+            select(Product.slug, Product.rating)
+            .where(Product.slug.in_(['box-kite', 'delta-kite']))
+        )).all())
+        linked = await db.scalar(
+            select(func.count(Review.id))
+            .where((Review.user_id == buyer) & Review.rating_id.is_not(None))
+        )
+    assert ratings == {'box-kite': 3.5, 'delta-kite': 3.0}
+    assert linked == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingestion_is_admin_only(async_client):
+    response = await async_client.post('/reviews/bulk', json=[])
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_bulk_feed_over_the_limit_is_rejected(
+    async_client, admin_headers, monkeypatch, feed_item
+):
+    monkeypatch.setattr(reviews, 'MAX_FEED_SIZE', 2)
+    feed = [feed_item('any-product', 1, 5)] * 3
+
+    response = await async_client.post(
+        '/reviews/bulk', json=feed, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.asyncio
+async def test_review_listings_filter_by_date_range(
+    async_client, admin_headers, test_engine, create_category, create_product,
+    add_user, feed_item
+):
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    buyer = await add_user(session_maker, 'dated-buyer')
+    category_id = await create_category(async_client, admin_headers, 'Clocks')
+    await create_product(
+        async_client, admin_headers, 'Wall Clock', 25, category_id
+    )
+    feed = [
+        {**feed_item('wall-clock', buyer, 4), 'comment_date': day}
+        for day in ('2025-01-31', '2025-02-01', '2025-02-28', '2025-03-01')
+    ]
+    await async_client.post('/reviews/bulk', json=feed, headers=admin_headers)
+
+    february = {'since': '2025-02-01', 'until': '2025-02-28'}
+    by_product = await async_client.get(
+        '/product/detail/wall-clock/reviews', params=february
+    )
+    assert sorted(r['comment_date'] for r in by_product.json()) == [
+        '2025-02-01', '2025-02-28'
+    ]
+    everywhere = await async_client.get(
+        '/reviews/', params={'since': '2025-03-01', 'until': '2025-03-01'}
+    )
+    assert [r['comment_date'] for r in everywhere.json()] == ['2025-03-01']
+
+    backwards = await async_client.get(
+        '/reviews/', params={'since': '2025-03-01', 'until': '2025-02-01'}
+    )
+    assert backwards.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,105 @@
+import pytest
+from fastapi import status
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.backend import similarity
+from app.backend.similarity import ItemSimilarity, rating_matrix, top_neighbours
+
+
+def test_blocks_do_not_change_the_neighbours():
+    rows = [
+        (1, 10, 5), (1, 11, 5),
+        (2, 10, 4), (2, 11, 4), (2, 12, 2),
+        (3, 12, 5), (3, 13, 5),
+    ]
+    product_ids, matrix = rating_matrix(rows)
+    whole = list(top_neighbours(matrix, range(4), 2, 1_000))
+    one_by_one = list(top_neighbours(matrix, range(4), 2, 1))
+
+    for (row, neighbours, scores), (_, same, same_scores) in zip(
+        whole, one_by_one
+    ):
+        assert neighbours.tolist() == same.tolist()
+        assert scores.tolist() == same_scores.tolist()
+    row, neighbours, scores = whole[0]
+    assert product_ids[neighbours].tolist() == [11, 12]
+    assert scores[0] == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_similar_products_follow_new_ratings(
+    async_client, admin_headers, test_engine, tmp_path, monkeypatch,
+    create_category, create_product, add_user, feed_item
+):
+    monkeypatch.setattr(
+        similarity, 'SIMILARITY_PATH', tmp_path / 'similar.npz'
+    )
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    category_id = await create_category(async_client, admin_headers, 'Nav')
+    for name in ('Sextant', 'Astrolabe', 'Ship Compass', 'Barometer'):
+        await create_product(async_client, admin_headers, name, 80, category_id)
+    sailor, navigator, captain, stranger = [
+        await add_user(session_maker, name)
+        for name in ('sailor', 'navigator', 'captain', 'stranger')
+    ]
+    feed = [
+        feed_item('sextant', sailor, 5),
+        feed_item('astrolabe', sailor, 5),
+        feed_item('sextant', navigator, 4),
+        feed_item('astrolabe', navigator, 4),
+        feed_item('ship-compass', navigator, 2),
+        feed_item('ship-compass', captain, 5),
+        feed_item('barometer', captain, 5),
+    ]
+    await async_client.post('/reviews/bulk', json=feed, headers=admin_headers)
+
+    run = await async_client.post(
+        '/admin/similarity/run', params={'full': True}, headers=admin_headers
+    )
+    assert run.status_code == status.HTTP_200_OK
+    response = await async_client.get('/product/detail/sextant/similar')
+    assert response.status_code == status.HTTP_200_OK
+    assert [
+        item['product']['slug'] for item in response.json()['items']
+    ] == ['astrolabe', 'ship-compass']
+    assert response.json()['items'][0]['score'] > 0.9
+
+    # Only the products touched by the new rating and their neighbours are
+    # recomputed; the sextant now also sits next to the barometer.
+    await async_client.post(
+        '/reviews/bulk',
+        json=[feed_item('sextant', stranger, 5),
+              feed_item('barometer', stranger, 5)],
+        headers=admin_headers
+    )
+    run = await async_client.post(
+        '/admin/similarity/run', headers=admin_headers
+    )
+    assert 0 < run.json()['recomputed'] <= 4
+    barometer = await async_client.get('/product/detail/barometer/similar')
+    assert 'sextant' in [
+        item['product']['slug'] for item in barometer.json()['items']
+    ]
+
+    # A restarted worker serves the saved lists before its first run.
+    restarted = ItemSimilarity()
+    async with session_maker() as db:
+        await restarted.load(db)
+    assert restarted.similar(response.json()['items'][0]['product']['id'])
+
+    missing = await async_client.get('/product/detail/no-such-thing/similar')
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_unreadable_file_is_rebuilt(test_engine, tmp_path, monkeypatch):
+    path = tmp_path / 'similar.npz'
+    path.write_bytes(b'half of a zip')
+    monkeypatch.setattr(similarity, 'SIMILARITY_PATH', path)
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+
+    async with session_maker() as db:
+        await ItemSimilarity().load(db)
+
+    assert similarity._read(path)
+    assert [p.name for p in tmp_path.iterdir()] == ['similar.npz']
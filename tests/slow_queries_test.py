@@ -0,0 +1,68 @@
+import pytest
+from fastapi import status
+
+from app.backend import slow_queries
+from app.backend.slow_queries import normalize, record_slow_queries
+
+
+def test_normalize_strips_values_and_collapses_in_lists():
+    assert normalize(
+        "SELECT *\n  FROM products WHERE id IN (?, ?, ?) "
+        "AND slug = 'it''s' AND price > 10.5 AND col_2 = $1"
+    ) == (
+        'SELECT * FROM products WHERE id IN (...) '
+        'AND slug = ? AND price > ? AND col_2 = $1'
+    )
+
+
+@pytest.mark.asyncio
+async def test_slow_statements_are_aggregated_with_their_plan(
+    async_client, admin_headers, test_engine, monkeypatch
+):
+    monkeypatch.setattr(slow_queries, 'SLOW_QUERY_SECONDS', 0)
+    monkeypatch.setattr(slow_queries, 'SLOW_QUERY_EXPLAIN', True)
+    record_slow_queries(test_engine)
+    await async_client.delete('/admin/slow_queries', headers=admin_headers)
+
+    for _ in range(2):
+        response = await async_client.get(
+            '/supplier/1/stats', headers=admin_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    # Calls made after this point are not slow anymore.
+    monkeypatch.setattr(slow_queries, 'SLOW_QUERY_SECONDS', 60)
+    listed = await async_client.get(
+        '/admin/slow_queries',
+        params={'order': 'count'},
+        headers=admin_headers
+    )
+    items = listed.json()['items']
+    assert len(items) == 2
+    stats = next(i for i in items if 'FROM supplier_stats' in i['statement'])
+    assert stats['count'] == 2
+    assert stats['routes'] == {'/supplier/{supplier_id}/stats': 2}
+    assert stats['mean'] <= stats['max']
+    assert 'supplier_stats' in stats['explain']
+
+
+def test_locking_selects_are_not_explained(monkeypatch):
+    monkeypatch.setattr(slow_queries, 'SLOW_QUERY_SECONDS', 0)
+    monkeypatch.setattr(slow_queries, 'SLOW_QUERY_EXPLAIN', True)
+    explained = []
+    monkeypatch.setattr(
+        slow_queries, '_explain', lambda *args: explained.append(args)
+    )
+    slow_queries.slow_query_log.reset()
+
+    class Context:
+        _slow_query_started = 0.0
+
+    statement = 'SELECT stock FROM products WHERE id = $1 FOR NO KEY UPDATE'
+    slow_queries._after_cursor_execute(
+        None, None, statement, (1,), Context(), False
+    )
+
+    assert explained == []
+    [entry] = slow_queries.slow_query_log.top(1)
+    assert entry['explain'] is None
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import status
+
+from app.backend.metrics import metrics
+from app.backend.suggest import SuggestIndex, index_terms, normalize
+
+
+def test_terms_cover_every_word_of_the_name():
+    assert normalize('  Crème-Brûlée TORCH ') == 'creme brulee torch'
+    assert index_terms('Red Wall Clock', 'clock-0042') == {
+        'red wall clock', 'wall clock', 'clock', 'clock 0042'
+    }
+
+
+@pytest.mark.asyncio
+async def test_suggest_matches_word_prefixes_best_rated_first(
+    async_client, admin_headers, create_category, create_product, review
+):
+    category = await create_category(async_client, admin_headers, 'Curios')
+    for name in ('Quokka Lamp', 'Brass Quokka Figurine', 'Quokkaville Mug'):
+        await create_product(async_client, admin_headers, name, 15, category)
+    await review(async_client, admin_headers, 'brass-quokka-figurine', 5)
+    await review(async_client, admin_headers, 'quokka-lamp', 3)
+
+    response = await async_client.get(
+        '/product/suggest', params={'q': 'quok'}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [item['name'] for item in response.json()['items']] == [
+        'Brass Quokka Figurine', 'Quokka Lamp', 'Quokkaville Mug'
+    ]
+
+    narrowed = await async_client.get(
+        '/product/suggest', params={'q': 'quokka fig', 'limit': 1}
+    )
+    assert [item['slug'] for item in narrowed.json()['items']] == [
+        'brass-quokka-figurine'
+    ]
+    assert metrics.snapshot()['gauges']['suggest_index_bytes'] > 0
+
+    # The delete goes through the invalidation bus; the next call drops it.
+    lamp = response.json()['items'][1]['id']
+    deleted = await async_client.delete(
+        '/product/delete',
+        params={'product_id': lamp},
+        headers=admin_headers
+    )
+    assert deleted.status_code == status.HTTP_200_OK
+    response = await async_client.get(
+        '/product/suggest', params={'q': 'quokka'}
+    )
+    assert [item['name'] for item in response.json()['items']] == [
+        'Brass Quokka Figurine', 'Quokkaville Mug'
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_products_dirty(monkeypatch):
+    index = SuggestIndex()
+    index._loaded = True
+    index.on_event({'entity': 'product', 'id': 17})
+
+    async def failing_fetch(db, product_ids):
+        raise ConnectionError('database went away')
+
+    monkeypatch.setattr(index, '_fetch', failing_fetch)
+    with pytest.raises(ConnectionError):
+        await index.refresh(None)
+    assert index._dirty == {17}
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.backend.rollups import supplier_rollups
+from app.routers import auth
+
+
+async def stats(async_client, headers):
+    response = await async_client.get('/supplier/1/stats', headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_rollups_follow_product_and_review_writes(
+    async_client, admin_headers, test_engine, create_category, create_product,
+    review
+):
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    reconcile = await async_client.post(
+        '/admin/rollups/reconcile', headers=admin_headers
+    )
+    assert reconcile.status_code == status.HTTP_200_OK
+    before = await stats(async_client, admin_headers)
+
+    category_id = await create_category(async_client, admin_headers, 'Yarn')
+    for name in ('Merino Skein', 'Alpaca Skein'):
+        await create_product(async_client, admin_headers, name, 12, category_id)
+    await review(async_client, admin_headers, 'merino-skein', 4)
+
+    # Nothing is aggregated on read; the rows move once the queue flushes.
+    assert await stats(async_client, admin_headers) == before
+    async with session_maker() as db:
+        assert await supplier_rollups.flush(db) == 1
+
+    after = await stats(async_client, admin_headers)
+    assert after['active_skus'] == before['active_skus'] + 2
+    assert after['stock_units'] == before['stock_units'] + 20
+    assert after['stock_value'] == pytest.approx(before['stock_value'] + 240)
+    assert after['ratings'] == before['ratings'] + 1
+    assert len(after['reviews_per_week']) == len(before['reviews_per_week'])
+    assert (
+        after['reviews_per_week'][-1]['reviews']
+        == before['reviews_per_week'][-1]['reviews'] + 1
+    )
+
+    products = await async_client.get(
+        '/product/detail/alpaca-skein', headers=admin_headers
+    )
+    await async_client.delete(
+        '/product/delete',
+        params={'product_id': products.json()['id']},
+        headers=admin_headers
+    )
+    async with session_maker() as db:
+        await supplier_rollups.flush(db)
+    assert (
+        (await stats(async_client, admin_headers))['active_skus']
+        == after['active_skus'] - 1
+    )
+
+    # The periodic reconcile lands on the same numbers.
+    await async_client.post('/admin/rollups/reconcile', headers=admin_headers)
+    reconciled = await stats(async_client, admin_headers)
+    assert reconciled['active_skus'] == after['active_skus'] - 1
+    assert reconciled['ratings'] == after['ratings']
+
+
+@pytest.mark.asyncio
+async def test_suppliers_only_see_their_own_stats(
+    async_client, admin_headers
+):
+    # admin_headers configures the signing key the token below needs.
+    token = await auth.create_access_token(
+        'other-supplier', 2, False, True, False, timedelta(minutes=5)
+    )
+    response = await async_client.get(
+        '/supplier/1/stats', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_periodic_reconcile_runs_once_per_interval(
+    async_client, admin_headers, test_engine, create_category, create_product
+):
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    category_id = await create_category(async_client, admin_headers, 'Twine')
+    await create_product(
+        async_client, admin_headers, 'Jute Twine', 4, category_id
+    )
+
+    async with session_maker() as db:
+        assert await supplier_rollups.reconcile(db, force=True) >= 1
+    before = await stats(async_client, admin_headers)
+    # Another worker's turn: the rows are fresh, so it leaves them alone.
+    async with session_maker() as db:
+        assert await supplier_rollups.reconcile(db) is None
+        # Rebuilding rows that exist updates them in place.
+        assert await supplier_rollups.reconcile(db, force=True) >= 1
+    after = await stats(async_client, admin_headers)
+    after.pop('updated_at'), before.pop('updated_at')
+    assert after == before
@@ -0,0 +1,63 @@
+import pytest
+from fastapi import status
+
+from app.backend import tracing
+from app.backend.tracing import instrument_engine, tracer
+
+
+def spans_of(trace: dict) -> list[dict]:
+    return trace['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+
+@pytest.mark.asyncio
+async def test_sampled_request_is_traced_end_to_end(
+    async_client, admin_headers, test_engine, monkeypatch
+):
+    monkeypatch.setattr(tracer, 'sample_rate', 1.0)
+    monkeypatch.setattr(tracer, 'exporter', tracing.InMemoryCollector())
+    instrument_engine(test_engine)
+
+    response = await async_client.get(
+        '/supplier/1/stats', headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    trace_id = response.headers['x-trace-id']
+
+    [trace] = tracer.exporter.traces
+    spans = spans_of(trace)
+    by_name = {span['name']: span for span in spans}
+    assert {span['traceId'] for span in spans} == {trace_id}
+
+    root = by_name['GET /supplier/1/stats']
+    attributes = {a['key']: a['value'] for a in root['attributes']}
+    assert attributes['http.status_code'] == {'intValue': '200'}
+    assert 'log_id' in attributes
+
+    route = by_name['route /supplier/{supplier_id}/stats']
+    handler = by_name['handler /supplier/{supplier_id}/stats']
+    auth = by_name['dependency get_user_data_from_jwt']
+    assert route['parentSpanId'] == root['spanId']
+    assert handler['parentSpanId'] == auth['parentSpanId'] == route['spanId']
+    statements = [span for span in spans if span['name'] == 'sql SELECT']
+    assert len(statements) == 2
+    assert all(s['parentSpanId'] == handler['spanId'] for s in statements)
+    assert all(s['kind'] == tracing.CLIENT for s in statements)
+
+
+@pytest.mark.asyncio
+async def test_sampling_is_decided_at_the_root(async_client, monkeypatch):
+    monkeypatch.setattr(tracer, 'sample_rate', 0.0)
+    monkeypatch.setattr(tracer, 'exporter', tracing.InMemoryCollector())
+
+    skipped = await async_client.get('/')
+    assert 'x-trace-id' not in skipped.headers
+    assert not tracer.exporter.traces
+
+    # A caller that sampled the trace keeps it sampled here.
+    trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+    followed = await async_client.get(
+        '/', headers={'traceparent': f'00-{trace_id}-00f067aa0ba902b7-01'}
+    )
+    assert followed.headers['x-trace-id'] == trace_id
+    [root] = spans_of(tracer.exporter.traces[0])
+    assert root['parentSpanId'] == '00f067aa0ba902b7'